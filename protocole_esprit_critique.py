@@ -16,11 +16,76 @@ CORRECTIONS MAJEURES v2.0 :
 - Biais structurels corrigés
 """
 
+import functools
+import hashlib
+import heapq
+import json
+import marshal
 import math
-from typing import List, Dict, Tuple, Optional
-from dataclasses import dataclass
+import operator
+import os
+import random
+import re
+import sys
+import threading
+import time
+import tracemalloc
+import unicodedata
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from itertools import chain
+from typing import (List, Dict, Tuple, Optional, Set, FrozenSet, Iterator, Iterable,
+                    AsyncIterable, AsyncIterator, Callable, Sequence, Union)
+from dataclasses import dataclass, field
 from enum import Enum
 
+try:
+    import numpy as np
+except ImportError:  # NumPy est optionnel : repli sur le calcul scalaire
+    np = None
+
+
+# Dataclasses internes sans __dict__ lorsque l'interpréteur le permet (Python 3.10+) ;
+# Source, Fait et Contradiction gardent le leur (API publique), le mode compact
+# ne les stocke pas
+_OPTIONS_DATACLASS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+MOTS_CLES_ANOMALIES = [
+    "contradiction", "improbable", "impossible", "incohérence", "anomalie",
+    "étrange", "suspect", "inexpliqué", "inhabituel", "invraisemblable",
+    "paradoxe", "discordance", "aberration", "bizarrerie", "mystère",
+    "chute libre", "température insuffisante", "sans impact", "multiples",
+    "simultanés", "intact", "désintégrés", "fusion", "traces", "mystérieusement"
+]
+
+# Spécificité de l'anomalie (plus c'est précis, mieux c'est)
+TERMES_SPECIFICITE = ["température", "vitesse", "timing", "coordonnées"]
+
+# Vérifiabilité technique
+TERMES_VERIFIABILITE = ["physique", "technique", "mesurable", "calculable"]
+
+# Contradictions explicites
+MOTS_OPPOSITION_DIRECTS = [
+    ("possible", "impossible"),
+    ("présent", "absent"),
+    ("élevé", "faible"),
+    ("rapide", "lent"),
+    ("chaud", "froid"),
+    ("intact", "détruit"),
+    ("visible", "invisible")
+]
+
+# Contradictions contextuelles (à personnaliser selon le domaine)
+CONTRADICTIONS_SPECIFIQUES = [
+    ("effondrement par feu", "vitesse chute libre"),
+    ("surprise totale", "exercices simultanés"),
+    ("origine naturelle", "labo épicentre"),
+    ("asymptomatiques contagieux", "transmission rare"),
+    ("simple cambriolage", "équipement sophistiqué")
+]
+
 
 class TypeSource(Enum):
     OFFICIELLE = "officielle"
@@ -29,6 +94,65 @@ class TypeSource(Enum):
     DOCUMENT = "document"
 
 
+# Bonus de validation d'une anomalie selon le type de source
+# (documents > témoignages > alternatives > officielles)
+BONUS_TYPE_SOURCE = {
+    TypeSource.DOCUMENT: 0.3,
+    TypeSource.TEMOIGNAGE: 0.2,
+    TypeSource.ALTERNATIVE: 0.15,
+    TypeSource.OFFICIELLE: 0.1  # Sources officielles moins susceptibles de rapporter leurs propres anomalies
+}
+
+
+_TYPES_SOURCE = list(TypeSource)
+_RANG_TYPE_SOURCE = {type_source: rang for rang, type_source in enumerate(_TYPES_SOURCE)}
+
+# Comptes de sources par type (dans l'ordre de _TYPES_SOURCE) : les
+# combinaisons distinctes sont peu nombreuses, chaque Fait ne garde qu'une
+# référence vers un tuple partagé
+_COMPTES_VIDES = (0,) * len(_TYPES_SOURCE)
+_COMPTES_PARTAGES: Dict[Tuple[int, ...], Tuple[int, ...]] = {_COMPTES_VIDES: _COMPTES_VIDES}
+
+
+def _comptes_partages(comptes: List[int]) -> Tuple[int, ...]:
+    comptes = tuple(comptes)
+    return _COMPTES_PARTAGES.setdefault(comptes, comptes)
+
+
+_COMPTES_SOURCE_UNIQUE = {type_source: _comptes_partages([int(t is type_source) for t in _TYPES_SOURCE])
+                          for type_source in _TYPES_SOURCE}
+
+# Nombre d'affectations des attributs suivis des faits et contradictions
+# (cf. _suivre_attributs) : fait partie de la clé du cache des étapes
+_modifications_objets = 0
+
+
+def _noter_modification():
+    global _modifications_objets
+    _modifications_objets += 1
+
+
+def _suivre_attributs(*noms):
+    """
+    Décorateur de dataclass : chaque affectation des attributs nommés est
+    comptée dans _modifications_objets, le cache des étapes voit donc leurs
+    modifications en place. Seuls les attributs lus par les étapes
+    mémoïsées sont suivis ; leur lecture reste en C (operator.attrgetter).
+    """
+    def decorateur(cls):
+        for nom in noms:
+            cle = "_" + nom
+
+            def ecrire(self, valeur, cle=cle):
+                global _modifications_objets
+                self.__dict__[cle] = valeur
+                _modifications_objets += 1
+
+            setattr(cls, nom, property(operator.attrgetter(cle), ecrire))
+        return cls
+    return decorateur
+
+
 @dataclass
 class Source:
     nom: str
@@ -38,6 +162,7 @@ class Source:
     raisonnement_rationnel: bool = True
 
 
+@_suivre_attributs("confirme_par_multiples_sources")
 @dataclass
 class Fait:
     description: str
@@ -45,24 +170,1810 @@ class Fait:
     probabilite: float = 0.5  # probabilité bayésienne initiale
     confirme_par_multiples_sources: bool = False
     solidite_factuelle: float = 0.5  # Nouveau : solidité objective du fait
+    # Informations quasi identiques fusionnées dans ce fait (cf. IndexQuasiDoublons) ;
+    # tuple vide partagé tant qu'aucune variante n'est ajoutée
+    variantes: Sequence[str] = field(default=(), repr=False, compare=False)
+    # Agrégats courants sur les sources, tenus à jour en O(1) par ajouter_source
+    nombre_sources: int = field(default=0, init=False, repr=False, compare=False)
+    somme_credibilite: float = field(default=0.0, init=False, repr=False, compare=False)
+    _comptes_types: Tuple[int, ...] = field(default=_COMPTES_VIDES, init=False, repr=False, compare=False)
+    # (description, *jetons de sa forme normalisée), calculés une fois (cf. texte_normalise) ;
+    # un seul tuple, sans tuple imbriqué
+    _jetons_description: Optional[Tuple[str, ...]] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._recalculer_agregats()
 
+    @property
+    def texte_normalise(self) -> 'TexteNormalise':
+        """
+        Description normalisée, partagée par tous les chemins de comparaison :
+        seuls les jetons sont gardés (recalculés si la description est
+        réaffectée), la forme est recalculée à la demande
+        """
+        cache = self._jetons_description
+        if cache is None or cache[0] is not self.description:
+            texte = TexteNormalise(self.description)
+            self._jetons_description = (self.description, *texte.jetons)
+            return texte
+        return TexteNormalise(self.description, cache[1:])
+
+    def ajouter_source(self, source: Source):
+        """
+        Ajoute une source et met à jour les agrégats sans reparcourir la liste
+        """
+        self.sources.append(source)
+        self.nombre_sources += 1
+        self.somme_credibilite += source.credibilite
+        comptes = list(self._comptes_types)
+        comptes[_RANG_TYPE_SOURCE[source.type_source]] += 1
+        self._comptes_types = _comptes_partages(comptes)
+
+    @property
+    def sources_par_type(self) -> Dict[TypeSource, int]:
+        """
+        Nombre de sources du fait par type (types absents omis)
+        """
+        return {type_source: nombre for type_source, nombre in zip(_TYPES_SOURCE, self._comptes_types) if nombre}
+
+    def retirer_source(self, source: Source) -> int:
+        """
+        Retire toutes les occurrences d'une source ; retourne leur nombre
+        """
+        restantes = [s for s in self.sources if s is not source]
+        retirees = len(self.sources) - len(restantes)
+        if retirees:
+            self.sources[:] = restantes
+            self._recalculer_agregats()
+        return retirees
 
+    def ajouter_variante(self, description: str):
+        if not isinstance(self.variantes, list):
+            self.variantes = list(self.variantes)
+        self.variantes.append(description)
+
+    def synchroniser_agregats(self):
+        """
+        Recalcule les agrégats si self.sources a été modifiée directement
+        """
+        if self.nombre_sources != len(self.sources):
+            self._recalculer_agregats()
+
+    def _recalculer_agregats(self):
+        self.nombre_sources = len(self.sources)
+        self.somme_credibilite = 0.0
+        for source in self.sources:
+            self.somme_credibilite += source.credibilite
+        if self.nombre_sources == 1:
+            self._comptes_types = _COMPTES_SOURCE_UNIQUE[self.sources[0].type_source]
+        else:
+            comptes = [0] * len(_TYPES_SOURCE)
+            for source in self.sources:
+                comptes[_RANG_TYPE_SOURCE[source.type_source]] += 1
+            self._comptes_types = _comptes_partages(comptes)
+
+
+@_suivre_attributs("niveau_incompatibilite", "validee_independamment")
 @dataclass
 class Contradiction:
     fait_a: str
     fait_b: str
     niveau_incompatibilite: float  # 0-1
     validee_independamment: bool = False  # Nouveau : validation externe
+    # Références directes aux deux faits (renseignées par le protocole)
+    ref_fait_a: Optional[Fait] = field(default=None, repr=False, compare=False)
+    ref_fait_b: Optional[Fait] = field(default=None, repr=False, compare=False)
+
+
+class RegistreSources:
+    """
+    Table d'internement des sources : chaque objet Source reçoit un
+    identifiant entier compact, stocké à la place de la référence
+    
+    La correspondance id(source) -> identifiant tient dans deux tableaux
+    triés (12 octets par source) ; les derniers internés attendent dans un
+    petit dictionnaire, fusionné dans les tableaux par paliers.
+    """
+
+    def __init__(self):
+        self.sources: List[Source] = []
+        self._cles = array('Q')
+        self._identifiants = array('I')
+        self._recents: Dict[int, int] = {}
+
+    def chercher(self, source: Source) -> Optional[int]:
+        """
+        Identifiant d'une source déjà internée, sinon None
+        """
+        cle = id(source)
+        identifiant = self._recents.get(cle)
+        if identifiant is not None:
+            return identifiant
+        position = bisect_left(self._cles, cle)
+        if position < len(self._cles) and self._cles[position] == cle:
+            return self._identifiants[position]
+        return None
+
+    def interner(self, source: Source) -> int:
+        identifiant = self.chercher(source)
+        if identifiant is not None:
+            return identifiant
+        cle = id(source)
+        identifiant = len(self.sources)
+        self.sources.append(source)
+        self._recents[cle] = identifiant
+        if len(self._recents) > max(64, len(self._cles) >> 3):
+            self._fusionner()
+        return identifiant
+
+    def _fusionner(self):
+        cles, identifiants = array('Q'), array('I')
+        for cle, identifiant in heapq.merge(zip(self._cles, self._identifiants),
+                                            sorted(self._recents.items())):
+            cles.append(cle)
+            identifiants.append(identifiant)
+        self._cles, self._identifiants, self._recents = cles, identifiants, {}
+
+    def __getitem__(self, identifiant: int) -> Source:
+        return self.sources[identifiant]
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+
+def _colonne(nom: str, conversion=float):
+    """
+    Propriété lisant/écrivant la ligne de la vue dans une colonne de l'entrepôt
+    """
+    def lire(self):
+        return conversion(getattr(self._entrepot, nom)[self._indice])
+
+    def ecrire(self, valeur):
+        getattr(self._entrepot, nom)[self._indice] = valeur
+        _noter_modification()
+
+    return property(lire, ecrire)
+
+
+class SourceInternee:
+    """
+    Vue sur une source du RegistreSourcesPartage exposant les attributs de
+    Source ; une seule vue par source (les faits la partagent). Les
+    informations, propres à chaque cas, ne sont pas conservées.
+    """
+    __slots__ = ("_entrepot", "_indice")
+    informations: Tuple[str, ...] = ()
+
+    def __init__(self, registre: 'RegistreSourcesPartage', indice: int):
+        self._entrepot = registre
+        self._indice = indice
+
+    credibilite = property(_colonne("credibilites").fget)
+    raisonnement_rationnel = property(_colonne("rationnels", bool).fget)
+
+    @property
+    def nom(self) -> str:
+        return self._entrepot.noms[self._indice]
+
+    @property
+    def type_source(self) -> TypeSource:
+        return _TYPES_SOURCE[self._entrepot.types[self._indice]]
+
+    def __repr__(self):
+        return (f"SourceInternee(nom={self.nom!r}, type_source={self.type_source}, "
+                f"credibilite={self.credibilite}, raisonnement_rationnel={self.raisonnement_rationnel})")
+
+
+class RegistreSourcesPartage:
+    """
+    Registre des sources commun à tous les cas d'un processus
+    (cf. registre_sources_partage)
+    
+    Une source est identifiée par son nom et son type : les copies d'une
+    même source créées par des cas différents reçoivent le même identifiant
+    entier. Crédibilité, type et raisonnement sont stockés une fois dans des
+    tableaux ; ce sont eux qui font foi (une copie dont la crédibilité
+    diverge est comptée dans `divergences`, sans effet). Les faits ne
+    retiennent que l'identifiant ou la vue SourceInternee, jamais les
+    informations du cas.
+    
+    modifier_credibilite vaut pour tous les cas à la fois : chaque protocole
+    recalcule les faits de la source à sa prochaine étape. S'utilise aussi
+    comme registre d'un EntrepotFaits (mode compact).
+    """
+
+    def __init__(self):
+        self.noms: List[str] = []
+        self.types = array('b')
+        self.credibilites = array('d')
+        self.rationnels = array('b')
+        self.version = 0
+        self.divergences = 0
+        self._identifiants: Dict[Tuple[str, TypeSource], int] = {}
+        self._vues: List[SourceInternee] = []
+        self._journal = array('I')  # source modifiée par chaque version
+        self._verrou = threading.Lock()  # internement depuis plusieurs threads
+
+    def chercher(self, source: Source) -> Optional[int]:
+        if isinstance(source, SourceInternee) and source._entrepot is self:
+            return source._indice
+        return self._identifiants.get((source.nom, source.type_source))
+
+    def interner(self, source: Source) -> int:
+        identifiant = self.chercher(source)
+        if identifiant is None:
+            with self._verrou:
+                identifiant = self._identifiants.get((source.nom, source.type_source))
+                if identifiant is None:
+                    identifiant = len(self.noms)
+                    self.noms.append(source.nom)
+                    self.types.append(_TYPES_SOURCE.index(source.type_source))
+                    self.credibilites.append(source.credibilite)
+                    self.rationnels.append(bool(source.raisonnement_rationnel))
+                    self._vues.append(SourceInternee(self, identifiant))
+                    self._identifiants[(source.nom, source.type_source)] = identifiant
+                    return identifiant
+        if not isinstance(source, SourceInternee) and (
+                source.credibilite != self.credibilites[identifiant]
+                or bool(source.raisonnement_rationnel) != self.rationnels[identifiant]):
+            self.divergences += 1
+        return identifiant
+
+    def canonique(self, source: Source) -> SourceInternee:
+        """
+        Vue partagée de la source (internée au besoin)
+        """
+        return self._vues[self.interner(source)]
+
+    def modifier_credibilite(self, nom: str, type_source: TypeSource, credibilite: float) -> int:
+        """
+        Nouvelle crédibilité d'une source pour tous les cas ; retourne son identifiant
+        """
+        identifiant = self._identifiants.get((nom, type_source))
+        if identifiant is None:
+            raise KeyError(f"source inconnue : {nom!r} ({type_source.value})")
+        if not 0 <= credibilite <= 1:  # NaN compris
+            raise ValueError(f"crédibilité hors de [0, 1] : {credibilite}")
+        with self._verrou:
+            self.credibilites[identifiant] = credibilite
+            self._journal.append(identifiant)
+            self.version += 1
+        return identifiant
+
+    def modifications_depuis(self, version: int, jusqu_a: Optional[int] = None) -> Set[int]:
+        """
+        Sources dont la crédibilité a changé après `version` (et jusqu'à
+        `jusqu_a` inclus)
+        """
+        return set(self._journal[version:jusqu_a])
+
+    @property
+    def sources(self) -> List[SourceInternee]:
+        return list(self._vues)
+
+    def __getitem__(self, identifiant: int) -> SourceInternee:
+        return self._vues[identifiant]
+
+    def __len__(self) -> int:
+        return len(self.noms)
+
+
+_REGISTRE_PARTAGE: Optional[RegistreSourcesPartage] = None
+_VERROU_REGISTRE_PARTAGE = threading.Lock()
+
+
+def registre_sources_partage() -> RegistreSourcesPartage:
+    """
+    Registre des sources du processus, créé au premier appel
+    """
+    global _REGISTRE_PARTAGE
+    with _VERROU_REGISTRE_PARTAGE:
+        if _REGISTRE_PARTAGE is None:
+            _REGISTRE_PARTAGE = RegistreSourcesPartage()
+        return _REGISTRE_PARTAGE
+
+
+class FaitCompact:
+    """
+    Vue sur une ligne d'EntrepotFaits exposant les attributs de Fait
+    
+    La liste `sources` est reconstruite à chaque accès : on ajoute une
+    source via ajouter_source, jamais en modifiant la liste retournée.
+    """
+    __slots__ = ("_entrepot", "_indice")
+
+    def __init__(self, entrepot: 'EntrepotFaits', indice: int):
+        self._entrepot = entrepot
+        self._indice = indice
+
+    solidite_factuelle = _colonne("solidite_factuelle")
+    confirme_par_multiples_sources = _colonne("confirme", bool)
+    nombre_sources = property(_colonne("nombre_sources", int).fget)
+    somme_credibilite = property(_colonne("somme_credibilite").fget)
+
+    @property
+    def probabilite(self) -> float:
+        return self._entrepot.probabilites.get(self._indice, EntrepotFaits.PROBABILITE_DEFAUT)
+
+    @probabilite.setter
+    def probabilite(self, valeur: float):
+        if valeur == EntrepotFaits.PROBABILITE_DEFAUT:
+            self._entrepot.probabilites.pop(self._indice, None)
+        else:
+            self._entrepot.probabilites[self._indice] = float(valeur)
+
+    @property
+    def description(self) -> str:
+        return self._entrepot.descriptions[self._indice]
+
+    @property
+    def sources(self) -> List[Source]:
+        return self._entrepot.sources_du_fait(self._indice)
+
+    @property
+    def sources_par_type(self) -> Dict[TypeSource, int]:
+        return {type_source: comptes[self._indice]
+                for type_source, comptes in self._entrepot.comptes_par_type.items()
+                if comptes[self._indice]}
+
+    @property
+    def variantes(self) -> List[str]:
+        return list(self._entrepot.variantes.get(self._indice, ()))
+
+    @property
+    def texte_normalise(self) -> 'TexteNormalise':
+        return self._entrepot.texte_normalise(self._indice)
+
+    def ajouter_source(self, source: Source):
+        self._entrepot.ajouter_source(self._indice, source)
+
+    def retirer_source(self, source: Source) -> int:
+        return self._entrepot.retirer_source(self._indice, source)
+
+    def ajouter_variante(self, description: str):
+        self._entrepot.variantes.setdefault(self._indice, []).append(description)
+
+    def synchroniser_agregats(self):
+        """
+        Sans objet : les agrégats de l'entrepôt sont toujours à jour
+        """
+
+    def _recalculer_agregats(self):
+        self._entrepot.recalculer_somme_credibilite(self._indice)
+
+    def __eq__(self, autre):
+        if isinstance(autre, FaitCompact) and autre._entrepot is self._entrepot:
+            return autre._indice == self._indice
+        return NotImplemented
+
+    def __repr__(self):
+        return (f"FaitCompact(description={self.description!r}, nombre_sources={self.nombre_sources}, "
+                f"probabilite={self.probabilite}, confirme_par_multiples_sources="
+                f"{self.confirme_par_multiples_sources}, solidite_factuelle={self.solidite_factuelle})")
+
+
+class EntrepotFaits:
+    """
+    Stockage colonnaire des faits pour le mode compact
+    
+    Remplace la liste self.faits : indexation, itération, len et append se
+    comportent comme pour une liste, chaque élément étant une vue FaitCompact.
+    Les scores sont des tableaux de flottants, les sources des identifiants
+    internés dans des tableaux d'entiers (aucun objet par fait). Les
+    probabilités initiales, presque toutes à PROBABILITE_DEFAUT, ne sont
+    stockées que lorsqu'elles s'en écartent.
+
+    Gain mesuré (tracemalloc, 200 000 faits synthétiques, mémoire retenue
+    par fait, jetons des descriptions compris) : 76 octets contre 441 pour
+    des objets Fait après collecter_informations, 93 contre 599 une fois
+    les contradictions identifiées (l'index des descriptions passe en
+    PositionsParDescription) et 109 contre 615 après livrer_conclusion,
+    soit plus de 5x à chaque étape. Le pic de la collecte n'est pas réduit (les Fait sont copiés
+    dans les colonnes à la fin).
+    """
+    PROBABILITE_DEFAUT = 0.5
+
+    def __init__(self, registre: Union[RegistreSources, RegistreSourcesPartage, None] = None):
+        self.registre = registre if registre is not None else RegistreSources()
+        self.descriptions: List[str] = []
+        self.solidite_factuelle = array('d')
+        self.somme_credibilite = array('d')
+        self.nombre_sources = array('I')
+        self.confirme = array('b')
+        # Comptes de sources par type : un octet par fait, colonne élargie au
+        # premier dépassement (cf. _lier)
+        self.comptes_par_type = {type_source: array('B') for type_source in TypeSource}
+        self.probabilites: Dict[int, float] = {}  # écarts au défaut : dictionnaire creux
+        self.variantes: Dict[int, List[str]] = {}  # rares : dictionnaire creux
+        # Sources de chaque fait : v >= 0 source unique v ; -1 aucune ; v <= -2
+        # chaîne de liens partant du lien -2 - v, la plus récente en tête
+        self._sources_fait = array('i')
+        self._lien_source = array('I')
+        self._lien_suivant = array('i')
+        # Jetons des descriptions (cf. TexteNormalise), rangs dans vocabulaire ;
+        # ceux du fait k entre _debut_jetons[k] et _debut_jetons[k + 1]. Calculés
+        # une fois, dans l'ordre des faits : à l'ajout si le fait les a déjà,
+        # sinon à la première demande
+        self.vocabulaire: List[str] = []
+        self._rang_jeton: Dict[str, int] = {}
+        self._jetons = array('I')
+        self._debut_jetons = array('I', [0])
+
+    def __len__(self) -> int:
+        return len(self.descriptions)
+
+    def __getitem__(self, indice: int) -> FaitCompact:
+        if indice < 0:
+            indice += len(self.descriptions)
+        if not 0 <= indice < len(self.descriptions):
+            raise IndexError("indice de fait hors limites")
+        return FaitCompact(self, indice)
+
+    def __iter__(self) -> Iterator[FaitCompact]:
+        for indice in range(len(self.descriptions)):
+            yield FaitCompact(self, indice)
+
+    def append(self, fait):
+        """
+        Copie un Fait (ou toute vue équivalente) dans les colonnes
+        """
+        indice = len(self.descriptions)
+        self.descriptions.append(fait.description)
+        self.solidite_factuelle.append(fait.solidite_factuelle)
+        self.confirme.append(bool(fait.confirme_par_multiples_sources))
+        self.somme_credibilite.append(0.0)
+        self.nombre_sources.append(0)
+        for comptes in self.comptes_par_type.values():
+            comptes.append(0)
+        self._sources_fait.append(-1)
+        if fait.probabilite != self.PROBABILITE_DEFAUT:
+            self.probabilites[indice] = float(fait.probabilite)
+        for source in fait.sources:
+            self.ajouter_source(indice, source)
+        if fait.variantes:
+            self.variantes[indice] = list(fait.variantes)
+        cache = getattr(fait, "_jetons_description", None)
+        if cache is not None and len(self._debut_jetons) == indice + 1 and cache[0] is fait.description:
+            self._ajouter_jetons(cache[1:])
+
+    def _ajouter_jetons(self, jetons: Tuple[str, ...]):
+        rangs = self._rang_jeton
+        for jeton in jetons:
+            if jeton not in rangs:
+                rangs[jeton] = len(self.vocabulaire)
+                self.vocabulaire.append(jeton)
+        self._jetons.extend([rangs[jeton] for jeton in jetons])
+        self._debut_jetons.append(len(self._jetons))
+
+    def texte_normalise(self, indice: int) -> 'TexteNormalise':
+        """
+        Description normalisée du fait ; la forme n'est pas gardée, seulement
+        les jetons
+        """
+        for suivant in range(len(self._debut_jetons) - 1, indice + 1):
+            self._ajouter_jetons(TexteNormalise(self.descriptions[suivant]).jetons)
+        vocabulaire = self.vocabulaire
+        jetons = tuple([vocabulaire[rang] for rang in
+                        self._jetons[self._debut_jetons[indice]:self._debut_jetons[indice + 1]]])
+        return TexteNormalise(self.descriptions[indice], jetons)
+
+    def ajouter_source(self, indice: int, source: Source):
+        identifiant = self.registre.interner(source)
+        self._lier(indice, identifiant, self.registre[identifiant])
+
+    def retirer_source(self, indice: int, source: Source) -> int:
+        """
+        Retire toutes les occurrences d'une source des sources d'un fait ;
+        retourne leur nombre. La chaîne du fait est reconstruite à partir des
+        identifiants restants (les anciens liens restent inutilisés).
+        """
+        identifiant = self.registre.chercher(source)
+        identifiants = self.identifiants_sources(indice) if identifiant is not None else []
+        restants = [i for i in identifiants if i != identifiant]
+        retirees = len(identifiants) - len(restants)
+        if retirees:
+            self._sources_fait[indice] = -1
+            self.somme_credibilite[indice] = 0.0
+            self.nombre_sources[indice] = 0
+            for comptes in self.comptes_par_type.values():
+                comptes[indice] = 0
+            for restant in restants:
+                self._lier(indice, restant, self.registre[restant])
+        return retirees
+
+    def _lier(self, indice: int, identifiant: int, source: Source):
+        tete = self._sources_fait[indice]
+        if tete == -1:
+            self._sources_fait[indice] = identifiant
+        else:
+            if tete >= 0:
+                # Deuxième source : la première passe dans la chaîne
+                self._lien_source.append(tete)
+                self._lien_suivant.append(-1)
+                precedent = len(self._lien_source) - 1
+            else:
+                precedent = -2 - tete
+            self._lien_source.append(identifiant)
+            self._lien_suivant.append(precedent)
+            self._sources_fait[indice] = -1 - len(self._lien_source)
+        self.nombre_sources[indice] += 1
+        self.somme_credibilite[indice] += source.credibilite
+        comptes = self.comptes_par_type[source.type_source]
+        try:
+            comptes[indice] += 1
+        except OverflowError:
+            comptes = self.comptes_par_type[source.type_source] = array('I', comptes)
+            comptes[indice] += 1
+
+    def identifiants_sources(self, indice: int) -> List[int]:
+        tete = self._sources_fait[indice]
+        if tete >= 0:
+            return [tete]
+        identifiants = []
+        lien = -2 - tete
+        while lien >= 0:
+            identifiants.append(self._lien_source[lien])
+            lien = self._lien_suivant[lien]
+        identifiants.reverse()
+        return identifiants
+
+    def recalculer_somme_credibilite(self, indice: int):
+        """
+        Somme relue depuis le registre, après une modification de crédibilité
+        """
+        somme = 0.0
+        for identifiant in self.identifiants_sources(indice):
+            somme += self.registre[identifiant].credibilite
+        self.somme_credibilite[indice] = somme
+
+    def sources_du_fait(self, indice: int) -> List[Source]:
+        return [self.registre[identifiant] for identifiant in self.identifiants_sources(indice)]
+
+
+class ContradictionCompacte:
+    """
+    Vue sur une ligne d'EntrepotContradictions exposant les attributs de Contradiction
+    """
+    __slots__ = ("_entrepot", "_indice")
+
+    def __init__(self, entrepot: 'EntrepotContradictions', indice: int):
+        self._entrepot = entrepot
+        self._indice = indice
+
+    niveau_incompatibilite = _colonne("niveau_incompatibilite")
+    validee_independamment = _colonne("validee", bool)
+
+    @property
+    def ref_fait_a(self) -> FaitCompact:
+        return self._entrepot.faits[self._entrepot.position_a[self._indice]]
+
+    @property
+    def ref_fait_b(self) -> FaitCompact:
+        return self._entrepot.faits[self._entrepot.position_b[self._indice]]
+
+    @property
+    def fait_a(self) -> str:
+        return self._entrepot.faits.descriptions[self._entrepot.position_a[self._indice]]
+
+    @property
+    def fait_b(self) -> str:
+        return self._entrepot.faits.descriptions[self._entrepot.position_b[self._indice]]
+
+    def __eq__(self, autre):
+        if isinstance(autre, ContradictionCompacte) and autre._entrepot is self._entrepot:
+            return autre._indice == self._indice
+        return NotImplemented
+
+    def __repr__(self):
+        return (f"ContradictionCompacte(fait_a={self.fait_a!r}, fait_b={self.fait_b!r}, "
+                f"niveau_incompatibilite={self.niveau_incompatibilite}, "
+                f"validee_independamment={self.validee_independamment})")
+
+
+class EntrepotContradictions:
+    """
+    Stockage colonnaire des contradictions (mode compact), adossé à un EntrepotFaits
+    
+    Les lignes retirées sont marquées inactives pour que les vues déjà
+    distribuées restent valides.
+    """
+
+    def __init__(self, faits: EntrepotFaits):
+        self.faits = faits
+        self.position_a = array('I')
+        self.position_b = array('I')
+        self.niveau_incompatibilite = array('d')
+        self.validee = array('b')
+        self.active = array('b')
+        self._nombre_actives = 0
+        self._lignes_actives: Optional[List[int]] = None
+
+    def __len__(self) -> int:
+        return self._nombre_actives
+
+    def __iter__(self) -> Iterator[ContradictionCompacte]:
+        for indice in range(len(self.active)):
+            if self.active[indice]:
+                yield ContradictionCompacte(self, indice)
+
+    def __getitem__(self, rang: int) -> ContradictionCompacte:
+        if self._lignes_actives is None:
+            self._lignes_actives = [i for i in range(len(self.active)) if self.active[i]]
+        return ContradictionCompacte(self, self._lignes_actives[rang])
+
+    def append(self, contradiction):
+        self.ajouter(contradiction)
+
+    def ajouter(self, contradiction) -> ContradictionCompacte:
+        """
+        Copie une Contradiction dans les colonnes et retourne sa vue
+        """
+        indice = len(self.active)
+        self.position_a.append(self._position(contradiction.ref_fait_a, contradiction.fait_a))
+        self.position_b.append(self._position(contradiction.ref_fait_b, contradiction.fait_b))
+        self.niveau_incompatibilite.append(contradiction.niveau_incompatibilite)
+        self.validee.append(bool(contradiction.validee_independamment))
+        self.active.append(True)
+        self._nombre_actives += 1
+        self._lignes_actives = None
+        return ContradictionCompacte(self, indice)
+
+    def retirer(self, contradiction: ContradictionCompacte):
+        if self.active[contradiction._indice]:
+            self.active[contradiction._indice] = False
+            self._nombre_actives -= 1
+            self._lignes_actives = None
+
+    def _position(self, reference, description: str) -> int:
+        if isinstance(reference, FaitCompact) and reference._entrepot is self.faits:
+            return reference._indice
+        # Contradiction construite hors du protocole : dernière occurrence de la description
+        for indice in range(len(self.faits.descriptions) - 1, -1, -1):
+            if self.faits.descriptions[indice] == description:
+                return indice
+        raise ValueError(f"fait inconnu de l'entrepôt : {description!r}")
+
+
+
+class PositionsParDescription:
+    """
+    Index description -> positions des faits pour le mode compact, à la
+    place du dictionnaire de listes du mode objets (un entier et une liste
+    par fait)
+    
+    Chaque fait tient dans une clé entière, 32 bits du hash de sa
+    description suivis de sa position, rangée dans un tableau trié (8
+    octets par fait) ; les derniers indexés attendent dans un petit
+    dictionnaire, fusionné dans le tableau par paliers. Une description
+    réaffectée ou supprimée est masquée dans le tableau jusqu'à la fusion
+    suivante. Les listes retournées sont des copies, sauf celle de
+    setdefault, où l'on ajoute les positions suivantes.
+    """
+
+    def __init__(self, descriptions: List[str]):
+        self._descriptions = descriptions
+        self._cles = array('Q')
+        self._recentes: Dict[str, List[int]] = {}
+        self._masquees: Set[str] = set()
+
+    def _anciennes(self, description: str) -> List[int]:
+        if description in self._masquees:
+            return []
+        cles, descriptions = self._cles, self._descriptions
+        empreinte = hash(description) & 0xFFFFFFFF
+        trouvees = []
+        rang = bisect_left(cles, empreinte << 32)
+        while rang < len(cles) and cles[rang] >> 32 == empreinte:
+            position = cles[rang] & 0xFFFFFFFF
+            if descriptions[position] == description:  # collision d'empreintes
+                trouvees.append(position)
+            rang += 1
+        return trouvees
+
+    def get(self, description: str, defaut=None):
+        recentes = self._recentes.get(description)
+        anciennes = self._anciennes(description)
+        if anciennes:
+            return anciennes + recentes if recentes else anciennes
+        return recentes if recentes else defaut
+
+    def __getitem__(self, description: str) -> List[int]:
+        positions = self.get(description)
+        if positions is None:
+            raise KeyError(description)
+        return positions
+
+    def __contains__(self, description: str) -> bool:
+        return self.get(description) is not None
+
+    def setdefault(self, description: str, defaut: List[int]) -> List[int]:
+        recentes = self._recentes.get(description)
+        if recentes is None:
+            if len(self._recentes) >= max(64, len(self._cles) >> 3):
+                self._fusionner()
+            recentes = self._recentes[description] = defaut
+        return recentes
+
+    def __setitem__(self, description: str, positions: List[int]):
+        self._masquees.add(description)
+        self._recentes[description] = positions
+
+    def __delitem__(self, description: str):
+        self[description]
+        self._masquees.add(description)
+        self._recentes.pop(description, None)
+
+    def _fusionner(self):
+        descriptions, masquees = self._descriptions, self._masquees
+        cles = self._cles
+        if masquees:
+            cles = [cle for cle in cles if descriptions[cle & 0xFFFFFFFF] not in masquees]
+        nouvelles = sorted((hash(description) & 0xFFFFFFFF) << 32 | position
+                           for description, positions in self._recentes.items() for position in positions)
+        self._cles = array('Q', sorted(chain(cles, nouvelles)))
+        self._recentes, self._masquees = {}, set()
+
+    def items(self) -> Iterator[Tuple[str, List[int]]]:
+        """
+        Couples (description, positions), dans un ordre quelconque
+        """
+        cles, descriptions = self._cles, self._descriptions
+        masquees, recentes = self._masquees, self._recentes
+        vues = set()
+        rang, fin = 0, len(cles)
+        while rang < fin:
+            empreinte, groupes = cles[rang] >> 32, {}
+            while rang < fin and cles[rang] >> 32 == empreinte:
+                position = cles[rang] & 0xFFFFFFFF
+                groupes.setdefault(descriptions[position], []).append(position)
+                rang += 1
+            for description, positions in groupes.items():
+                if description not in masquees:
+                    if recentes.get(description):
+                        vues.add(description)
+                        positions += recentes[description]
+                    yield description, positions
+        for description, positions in recentes.items():
+            if positions and description not in vues:
+                yield description, positions
+
+    def values(self) -> Iterator[List[int]]:
+        return (positions for _, positions in self.items())
+
+    def __iter__(self) -> Iterator[str]:
+        return (description for description, _ in self.items())
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.items())
+
+
+def _table_repli_accents() -> Dict[int, Optional[str]]:
+    """
+    Table de str.translate repliant les lettres latines accentuées
+    (minuscules) sur leur forme sans accent, et supprimant les diacritiques
+    combinants restés isolés
+    """
+    table: Dict[int, Optional[str]] = dict.fromkeys(chain(
+        range(0x0300, 0x0370), range(0x1AB0, 0x1B00), range(0x1DC0, 0x1E00),
+        range(0x20D0, 0x2100), range(0xFE20, 0xFE30)))
+    for point in range(0x00C0, 0x0250):
+        caractere = chr(point).lower()
+        if len(caractere) == 1:
+            repli = unicodedata.normalize("NFKD", caractere).translate(table)
+            if repli != caractere:
+                table[ord(caractere)] = repli
+    table.update({ord("œ"): "oe", ord("æ"): "ae", ord("ß"): "ss"})
+    return table
+
+
+def _table_repli_latin1(table: Dict[int, Optional[str]]) -> Tuple[bytes, 're.Pattern[bytes]']:
+    """
+    Même repli pour les textes Latin-1, par bytes.translate : table d'octets
+    des lettres repliées sur une seule lettre, et motif des caractères que
+    cette table ne traite pas comme le repli général (ß -> "ss", ² -> "2"...)
+    """
+    octets = bytearray(range(256))
+    particuliers = []
+    for point in range(0x80, 0x100):
+        caractere = chr(point)
+        repli = table.get(point, caractere)
+        if repli != caractere and repli is not None and len(repli) == 1 and repli.isascii():
+            octets[point] = ord(repli)
+        elif repli != caractere or unicodedata.normalize("NFKD", caractere) != caractere:
+            particuliers.append(point)
+    return bytes(octets), re.compile(b"[" + re.escape(bytes(particuliers)) + b"]")
+
+
+_REPLI_ACCENTS = _table_repli_accents()
+_REPLI_LATIN1, _LATIN1_PARTICULIERS = _table_repli_latin1(_REPLI_ACCENTS)
+_AUCUN_TERME: FrozenSet[str] = frozenset()
+# Jetons d'un texte normalisé : suites de lettres (chiffres et ponctuation séparent) ;
+# classe ASCII équivalente, plus rapide, pour les formes ASCII (déjà en minuscules)
+_JETON = re.compile(r"[^\W\d_]+")
+_JETON_ASCII = re.compile(r"[a-z]+")
+
+
+def normaliser_texte(texte: str) -> str:
+    """
+    Forme commune des textes et des mots-clés comparés : minuscules sans
+    accents ("Incohérence" -> "incoherence")
+    
+    Les lettres latines passent par une table précalculée (table d'octets
+    pour les textes Latin-1, cf. _table_repli_latin1) ; la
+    décomposition NFKD n'est faite que pour les autres caractères qui en
+    ont une (ligatures typographiques, exposants...). Un texte déjà normalisé
+    est retourné tel quel (même objet).
+    """
+    normalise = texte.lower()
+    if not normalise.isascii():
+        try:
+            octets = normalise.encode("latin-1")
+        except UnicodeEncodeError:
+            octets = None
+        if octets is not None and not _LATIN1_PARTICULIERS.search(octets):
+            normalise = octets.translate(_REPLI_LATIN1).decode("latin-1")
+            return texte if normalise == texte else normalise
+        normalise = normalise.translate(_REPLI_ACCENTS)
+        if not (normalise.isascii() or unicodedata.is_normalized("NFKD", normalise)):
+            normalise = unicodedata.normalize("NFKD", normalise).translate(_REPLI_ACCENTS)
+    return texte if normalise == texte else normalise
+
+
+class TexteNormalise:
+    """
+    Texte normalisé une seule fois pour tous les chemins de comparaison :
+    forme repliée (cf. normaliser_texte) et jetons, suites de lettres
+    distinctes de cette forme, internés (sys.intern) pour être partagés par
+    tous les textes qui les contiennent
+    
+    Les jetons sont gardés en cache par Fait.texte_normalise et, pour le mode
+    compact, par EntrepotFaits ; la forme est recalculée à la demande (seuls
+    les mots-clés composés en ont besoin, cf. AutomateMotsCles).
+    """
+    __slots__ = ("texte", "jetons", "_forme")
+
+    def __init__(self, texte: str, jetons: Optional[Tuple[str, ...]] = None):
+        self.texte = texte
+        self._forme: Optional[str] = None
+        if jetons is None:
+            forme = self._forme = normaliser_texte(texte)
+            jetons = (_JETON_ASCII if forme.isascii() else _JETON).findall(forme)
+            jetons = tuple(dict.fromkeys(map(sys.intern, jetons)))
+        self.jetons = jetons
+
+    @property
+    def forme(self) -> str:
+        if self._forme is None:
+            self._forme = normaliser_texte(self.texte)
+        return self._forme
+
+    def __repr__(self):
+        return f"TexteNormalise({self.texte!r}, jetons={self.jetons!r})"
+
+
+def _en_debut_de_mot(texte: str, motif: str) -> bool:
+    """
+    Vrai si le motif apparaît dans le texte au début d'un mot (position non
+    précédée d'une lettre)
+    """
+    position = texte.find(motif)
+    while position > 0 and texte[position - 1].isalpha():
+        position = texte.find(motif, position + 1)
+    return position >= 0
+
+
+class AutomateMotsCles:
+    """
+    Recherche de mots-clés par jetons, compilée une seule fois
+
+    Un mot-clé est présent si sa forme normalisée (cf. normaliser_texte)
+    apparaît dans celle du texte au début d'un mot : "incoherence" dans
+    "Incohérences", mais ni "possible" dans "impossible", ni "élevé" dans
+    "relevé". La règle est la même pour tous les textes, accentués ou non.
+    Les mots-clés retournés sont sous forme normalisée.
+
+    Un mot-clé d'un seul jeton est donc un préfixe d'un jeton du texte (cf.
+    TexteNormalise) : chaque jeton distinct descend une seule fois le trie
+    des mots-clés, qui donne tous ses préfixes à la fois ("inexpliqu" et
+    "inexpliquee" par exemple), et le résultat reste en cache (au plus
+    `taille_cache_jetons` jetons, cache vidé au-delà). Un mot-clé de
+    plusieurs jetons ("chute libre") n'est cherché dans la forme du texte que
+    si chacun de ses jetons est le préfixe d'un jeton du texte.
+    """
+    taille_cache_jetons = 1 << 16
+
+    def __init__(self, motifs: Iterable[str]):
+        self.motifs: Tuple[str, ...] = tuple(dict.fromkeys(map(normaliser_texte, motifs)))
+        # Mots-clés composés -> leurs jetons, placés dans le trie comme les
+        # mots-clés d'un seul jeton ; indexés par leur premier jeton
+        self._jetons_composes: Dict[str, FrozenSet[str]] = {}
+        self._composes_par_jeton: Dict[str, List[str]] = {}
+        self._composes_sans_jeton: List[str] = []
+        mots = set()
+        for motif in self.motifs:
+            jetons = _JETON.findall(motif)
+            if jetons == [motif]:
+                mots.add(motif)
+            elif jetons:
+                self._jetons_composes[motif] = frozenset(jetons)
+                self._composes_par_jeton.setdefault(jetons[0], []).append(motif)
+                mots.update(jetons)
+            else:
+                self._composes_sans_jeton.append(motif)
+        self._simples = frozenset(motif for motif in self.motifs if _JETON.findall(motif) == [motif])
+        self._premiers_jetons = frozenset(self._composes_par_jeton)
+
+        # Trie des jetons : transitions de chaque état, jeton qui s'y termine
+        self.transitions: List[Dict[str, int]] = [{}]
+        self.sorties: List[Optional[str]] = [None]
+        for mot in sorted(mots):
+            etat = 0
+            for caractere in mot:
+                suivant = self.transitions[etat].get(caractere)
+                if suivant is None:
+                    self.transitions.append({})
+                    self.sorties.append(None)
+                    suivant = self.transitions[etat][caractere] = len(self.transitions) - 1
+                etat = suivant
+            self.sorties[etat] = mot
+        self._mots_par_jeton: Dict[str, FrozenSet[str]] = {}
+        self.passages = 0  # textes analysés (compteur d'instrumentation)
+
+    def _mots_du_jeton(self, jeton: str) -> FrozenSet[str]:
+        """
+        Jetons de mots-clés préfixes d'un jeton du texte (descente du trie en cache)
+        """
+        mots = self._mots_par_jeton.get(jeton)
+        if mots is None:
+            transitions, sorties = self.transitions, self.sorties
+            etat = 0
+            trouves = []
+            for caractere in jeton:
+                etat = transitions[etat].get(caractere)
+                if etat is None:
+                    break
+                if sorties[etat] is not None:
+                    trouves.append(sorties[etat])
+            mots = frozenset(trouves) if trouves else _AUCUN_TERME
+            if len(self._mots_par_jeton) >= self.taille_cache_jetons:
+                self._mots_par_jeton.clear()
+            self._mots_par_jeton[jeton] = mots
+        return mots
+
+    def rechercher(self, texte: Union[str, TexteNormalise]) -> FrozenSet[str]:
+        """
+        Ensemble des mots-clés présents dans le texte
+        """
+        self.passages += 1
+        if not isinstance(texte, TexteNormalise):
+            texte = TexteNormalise(texte)
+        cache = self._mots_par_jeton
+        mots = _AUCUN_TERME.union(*[cache[jeton] if jeton in cache else self._mots_du_jeton(jeton)
+                                    for jeton in texte.jetons])
+        if not mots and not self._composes_sans_jeton:
+            return _AUCUN_TERME
+        composes = [motif for motif in self._composes_sans_jeton if _en_debut_de_mot(texte.forme, motif)]
+        for mot in mots & self._premiers_jetons:
+            for motif in self._composes_par_jeton[mot]:
+                if self._jetons_composes[motif] <= mots and _en_debut_de_mot(texte.forme, motif):
+                    composes.append(motif)
+        presents = mots & self._simples
+        return presents.union(composes) if composes else presents
+
+
+class PaquetRegles:
+    """
+    Vocabulaire d'un domaine compilé une fois : mots-clés d'anomalie,
+    termes de spécificité et de vérifiabilité, paires d'opposition et
+    bonus par type de source, avec l'automate qui les recherche tous
+    
+    Non modifié après construction : un même paquet est partagé par toutes
+    les instances du protocole qui l'utilisent (cf. charger_regles).
+    """
+
+    CLES = ("nom", "mots_cles_anomalies", "termes_specificite", "termes_verifiabilite",
+            "mots_opposition_directs", "contradictions_specifiques", "bonus_type_source")
+
+    def __init__(self, nom: str = "defaut",
+                 mots_cles_anomalies: Iterable[str] = MOTS_CLES_ANOMALIES,
+                 termes_specificite: Iterable[str] = TERMES_SPECIFICITE,
+                 termes_verifiabilite: Iterable[str] = TERMES_VERIFIABILITE,
+                 mots_opposition_directs: Iterable[Tuple[str, str]] = MOTS_OPPOSITION_DIRECTS,
+                 contradictions_specifiques: Iterable[Tuple[str, str]] = CONTRADICTIONS_SPECIFIQUES,
+                 bonus_type_source: Optional[Dict[TypeSource, float]] = None):
+        self.nom = nom
+        self.chemin: Optional[str] = None  # fichier d'origine (charger_regles)
+        # Formes d'origine pour l'automate, formes repliées pour les tests d'appartenance
+        vocabulaires = [list(mots_cles_anomalies), list(termes_specificite), list(termes_verifiabilite)]
+        paires = list(mots_opposition_directs) + list(contradictions_specifiques)
+        self.mots_cles_anomalies, self.termes_specificite, self.termes_verifiabilite = (
+            frozenset(map(normaliser_texte, vocabulaire)) for vocabulaire in vocabulaires)
+        self.paires_opposition: List[Tuple[str, str]] = [
+            (normaliser_texte(terme_a), normaliser_texte(terme_b)) for terme_a, terme_b in paires
+        ]
+        self.bonus_type_source: Dict[TypeSource, float] = dict(
+            BONUS_TYPE_SOURCE if bonus_type_source is None else bonus_type_source)
+        self.complements_opposition: Dict[str, FrozenSet[str]] = {}
+        for terme_a, terme_b in self.paires_opposition:
+            self.complements_opposition[terme_a] = self.complements_opposition.get(terme_a, frozenset()) | {terme_b}
+            self.complements_opposition[terme_b] = self.complements_opposition.get(terme_b, frozenset()) | {terme_a}
+        self.automate = AutomateMotsCles(
+            sorted(set(chain.from_iterable(vocabulaires))) + [terme for paire in paires for terme in paire]
+        )
+
+    @classmethod
+    def depuis_dict(cls, donnees: Dict, nom: Optional[str] = None) -> 'PaquetRegles':
+        """
+        Paquet décrit par un dictionnaire (fichier JSON) ; les clés absentes
+        reprennent le vocabulaire par défaut :
+
+            {"nom": "aviation",
+             "mots_cles_anomalies": ["décrochage", ...],
+             "termes_specificite": [...], "termes_verifiabilite": [...],
+             "mots_opposition_directs": [["intact", "détruit"], ...],
+             "contradictions_specifiques": [[...], ...],
+             "bonus_type_source": {"document": 0.3, "officielle": 0.1, ...}}
+        """
+        inconnues = set(donnees) - set(cls.CLES)
+        if inconnues:
+            raise ValueError(f"clés de paquet de règles inconnues : {sorted(inconnues)}")
+        options = {cle: donnees[cle] for cle in cls.CLES[1:-1] if cle in donnees}
+        if "bonus_type_source" in donnees:
+            options["bonus_type_source"] = {TypeSource(type_source): float(bonus)
+                                            for type_source, bonus in donnees["bonus_type_source"].items()}
+        return cls(nom or donnees.get("nom", "defaut"), **options)
+
+
+@functools.lru_cache(maxsize=None)
+def regles_par_defaut() -> PaquetRegles:
+    """
+    Paquet du vocabulaire intégré, compilé une seule fois par processus
+    """
+    return PaquetRegles()
+
+
+# Paquets chargés depuis des fichiers : chemin -> ((date de modification, taille), paquet)
+_PAQUETS_CHARGES: Dict[str, Tuple[Tuple[int, int], PaquetRegles]] = {}
+_VERROU_PAQUETS = threading.Lock()
+
+
+def charger_regles(chemin: str) -> PaquetRegles:
+    """
+    Paquet de règles d'un fichier JSON (cf. PaquetRegles.depuis_dict)
+    
+    Compilé une fois par processus et partagé entre les instances ; un
+    fichier modifié depuis (date ou taille) est recompilé au prochain appel.
+    """
+    chemin = os.path.realpath(chemin)
+    etat = os.stat(chemin)
+    signature = (etat.st_mtime_ns, etat.st_size)
+    with _VERROU_PAQUETS:
+        entree = _PAQUETS_CHARGES.get(chemin)
+        if entree is not None and entree[0] == signature:
+            return entree[1]
+    with open(chemin, encoding="utf-8") as fichier:
+        donnees = json.load(fichier)
+    paquet = PaquetRegles.depuis_dict(donnees, donnees.get("nom") or
+                                      os.path.splitext(os.path.basename(chemin))[0])
+    paquet.chemin = chemin
+    with _VERROU_PAQUETS:
+        _PAQUETS_CHARGES[chemin] = (signature, paquet)
+    return paquet
+
+
+class IndexOppositions:
+    """
+    Index inversé terme d'opposition -> faits
+
+    Chaque fait est étiqueté une seule fois avec les termes d'opposition qu'il
+    contient ; les paires candidates s'obtiennent ensuite en suivant, pour
+    chaque terme, son terme complémentaire. Deux faits sont candidats si et
+    seulement si _sont_contradictoires les déclarerait contradictoires.
+    Un fait retiré (cf. retirer) garde son indice mais n'est plus candidat.
+    """
+
+    def __init__(self, paires_opposition: List[Tuple[str, str]], etiqueteur=None):
+        self.etiqueteur = etiqueteur
+        self.complements: Dict[str, Set[str]] = {}
+        for terme_a, terme_b in paires_opposition:
+            self.complements.setdefault(terme_a, set()).add(terme_b)
+            self.complements.setdefault(terme_b, set()).add(terme_a)
+        self.termes = list(self.complements)
+        self.ensemble_termes = frozenset(self.termes)
+        self.faits_par_terme: Dict[str, List[int]] = {}
+        self.termes_par_fait: List[FrozenSet[str]] = []
+        self.retires: Set[int] = set()
+        # Signatures internées : peu de combinaisons distinctes, les faits partagent
+        # le même ensemble (la plupart, sans terme d'opposition, le vide)
+        self._signatures: Dict[FrozenSet[str], FrozenSet[str]] = {_AUCUN_TERME: _AUCUN_TERME}
+
+    def etiqueter(self, description: str) -> FrozenSet[str]:
+        """
+        Termes d'opposition présents dans une description (cf. AutomateMotsCles)
+        """
+        if self.etiqueteur is None:
+            self.etiqueteur = AutomateMotsCles(self.termes).rechercher
+        return self.etiqueteur(description) & self.ensemble_termes
+
+    def ajouter(self, description: str, termes: Optional[FrozenSet[str]] = None) -> int:
+        """
+        Indexe un nouveau fait et retourne son indice ; `termes` : mots-clés
+        déjà trouvés dans la description (évite de la réexaminer)
+        """
+        indice = len(self.termes_par_fait)
+        termes = self.etiqueter(description) if termes is None else termes & self.ensemble_termes
+        termes = self._signatures.setdefault(termes, termes)
+        self.termes_par_fait.append(termes)
+        for terme in termes:
+            self.faits_par_terme.setdefault(terme, []).append(indice)
+        return indice
+
+    def retirer(self, indice: int):
+        """
+        Exclut un fait des paires candidates sans renuméroter les autres (les
+        listes par terme sont filtrées à la lecture plutôt que réécrites)
+        """
+        self.retires.add(indice)
+
+    def partenaires(self, indice: int) -> Set[int]:
+        """
+        Indices de tous les faits contradictoires avec le fait donné
+        """
+        candidats = set()
+        if indice in self.retires:
+            return candidats
+        for terme in self.termes_par_fait[indice]:
+            for complement in self.complements[terme]:
+                candidats.update(self.faits_par_terme.get(complement, ()))
+        candidats.discard(indice)
+        if self.retires:
+            candidats -= self.retires
+        return candidats
+
+    def paires_candidates(self) -> Iterator[Tuple[int, int]]:
+        """
+        Paires (i, j), i < j, dans l'ordre de la double boucle i/j
+        """
+        for i in range(len(self.termes_par_fait)):
+            if not self.termes_par_fait[i] or i in self.retires:
+                continue
+            for j in sorted(j for j in self.partenaires(i) if j > i):
+                yield i, j
+
+    def groupes_signatures(self) -> Tuple[List[FrozenSet[str]], List[List[int]]]:
+        """
+        Faits regroupés par signature (ensemble de termes d'opposition) ;
+        les positions de chaque groupe sont croissantes
+        """
+        groupes: Dict[FrozenSet[str], List[int]] = {}
+        for position, termes in enumerate(self.termes_par_fait):
+            if termes and position not in self.retires:
+                groupes.setdefault(termes, []).append(position)
+        return list(groupes), list(groupes.values())
+
+    def signatures_compatibles(self, signatures: List[FrozenSet[str]]) -> List[List[int]]:
+        """
+        Pour chaque signature, les signatures (elle-même comprise) contenant au
+        moins un terme complémentaire : deux faits se contredisent si et
+        seulement si leurs signatures sont compatibles
+        """
+        compatibles = []
+        for signature in signatures:
+            complements = set().union(*(self.complements[terme] for terme in signature))
+            compatibles.append([b for b, autre in enumerate(signatures) if not complements.isdisjoint(autre)])
+        return compatibles
+
+
+class IndexQuasiDoublons:
+    """
+    Regroupement des informations quasi identiques par MinHash et hachage
+    sensible à la localité (LSH)
+
+    Le texte normalisé (minuscules sans accents, ponctuation et espaces réduits) est
+    découpé en fragments de `taille_fragment` octets. La signature MinHash
+    s'obtient en un seul hachage par fragment, réparti entre `nombre_minhash`
+    compartiments (les compartiments vides sont densifiés), puis elle est
+    découpée en bandes : deux textes sont candidats s'ils partagent une bande.
+    Les candidats sont confirmés par la similarité de Jaccard exacte de leurs
+    fragments (aucun faux positif) ; le découpage en bandes place le seuil de
+    la courbe LSH sous `seuil` pour limiter les faux négatifs.
+
+    Chaque compartiment garde au plus `capacite_compartiment` représentants
+    et la recherche s'arrête au premier candidat confirmé : dans un groupe
+    très dense, un texte est rattaché à un représentant proche, pas forcément
+    au plus proche. Coût par texte : linéaire dans sa longueur, plus au plus
+    bandes × capacite_compartiment comparaisons.
+    """
+
+    _SEPARATEURS = re.compile(r"[\W_]+")
+    _VIDE = 1 << 64
+
+    def __init__(self, seuil: float = 0.8, nombre_minhash: int = 32, taille_fragment: int = 5,
+                 capacite_compartiment: int = 8):
+        if not 0 < seuil <= 1:
+            raise ValueError("le seuil de similarité doit être dans ]0, 1]")
+        self.seuil = seuil
+        self.nombre_minhash = nombre_minhash
+        self.taille_fragment = taille_fragment
+        self.capacite_compartiment = capacite_compartiment
+        # Bandes de r lignes : seuil LSH (1/b)^(1/r) le plus haut ne dépassant pas `seuil`
+        self.lignes = max((r for r in range(1, nombre_minhash + 1)
+                           if nombre_minhash % r == 0 and (r / nombre_minhash) ** (1 / r) <= seuil),
+                          default=1)
+        self.bandes = nombre_minhash // self.lignes
+        # Représentants, dans l'ordre d'ajout (normalisés : ni repliés ni découpés à nouveau)
+        self.textes: List[Union[str, TexteNormalise]] = []
+        self._compartiments: List[Dict[int, List[int]]] = [{} for _ in range(self.bandes)]
+        self._dernier: Tuple = (None, None, None)  # (texte, fragments, signature)
+
+    def fragments(self, texte: Union[str, TexteNormalise]) -> FrozenSet[bytes]:
+        forme = texte.forme if isinstance(texte, TexteNormalise) else normaliser_texte(texte)
+        octets = " ".join(self._SEPARATEURS.sub(" ", forme).split()).encode("utf-8")
+        k = self.taille_fragment
+        if len(octets) <= k:
+            return frozenset((octets,))
+        return frozenset([octets[i:i + k] for i in range(len(octets) - k + 1)])
+
+    def signature(self, fragments: FrozenSet[bytes]) -> List[int]:
+        n, vide = self.nombre_minhash, self._VIDE
+        minima = [vide] * n
+        for fragment in fragments:
+            # crc32 plutôt que hash() : signatures identiques d'un processus à l'autre
+            h = (zlib.crc32(fragment) * 0x9E3779B97F4A7C15 + 0x632BE59BD9B4E019) & 0xFFFFFFFFFFFFFFFF
+            compartiment, valeur = h % n, h // n
+            if valeur < minima[compartiment]:
+                minima[compartiment] = valeur
+        # Densification : un compartiment vide reprend le suivant non vide, décalé de la distance
+        if vide in minima:
+            signature = list(minima)
+            for k in range(n):
+                if minima[k] == vide:
+                    for distance in range(1, n):
+                        valeur = minima[(k + distance) % n]
+                        if valeur != vide:
+                            signature[k] = valeur + distance * vide
+                            break
+            return signature
+        return minima
+
+    @staticmethod
+    def similarite(fragments_a: FrozenSet[bytes], fragments_b: FrozenSet[bytes]) -> float:
+        if not fragments_a and not fragments_b:
+            return 1.0
+        return len(fragments_a & fragments_b) / len(fragments_a | fragments_b)
+
+    def _preparer(self, texte: Union[str, TexteNormalise]) -> Tuple[FrozenSet[bytes], List[int]]:
+        if self._dernier[0] != texte:
+            fragments = self.fragments(texte)
+            self._dernier = (texte, fragments, self.signature(fragments))
+        return self._dernier[1], self._dernier[2]
+
+    def _cles_bandes(self, signature: List[int]) -> Iterator[Tuple[int, int]]:
+        r = self.lignes
+        for bande in range(self.bandes):
+            yield bande, hash(tuple(signature[bande * r:(bande + 1) * r]))
+
+    def rechercher(self, texte: Union[str, TexteNormalise]) -> Optional[Tuple[int, float]]:
+        """
+        (rang, similarité) du premier représentant confirmé atteignant le seuil
+        (les plus récents d'abord)
+        """
+        fragments, signature = self._preparer(texte)
+        examines = set()
+        for bande, cle in self._cles_bandes(signature):
+            for rang in reversed(self._compartiments[bande].get(cle, ())):
+                if rang in examines:
+                    continue
+                examines.add(rang)
+                similarite = self.similarite(fragments, self.fragments(self.textes[rang]))
+                if similarite >= self.seuil:
+                    return rang, similarite
+        return None
+
+    def ajouter(self, texte: Union[str, TexteNormalise]) -> int:
+        """
+        Ajoute un représentant et retourne son rang
+        """
+        _, signature = self._preparer(texte)
+        rang = len(self.textes)
+        self.textes.append(texte)
+        for bande, cle in self._cles_bandes(signature):
+            compartiment = self._compartiments[bande].setdefault(cle, [])
+            if len(compartiment) < self.capacite_compartiment:
+                compartiment.append(rang)
+        return rang
+
+
+class FenetreSynchronisation:
+    """
+    Comptage des synchronisations sur un flux d'événements arrivant par
+    timestamp croissant (fenêtre glissante)
+    
+    Un événement reste actif tant que le timestamp courant est dans sa
+    fenetre_critique ; chaque nouvel événement se synchronise avec tous les
+    événements actifs. Mémoire bornée par le nombre d'événements actifs.
+    
+    L'échéance d'un événement a est le plus petit timestamp t tel que
+    t - t_a >= fenetre_a, calculé exactement en flottants : le décompte est
+    identique à celui de la version par lot (prédicat t_b - t_a < fenetre_a).
+    """
+
+    def __init__(self):
+        self.synchronisations = 0
+        self.dernier_timestamp = None
+        self._echeances: List[float] = []  # tas des fins de fenêtre actives
+
+    def ajouter(self, evenement: Dict) -> int:
+        """
+        Ajoute un événement et retourne le nombre de synchronisations qu'il crée
+        """
+        t = evenement.get('timestamp', 0)
+        if t != t:
+            return 0  # timestamp NaN : jamais synchronisé (comme la version par lot)
+        if self.dernier_timestamp is not None and t < self.dernier_timestamp:
+            raise ValueError("les événements doivent arriver par timestamp croissant")
+        self.dernier_timestamp = t
+
+        while self._echeances and self._echeances[0] <= t:
+            heapq.heappop(self._echeances)
+        nouvelles = len(self._echeances)
+        self.synchronisations += nouvelles
+
+        fenetre = evenement.get('fenetre_critique', 0)
+        if fenetre != 0 and fenetre > t - t:
+            heapq.heappush(self._echeances, self._echeance(t, fenetre))
+        return nouvelles
+    
+    @staticmethod
+    def _echeance(t, fenetre):
+        """
+        Plus petit timestamp u tel que u - t >= fenetre (la soustraction
+        flottante étant croissante en u, la fenêtre est exactement [t, u[)
+        """
+        echeance = t + fenetre
+        if not isinstance(echeance, float) or math.isinf(echeance):
+            return echeance  # entiers : somme exacte
+        while echeance - t < fenetre:
+            echeance = math.nextafter(echeance, math.inf)
+        precedente = math.nextafter(echeance, -math.inf)
+        while precedente - t >= fenetre:
+            echeance, precedente = precedente, math.nextafter(precedente, -math.inf)
+        return echeance
+
+
+def _selection(valeurs: List[float], rang: int, aleatoire: random.Random) -> float:
+    """
+    Élément de rang `rang` des valeurs triées, par sélection rapide
+    (quickselect, temps linéaire en moyenne) : le pivot est pris dans un
+    petit échantillon trié, à la position relative du rang cherché, puis
+    seule la partie qui contient ce rang est conservée
+    """
+    while len(valeurs) > 64:
+        taille = len(valeurs)
+        echantillon = sorted(aleatoire.sample(valeurs, 31))
+        pivot = echantillon[rang * 31 // taille]
+        inferieurs = [v for v in valeurs if v < pivot]
+        if rang < len(inferieurs):
+            valeurs = inferieurs
+            continue
+        superieurs = [v for v in valeurs if v > pivot]
+        egaux = taille - len(inferieurs) - len(superieurs)
+        if rang < len(inferieurs) + egaux:
+            return pivot
+        rang -= len(inferieurs) + egaux
+        valeurs = superieurs
+    return sorted(valeurs)[rang]
+
+
+def _mediane_haute(scores: Sequence[float]) -> float:
+    """
+    Élément de rang len // 2 des scores triés (sorted(scores)[len // 2]), par
+    sélection en temps linéaire sans trier toute la liste (np.partition si
+    NumPy est disponible, sinon _selection)
+    """
+    milieu = len(scores) // 2
+    if np is not None and len(scores) >= 1024:
+        return float(np.partition(np.asarray(scores, dtype=np.float64), milieu)[milieu])
+    return _selection(list(scores), milieu, random.Random(0))
+
+
+class _Identite:
+    """
+    Clé de cache comparant un objet par identité
+
+    La clé garde l'objet en vie : son identifiant ne peut pas être réutilisé
+    par un autre objet tant qu'elle est en cache.
+    """
+    __slots__ = ("objet",)
+
+    def __init__(self, objet):
+        self.objet = objet
+
+    def __eq__(self, autre):
+        return isinstance(autre, _Identite) and autre.objet is self.objet
+
+    def __hash__(self):
+        return id(self.objet)
+
+
+def _empreinte_profonde(valeur):
+    """
+    Parcours en profondeur de _empreinte pour les conteneurs que marshal
+    refuse (objets quelconques dans les listes d'acteurs ou d'événements)
+    """
+    if isinstance(valeur, dict):
+        return dict, tuple((cle, _empreinte_profonde(v)) for cle, v in valeur.items())
+    if isinstance(valeur, (list, tuple)):
+        return type(valeur), tuple(map(_empreinte_profonde, valeur))
+    if isinstance(valeur, (set, frozenset)):
+        return type(valeur), frozenset(valeur)
+    try:
+        hash(valeur)
+    except TypeError:
+        return _Identite(valeur)
+    return type(valeur), valeur
+
+
+def _empreinte(valeur, connues: Optional[Dict[int, Tuple]] = None):
+    """
+    Clé de cache d'un argument, comparée par contenu : une modification en
+    place (gains d'un acteur, bénéficiaires d'un événement...) change la clé
+
+    Les conteneurs de données usuelles (listes, dictionnaires, textes,
+    nombres) sont sérialisés par marshal, en C, et résumés par BLAKE2b ;
+    les autres sont parcourus en profondeur. `connues` garde l'empreinte
+    des conteneurs déjà vus pendant un même appel (étapes imbriquées).
+    """
+    if not isinstance(valeur, (list, tuple, dict, set, frozenset)):
+        try:
+            hash(valeur)
+        except TypeError:
+            return _Identite(valeur)
+        return type(valeur), valeur
+    if connues is not None:
+        connue = connues.get(id(valeur))
+        if connue is not None and connue[0] is valeur:
+            return connue[1]
+    try:
+        # Format 2 : sans les références du format 3, qui dépendent des
+        # compteurs de références et changeraient l'empreinte d'un appel à l'autre
+        cle = hashlib.blake2b(marshal.dumps(valeur, 2), digest_size=16).digest()
+    except ValueError:
+        cle = _empreinte_profonde(valeur)
+    if connues is not None:
+        connues[id(valeur)] = (valeur, cle)
+    return cle
+
+
+def _copier(valeur):
+    """
+    Copie des conteneurs imbriqués d'un résultat en cache (les feuilles,
+    immuables, sont partagées) : l'appelant peut modifier ce qu'il reçoit
+    """
+    if isinstance(valeur, dict):
+        return {cle: _copier(v) for cle, v in valeur.items()}
+    if isinstance(valeur, list):
+        return [_copier(v) for v in valeur]
+    if isinstance(valeur, set):
+        return set(valeur)
+    return valeur
+
+
+def _etape_memoisee(depend_de_l_etat: bool = True):
+    """
+    Décorateur : le résultat d'une étape est réutilisé tant que ses dépendances
+    (état des faits/contradictions si depend_de_l_etat, arguments) sont inchangées
+
+    Les arguments sont comparés par contenu (cf. _empreinte) : une requête
+    répétée sur des acteurs et des événements inchangés ne coûte qu'une
+    sérialisation de ces listes, faite une fois par appel extérieur
+    (livrer_conclusion -> determiner_version_probable -> analyser_cui_bono...).
+    """
+    def decorateur(methode):
+        @functools.wraps(methode)
+        def enveloppe(self, *args, **kwargs):
+            connues = self._empreintes_appel
+            exterieur = connues is None
+            if exterieur:
+                connues = self._empreintes_appel = {}
+            try:
+                cle = (self._empreinte_etat() if depend_de_l_etat else None,
+                       tuple(_empreinte(v, connues) for v in args),
+                       tuple((nom, _empreinte(v, connues)) for nom, v in sorted(kwargs.items())))
+                entree = self._cache_etapes.get(methode.__name__)
+                if entree is None or entree[0] != cle:
+                    entree = (cle, methode(self, *args, **kwargs))
+                    self._cache_etapes[methode.__name__] = entree
+                else:
+                    self._succes_cache += 1
+            finally:
+                if exterieur:
+                    self._empreintes_appel = None
+            return _copier(entree[1])
+        return enveloppe
+    return decorateur
+
+
+@dataclass(**_OPTIONS_DATACLASS)
+class MesureEtape:
+    """
+    Mesure d'un appel d'étape ; les compteurs incluent les étapes imbriquées
+    (determiner_version_probable appelle calcul_bayesien_probabilites, ...),
+    duree_propre les exclut
+    """
+    etape: str
+    duree_mur: float
+    duree_cpu: float
+    duree_propre: float
+    elements: int
+    paires_comparees: int
+    passages_mots_cles: int
+    pic_memoire: int  # octets, allocations transitoires comprises (0 sans suivi des allocations)
+    memoire_nette: int  # octets encore alloués en fin d'étape (0 sans suivi des allocations)
+    succes_cache: int
+
+
+class Instrumentation:
+    """
+    Mesures par étape du protocole : temps mur et CPU, éléments traités,
+    paires comparées, passages de l'automate de mots-clés et, si
+    allocations est vrai, mémoire allouée suivie par tracemalloc : pic
+    au-delà de la mémoire occupée au début de l'étape (les allocations
+    libérées avant la fin de l'étape comprises) et variation nette
+
+    Inactive par défaut : chaque étape ne paie alors qu'un test de drapeau.
+    Le suivi des allocations ralentit fortement l'exécution ; il n'est
+    démarré que le temps des étapes mesurées s'il n'était pas déjà actif.
+    rappels : fonctions appelées avec chaque MesureEtape
+    fabrique_span : fonction (etape, attributs) -> gestionnaire de contexte
+                    ouvert autour de l'étape (span de traçage, p. ex.
+                    tracer.start_as_current_span d'OpenTelemetry)
+    """
+
+    COMPTEURS = ("duree_mur", "duree_cpu", "duree_propre", "elements", "paires_comparees",
+                 "passages_mots_cles", "pic_memoire", "memoire_nette", "succes_cache")
+
+    def __init__(self, actif: bool = False,
+                 rappels: Optional[List[Callable[[MesureEtape], None]]] = None,
+                 fabrique_span: Optional[Callable[[str, Dict], object]] = None,
+                 allocations: bool = False):
+        self.actif = actif
+        self.allocations = allocations
+        self.rappels = list(rappels or [])
+        self.fabrique_span = fabrique_span
+        self._cumuls: Dict[str, Dict[str, float]] = {}
+        # Par appel en cours : durée des sous-étapes, pic mémoire des sous-étapes
+        self._pile: List[List[float]] = []
+        self._arreter_suivi = False  # tracemalloc démarré par l'appel le plus externe
+
+    def mesurer(self, etape: str, protocole: "ProtocoleEspritCritique", elements: int, appel):
+        """
+        Exécute appel() en mesurant l'étape
+        """
+        span = self.fabrique_span(etape, {"elements": elements}) if self.fabrique_span else None
+        if span is not None:
+            span.__enter__()
+        paires, passages, succes = (protocole._paires_comparees, protocole._passages_mots_cles,
+                                    protocole._succes_cache)
+        occupe = self._debut_allocations() if self.allocations else None
+        self._pile.append([0.0, 0])
+        cpu = time.process_time()
+        debut = time.perf_counter()
+        erreur = None
+        try:
+            return appel()
+        except BaseException as exception:
+            erreur = exception
+            raise
+        finally:
+            duree = time.perf_counter() - debut
+            duree_cpu = time.process_time() - cpu
+            sous_etapes, pic_sous_etapes = self._pile.pop()
+            pic = nette = 0
+            if occupe is not None:
+                pic, nette = self._fin_allocations(occupe, pic_sous_etapes)
+            if self._pile:
+                self._pile[-1][0] += duree
+            mesure = MesureEtape(etape, duree, duree_cpu, duree - sous_etapes, elements,
+                                 protocole._paires_comparees - paires,
+                                 protocole._passages_mots_cles - passages, pic, nette,
+                                 protocole._succes_cache - succes)
+            self._enregistrer(mesure)
+            if span is not None:
+                # Exception de l'étape seulement (sys.exc_info() verrait aussi
+                # celle que l'appelant est en train de traiter)
+                if erreur is None:
+                    span.__exit__(None, None, None)
+                else:
+                    span.__exit__(type(erreur), erreur, erreur.__traceback__)
+
+    def _debut_allocations(self) -> int:
+        """
+        Mémoire tracée au début d'une étape ; le pic courant est reporté sur
+        l'étape englobante avant sa remise à zéro
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._arreter_suivi = True
+        occupe, pic = tracemalloc.get_traced_memory()
+        if self._pile:
+            self._pile[-1][1] = max(self._pile[-1][1], pic)
+        tracemalloc.reset_peak()
+        return occupe
+
+    def _fin_allocations(self, occupe: int, pic_sous_etapes: int) -> Tuple[int, int]:
+        """
+        (pic au-delà de occupe, variation nette) de l'étape qui se termine ;
+        son pic absolu est reporté sur l'étape englobante
+        """
+        courant, pic = tracemalloc.get_traced_memory()
+        pic = max(pic, pic_sous_etapes)
+        if self._pile:
+            self._pile[-1][1] = max(self._pile[-1][1], pic)
+        elif self._arreter_suivi:
+            tracemalloc.stop()
+            self._arreter_suivi = False
+        return pic - occupe, courant - occupe
+
+    def _enregistrer(self, mesure: MesureEtape):
+        cumul = self._cumuls.get(mesure.etape)
+        if cumul is None:
+            cumul = self._cumuls[mesure.etape] = dict.fromkeys(("appels",) + self.COMPTEURS, 0)
+        cumul["appels"] += 1
+        for nom in self.COMPTEURS:
+            cumul[nom] += getattr(mesure, nom)
+        for rappel in self.rappels:
+            rappel(mesure)
+
+    def instantane(self) -> Dict[str, Dict[str, float]]:
+        """
+        Cumuls par étape depuis la dernière réinitialisation
+        """
+        return {etape: dict(cumul) for etape, cumul in self._cumuls.items()}
+
+    def reinitialiser(self):
+        self._cumuls.clear()
+
+
+def _etape_instrumentee(elements: Optional[Callable[..., int]] = None):
+    """
+    Décorateur : mesure l'étape si l'instrumentation du protocole est active.
+    elements reçoit les arguments de l'étape et compte les éléments traités
+    (défaut : nombre de faits)
+    """
+    def decorateur(methode):
+        nom = methode.__name__
+
+        @functools.wraps(methode)
+        def enveloppe(self, *args, **kwargs):
+            instrumentation = self.instrumentation
+            if not instrumentation.actif:
+                return methode(self, *args, **kwargs)
+            nombre = elements(self, *args, **kwargs) if elements else len(self.faits)
+            return instrumentation.mesurer(nom, self, nombre,
+                                           lambda: methode(self, *args, **kwargs))
+        return enveloppe
+    return decorateur
 
 
 class ProtocoleEspritCritique:
-    def __init__(self):
-        self.faits = []
-        self.contradictions = []
+    # Écart minimal entre les deux scores pour une conclusion nette (15 %)
+    SEUIL_DECISION = 0.15
+    
+    def __init__(self, mode_compact: bool = False, vectorise: bool = False,
+                 instrumentation: Optional[Instrumentation] = None,
+                 seuil_quasi_doublons: Optional[float] = None,
+                 regles: Union[PaquetRegles, str, None] = None,
+                 registre_sources: Optional[RegistreSourcesPartage] = None):
+        # Mode compact : faits et contradictions en colonnes (corpus de plusieurs millions de faits)
+        self.mode_compact = mode_compact
+        # Calcul vectorisé des scores (NumPy), ignoré si NumPy est absent
+        self.vectorise = vectorise and np is not None
+        # Registre partagé entre cas (cf. registre_sources_partage) : les faits
+        # référencent ses sources plutôt que celles, propres au cas, reçues
+        self.registre_sources = registre_sources
+        self._version_registre = registre_sources.version if registre_sources is not None else 0
+        self.faits = EntrepotFaits(registre_sources) if mode_compact else []
+        self.contradictions = self._liste_contradictions_vide()
         self.version_officielle = None
         self.versions_alternatives = []
         self.seuil_minimum_anomalies = 5  # Nouveau : seuil de déclenchement
-        
+        # Fusion des informations quasi identiques (similarité de Jaccard) ; None : désactivée
+        self.seuil_quasi_doublons = seuil_quasi_doublons
+
+        # Vocabulaire du domaine, compilé une fois par paquet et partagé :
+        # un seul passage par texte analysé (paquet, ou chemin d'un fichier JSON)
+        self._appliquer_regles(regles)
+
+        # État persistant pour l'ingestion incrémentale
+        self.compteur_anomalies = 0
+        self.anomalies_validees = 0
+        self._index_oppositions: Optional[IndexOppositions] = None
+        self._faits_indexes: Optional[List[Fait]] = None
+        self._positions_par_description = self._nouvel_index_descriptions()
+        self._contradictions_par_paire: Dict[Tuple[int, int], Contradiction] = {}
+        self._quasi_doublons: Optional[IndexQuasiDoublons] = None
+        self._positions_par_variante: Dict[str, int] = {}
+        # Index inverse id(source) -> positions des faits qu'elle soutient
+        # (rétractation, construit au premier besoin et tenu à jour ensuite),
+        # et positions des faits retirés faute de source
+        self._positions_par_source: Dict[int, array] = {}
+        self._faits_sources_indexes = 0
+        self._faits_retires: Set[int] = set()
+        # (faits, début, fin, mots-clés non vides) de la dernière collecte, en
+        # attente d'étiquetage dans l'index des oppositions
+        self._termes_collectes: Optional[Tuple] = None
+
+        # Cache des étapes 3 à 7 : invalidé par toute modification des faits ou contradictions
+        self._revision = 0
+        self._cache_etapes: Dict[str, Tuple] = {}
+        # Empreintes des arguments pendant l'appel d'étape en cours (cf. _etape_memoisee)
+        self._empreintes_appel: Optional[Dict[int, Tuple]] = None
+
+        # Mesures par étape (inactives par défaut) et compteurs du chemin critique
+        self.instrumentation = instrumentation or Instrumentation()
+        self._passages_mots_cles = 0
+        self._paires_comparees = 0
+        self._succes_cache = 0
+
+    def _appliquer_regles(self, regles: Union[PaquetRegles, str, None]):
+        if regles is None:
+            regles = regles_par_defaut()
+        elif isinstance(regles, str):
+            regles = charger_regles(regles)
+        self.regles = regles
+        self.paires_opposition = regles.paires_opposition
+        self.mots_cles_anomalies = regles.mots_cles_anomalies
+        self.termes_specificite = regles.termes_specificite
+        self.termes_verifiabilite = regles.termes_verifiabilite
+        self.complements_opposition = regles.complements_opposition
+        self.bonus_type_source = regles.bonus_type_source
+        self.automate = regles.automate
+    
+    def utiliser_regles(self, regles: Union[PaquetRegles, str, None]):
+        """
+        Change de paquet de règles à chaud : les faits sont réétiquetés et
+        les contradictions recalculées avec le nouveau vocabulaire ; les
+        compteurs d'anomalies déjà collectés sont conservés
+        """
+        self._appliquer_regles(regles)
+        self._index_oppositions = None
+        self._termes_collectes = None
+        self.invalider_cache()
+        if len(self.faits):
+            self.identifier_contradictions()
+    
+    def recharger_regles(self) -> bool:
+        """
+        Reprend le fichier du paquet courant s'il a changé ; True si le
+        paquet a été remplacé
+        """
+        if self.regles.chemin is None:
+            return False
+        paquet = charger_regles(self.regles.chemin)
+        if paquet is self.regles:
+            return False
+        self.utiliser_regles(paquet)
+        return True
+    
+    def invalider_cache(self):
+        """
+        Vide le cache des étapes. Inutile après la modification d'un acteur,
+        d'un événement ou des attributs lus par les étapes en cache
+        (confirme_par_multiples_sources, niveau_incompatibilite,
+        validee_independamment), toutes détectées ; nécessaire après le
+        remplacement d'un élément de self.faits ou self.contradictions
+        """
+        self._revision += 1
+        self._cache_etapes.clear()
+    
+    def _empreinte_etat(self) -> Tuple:
+        if self.registre_sources is not None:
+            self._actualiser_credibilites()
+        return (self._revision, _modifications_objets, _Identite(self.faits), len(self.faits),
+                _Identite(self.contradictions), len(self.contradictions))
+    
+    @_etape_instrumentee(lambda self, sources, limite_anomalies=20: sum(len(s.informations) for s in sources))
     def collecter_informations(self, sources: List[Source], limite_anomalies: int = 20) -> Dict:
         """
         Étape 1: Collecte des informations principales avec validation de qualité
@@ -70,37 +1981,73 @@ class ProtocoleEspritCritique:
         faits_collectes = {}
         compteur_anomalies = 0
         anomalies_validees = 0
-        
+        quasi_doublons = self._nouvel_index_quasi_doublons()
+        representants: List[Fait] = []
+        faits_par_variante: Dict[str, Fait] = {}
+        # Chaque information normalisée et examinée une fois : (jetons, mots-clés) ;
+        # des tuples plutôt que des TexteNormalise, que le ramasse-miettes ignore
+        analyses: Dict[str, Tuple[Tuple[str, ...], FrozenSet[str]]] = {}
+
         for source in sources:
             if source.raisonnement_rationnel:
-                for info in source.informations:
+                informations = source.informations
+                if self.registre_sources is not None:
+                    source = self.registre_sources.canonique(source)
+                for info in informations:
+                    analyse = analyses.get(info)
+                    if analyse is None:
+                        texte = TexteNormalise(info)
+                        analyse = analyses[info] = (texte.jetons, self._termes_presents(texte))
+                    else:
+                        texte = None
+                    jetons, termes = analyse
+                    
                     # Identifier et valider les anomalies
-                    if self._est_anomalie(info):
+                    if self._est_anomalie(info, termes):
                         if compteur_anomalies >= limite_anomalies:
                             continue
                         compteur_anomalies += 1
                         
                         # Validation de la solidité de l'anomalie
-                        if self._valider_anomalie(info, source):
+                        if self._valider_anomalie(info, source, termes):
                             anomalies_validees += 1
                     
-                    if info not in faits_collectes:
+                    fait = faits_collectes.get(info) or faits_par_variante.get(info)
+                    if fait is None and quasi_doublons is not None:
+                        # Reformulation d'une information déjà collectée : même fait
+                        texte = texte or TexteNormalise(info, jetons)
+                        trouve = quasi_doublons.rechercher(texte)
+                        if trouve is not None:
+                            fait = representants[trouve[0]]
+                            fait.ajouter_variante(info)
+                            faits_par_variante[info] = fait
+                    
+                    if fait is None:
                         fait = Fait(description=info, sources=[source])
+                        fait._jetons_description = (info, *jetons)
                         fait.solidite_factuelle = self._evaluer_solidite_fait(info, source)
                         faits_collectes[info] = fait
+                        if quasi_doublons is not None:
+                            quasi_doublons.ajouter(texte)
+                            representants.append(fait)
                     else:
-                        faits_collectes[info].sources.append(source)
+                        fait.ajouter_source(source)
                         # Recalculer solidité avec sources multiples
-                        faits_collectes[info].solidite_factuelle = self._evaluer_solidite_fait_multiple(
-                            faits_collectes[info]
-                        )
-        
+                        fait.solidite_factuelle = self._evaluer_solidite_fait_multiple(fait)
+
         # Vérifier si les faits sont confirmés par au moins 2 autres sources
+        debut = len(self.faits)
         for fait in faits_collectes.values():
-            if len(fait.sources) >= 3:
+            if fait.nombre_sources >= 3:
                 fait.confirme_par_multiples_sources = True
             self.faits.append(fait)
-        
+        self._revision += 1
+        # Mots-clés des nouveaux faits gardés pour leur étiquetage dans l'index
+        # des oppositions (seuls les ensembles non vides sont conservés)
+        self._termes_collectes = (self.faits, debut, len(self.faits),
+                                  {info: termes for info, (_, termes) in analyses.items()
+                                   if termes and info in faits_collectes})
+
         # Retourner les statistiques de validation
         return {
             "anomalies_detectees": compteur_anomalies,
@@ -109,46 +2056,441 @@ class ProtocoleEspritCritique:
             "donnees_suffisantes": anomalies_validees >= self.seuil_minimum_anomalies
         }
     
-    def _est_anomalie(self, information: str) -> bool:
+    @_etape_instrumentee(lambda self, source, limite_anomalies=20: len(source.informations))
+    def ajouter_source(self, source: Source, limite_anomalies: int = 20) -> Dict:
+        """
+        Ingestion incrémentale d'une source : met à jour les faits, les compteurs
+        d'anomalies et les confirmations en place, puis ne réévalue que les
+        paires touchant les faits modifiés.
+
+        Contrairement à collecter_informations, une information déjà connue
+        renforce le fait existant au lieu d'en créer un nouveau.
+        """
+        self._synchroniser_index()
+        faits_nouveaux = 0
+        faits_modifies: Set[int] = set()
+
+        if source.raisonnement_rationnel:
+            informations = source.informations
+            if self.registre_sources is not None:
+                source = self.registre_sources.canonique(source)
+            for info in informations:
+                texte = TexteNormalise(info)
+                termes = self._termes_presents(texte)
+                
+                if self._est_anomalie(info, termes):
+                    if self.compteur_anomalies >= limite_anomalies:
+                        continue
+                    self.compteur_anomalies += 1
+                    
+                    if self._valider_anomalie(info, source, termes):
+                        self.anomalies_validees += 1
+                
+                positions = self._positions_par_description.get(info)
+                position = positions[-1] if positions else self._position_quasi_doublon(texte)
+                if position is None:
+                    fait = Fait(description=info, sources=[source])
+                    fait._jetons_description = (info, *texte.jetons)
+                    fait.solidite_factuelle = self._evaluer_solidite_fait(info, source)
+                    self.faits.append(fait)
+                    position = self._indexer_faits_recents({info: termes})
+                    faits_nouveaux += 1
+                else:
+                    fait = self.faits[position]
+                    fait.ajouter_source(source)
+                    fait.solidite_factuelle = self._evaluer_solidite_fait_multiple(fait)
+                    if position < self._faits_sources_indexes:
+                        self._positions_par_source.setdefault(id(source), array('I')).append(position)
+                
+                if fait.nombre_sources >= 3:
+                    fait.confirme_par_multiples_sources = True
+                faits_modifies.add(position)
+
+        nouvelles_contradictions = self._reevaluer_contradictions(faits_modifies)
+        self._revision += 1
+
+        stats = self.statistiques_collecte()
+        stats.update({
+            "faits_nouveaux": faits_nouveaux,
+            "faits_modifies": len(faits_modifies),
+            "nouvelles_contradictions": nouvelles_contradictions
+        })
+        return stats
+    
+    def retirer_source(self, source: Source) -> Dict:
+        """
+        Rétractation d'une source : elle est retirée de chacun des faits
+        qu'elle soutient (index inverse source -> faits), dont la solidité et
+        la confirmation sont recalculées ; seules les paires touchant ces faits
+        sont réévaluées, et les probabilités seront recalculées au prochain appel.
+        Le coût dépend du nombre de faits de la source, pas de la taille du corpus.
+
+        Un fait qui n'a plus aucune source est retiré de l'analyse : il garde sa
+        position dans self.faits (les index ne sont pas renumérotés), sans
+        source, mais n'est plus compté ni comparé. Les compteurs d'anomalies
+        de la collecte ne sont pas modifiés.
+        """
+        index = self._synchroniser_index()
+        self._indexer_sources_recentes()
+        if self.registre_sources is not None:
+            identifiant = self.registre_sources.chercher(source)
+            source = self.registre_sources[identifiant] if identifiant is not None else source
+        faits_modifies, faits_retires = [], []
+        for position in sorted(set(self._positions_par_source.pop(id(source), ()))):
+            fait = self.faits[position]
+            fait.retirer_source(source)
+            if fait.nombre_sources:
+                fait.solidite_factuelle = self._evaluer_solidite_fait_multiple(fait)
+                fait.confirme_par_multiples_sources = fait.nombre_sources >= 3
+                faits_modifies.append(position)
+            else:
+                fait.solidite_factuelle = 0.0
+                fait.confirme_par_multiples_sources = False
+                faits_retires.append(position)
+
+        a_reevaluer, retirees = list(faits_modifies), []
+        for position in faits_retires:
+            for partenaire in index.partenaires(position):
+                contradiction = self._contradictions_par_paire.pop(
+                    (position, partenaire) if position < partenaire else (partenaire, position), None)
+                if contradiction is not None:
+                    retirees.append(contradiction)
+            index.retirer(position)
+            self._faits_retires.add(position)
+            # Les faits restants de même description sont revalidés sans lui
+            description = self.faits[position].description
+            restantes = [p for p in self._positions_par_description[description] if p != position]
+            if restantes:
+                a_reevaluer.append(restantes[0])
+                self._positions_par_description[description] = restantes
+            else:
+                del self._positions_par_description[description]
+        self._retirer_contradictions(retirees)
+
+        avant = len(self.contradictions)
+        nouvelles_contradictions = self._reevaluer_contradictions(a_reevaluer)
+        self._revision += 1
+        return {
+            "faits_modifies": len(faits_modifies),
+            "faits_retires": len(faits_retires),
+            "contradictions_retirees": len(retirees) + avant + len(nouvelles_contradictions)
+                                       - len(self.contradictions),
+            "nouvelles_contradictions": nouvelles_contradictions
+        }
+    
+    def ingerer_sources(self, sources: Iterable[Source],
+                        limite_anomalies: int = 20) -> Iterator[Dict]:
+        """
+        Ingestion au fil de l'eau : un bilan (cf. ajouter_source) par source reçue
+        """
+        for source in sources:
+            yield self.ajouter_source(source, limite_anomalies)
+    
+    async def ingerer_sources_async(self, sources: AsyncIterable[Source],
+                                    limite_anomalies: int = 20) -> AsyncIterator[Dict]:
+        """
+        Variante asynchrone d'ingerer_sources pour les flux de crawlers
+        """
+        async for source in sources:
+            yield self.ajouter_source(source, limite_anomalies)
+    
+    def statistiques_collecte(self) -> Dict:
+        """
+        Statistiques cumulées de l'ingestion incrémentale
+        """
+        return {
+            "anomalies_detectees": self.compteur_anomalies,
+            "anomalies_validees": self.anomalies_validees,
+            "taux_validation": self.anomalies_validees / max(self.compteur_anomalies, 1),
+            "donnees_suffisantes": self.anomalies_validees >= self.seuil_minimum_anomalies
+        }
+    
+    def _synchroniser_index(self) -> IndexOppositions:
+        """
+        Maintient l'index des oppositions aligné sur self.faits (qui reste
+        une liste publique modifiable : toute réaffectation force une reconstruction)
+        """
+        index = self._index_oppositions
+        if index is None or self._faits_indexes is not self.faits or \
+           len(index.termes_par_fait) > len(self.faits):
+            self._index_oppositions = IndexOppositions(self.paires_opposition, self._termes_presents)
+            self._faits_indexes = self.faits
+            self._positions_par_description = self._nouvel_index_descriptions()
+            self._contradictions_par_paire = {}
+            self._quasi_doublons = None
+            self._positions_par_source = {}
+            self._faits_sources_indexes = 0
+            self._faits_retires = set()
+        quasi_doublons = self._quasi_doublons
+        if (quasi_doublons.seuil if quasi_doublons else None) != self.seuil_quasi_doublons:
+            # Fusion activée, désactivée ou seuil modifié : index des variantes reconstruit
+            self._quasi_doublons = self._nouvel_index_quasi_doublons()
+            self._positions_par_variante = {}
+        self._indexer_faits_recents()
+        self._actualiser_credibilites()
+        return self._index_oppositions
+    
+    def _actualiser_credibilites(self):
+        """
+        Reprend les crédibilités modifiées dans le registre partagé depuis le
+        dernier passage : solidité des faits de ces sources recalculée et
+        paires touchées réévaluées (cf. retirer_source). Les compteurs
+        d'anomalies de la collecte ne sont pas modifiés.
+        """
+        registre = self.registre_sources
+        if registre is None:
+            return
+        # Version lue une seule fois : une modification concurrente arrivée
+        # entre-temps reste dans le journal pour le passage suivant
+        version = registre.version
+        if version == self._version_registre:
+            return
+        modifiees = registre.modifications_depuis(self._version_registre, version)
+        self._version_registre = version
+        self._recalculer_faits_des_sources(modifiees)
+    
+    def _recalculer_faits_des_sources(self, identifiants: Iterable[int]):
+        """
+        Solidité des faits de ces sources du registre partagé recalculée et
+        paires touchées réévaluées
+        """
+        registre = self.registre_sources
+        self._synchroniser_index()
+        self._indexer_sources_recentes()
+        positions = set()
+        for identifiant in identifiants:
+            positions.update(self._positions_par_source.get(id(registre[identifiant]), ()))
+        positions.difference_update(self._faits_retires)
+        for position in positions:
+            fait = self.faits[position]
+            fait._recalculer_agregats()
+            fait.solidite_factuelle = self._evaluer_solidite_fait_multiple(fait)
+        if positions:
+            self._reevaluer_contradictions(positions)
+            self._revision += 1
+    
+    def faits_par_description(self, description: str) -> List[Fait]:
+        """
+        Faits portant exactement cette description (recherche en temps constant)
+        """
+        self._synchroniser_index()
+        return [self.faits[p] for p in self._positions_par_description.get(description, ())]
+    
+    def _nouvel_index_descriptions(self) -> Union[Dict[str, List[int]], PositionsParDescription]:
+        """
+        Index description -> positions des faits : tableaux triés pour un
+        entrepôt compact, dictionnaire de listes sinon
+        """
+        if isinstance(self.faits, EntrepotFaits):
+            return PositionsParDescription(self.faits.descriptions)
+        return {}
+    
+    def _nombre_faits_actifs(self) -> int:
+        """
+        Nombre de faits hors faits retirés (cf. retirer_source)
+        """
+        if self._faits_indexes is not self.faits:
+            return len(self.faits)
+        return len(self.faits) - len(self._faits_retires)
+    
+    def _indexer_faits_recents(self, termes_connus: Optional[Dict[str, FrozenSet[str]]] = None) -> int:
+        """
+        Indexe les faits ajoutés depuis la dernière synchronisation ; retourne
+        la position du dernier fait. Les mots-clés déjà trouvés à la collecte
+        (ou donnés par `termes_connus`) ne sont pas recherchés à nouveau.
+        """
+        index = self._index_oppositions
+        collectes = self._termes_collectes
+        if collectes is not None and collectes[0] is not self.faits:
+            collectes = self._termes_collectes = None
+        retires = self._faits_retires
+        for position in range(len(index.termes_par_fait), len(self.faits)):
+            fait = self.faits[position]
+            description = fait.description
+            termes = termes_connus.get(description) if termes_connus else None
+            if termes is None and collectes is not None and collectes[1] <= position < collectes[2]:
+                termes = collectes[3].get(description, _AUCUN_TERME)
+            if termes is None:
+                termes = self._termes_presents(fait.texte_normalise)
+            index.ajouter(description, termes)
+            if retires and position in retires:
+                index.retirer(position)
+                continue
+            self._positions_par_description.setdefault(description, []).append(position)
+        if collectes is not None and len(index.termes_par_fait) >= collectes[2]:
+            self._termes_collectes = None
+        quasi_doublons = self._quasi_doublons
+        if quasi_doublons is not None:
+            # Rattrapage séparé : l'index peut être plus récent que celui des oppositions
+            for position in range(len(quasi_doublons.textes), len(self.faits)):
+                fait = self.faits[position]
+                quasi_doublons.ajouter(fait.texte_normalise)
+                for variante in fait.variantes:
+                    self._positions_par_variante.setdefault(variante, position)
+        return len(self.faits) - 1
+    
+    def _indexer_sources_recentes(self):
+        """
+        Complète l'index inverse source -> faits avec les faits ajoutés depuis
+        la dernière synchronisation (une entrée par occurrence de la source)
+        """
+        faits = self.faits
+        positions_par_source = self._positions_par_source
+        compact = isinstance(faits, EntrepotFaits)
+        for position in range(self._faits_sources_indexes, len(faits)):
+            if compact:
+                sources = [faits.registre[identifiant] for identifiant in faits.identifiants_sources(position)]
+            else:
+                sources = faits[position].sources
+            for source in sources:
+                positions = positions_par_source.get(id(source))
+                if positions is None:
+                    positions = positions_par_source[id(source)] = array('I')
+                positions.append(position)
+        self._faits_sources_indexes = len(faits)
+    
+    def _nouvel_index_quasi_doublons(self) -> Optional[IndexQuasiDoublons]:
+        if self.seuil_quasi_doublons is None:
+            return None
+        return IndexQuasiDoublons(self.seuil_quasi_doublons)
+    
+    def _position_quasi_doublon(self, texte: 'TexteNormalise') -> Optional[int]:
+        """
+        Position du fait dont l'information est une variante quasi identique
+        (l'information est alors enregistrée comme variante du fait)
+        """
+        if self._quasi_doublons is None:
+            return None
+        information = texte.texte
+        position = self._positions_par_variante.get(information)
+        if position in self._faits_retires:
+            position = None
+        if position is None:
+            trouve = self._quasi_doublons.rechercher(texte)
+            if trouve is None or trouve[0] in self._faits_retires:
+                return None
+            position = trouve[0]
+            self.faits[position].ajouter_variante(information)
+            self._positions_par_variante[information] = position
+        return position
+    
+    def expliquer_variantes(self, fait: Fait) -> List[Tuple[str, float]]:
+        """
+        Variantes absorbées par un fait et leur similarité avec sa description
+        """
+        comparateur = self._quasi_doublons or IndexQuasiDoublons(self.seuil_quasi_doublons or 0.8)
+        reference = comparateur.fragments(fait.description)
+        return [(variante, comparateur.similarite(reference, comparateur.fragments(variante)))
+                for variante in fait.variantes]
+    
+    def _reevaluer_contradictions(self, positions: Iterable[int]) -> List[Contradiction]:
+        """
+        Réévalue uniquement les paires impliquant les faits donnés ; met à jour
+        les contradictions existantes en place et retourne les nouvelles
+        """
+        index = self._index_oppositions
+        nouvelles, retirees = [], []
+        # Les doublons de description partagent la validation : on les réévalue aussi
+        positions = {k for i in positions
+                     for k in self._positions_par_description[self.faits[i].description]}
+        paires = set()
+        for i in positions:
+            for j in index.partenaires(i):
+                paires.add((i, j) if i < j else (j, i))
+
+        self._paires_comparees += len(paires)
+        for i, j in sorted(paires):
+            fait_a, fait_b = self.faits[i], self.faits[j]
+            niveau = self._calculer_niveau_contradiction(fait_a, fait_b)
+            contradiction = self._contradictions_par_paire.get((i, j))
+            
+            if niveau > 0.6:  # Seuil de significativité
+                if contradiction is None:
+                    contradiction = self._enregistrer_contradiction(
+                        self.contradictions,
+                        Contradiction(fait_a.description, fait_b.description, niveau,
+                                      ref_fait_a=fait_a, ref_fait_b=fait_b)
+                    )
+                    self._contradictions_par_paire[(i, j)] = contradiction
+                    nouvelles.append(contradiction)
+                contradiction.niveau_incompatibilite = niveau
+                contradiction.validee_independamment = self._valider_contradiction(contradiction)
+            elif contradiction is not None:
+                del self._contradictions_par_paire[(i, j)]
+                retirees.append(contradiction)
+
+        self._retirer_contradictions(retirees)
+        return nouvelles
+    
+    def _liste_contradictions_vide(self):
+        """
+        Conteneur de contradictions adapté au mode de stockage
+        """
+        return EntrepotContradictions(self.faits) if self.mode_compact else []
+    
+    def _enregistrer_contradiction(self, contradictions, contradiction: Contradiction):
+        """
+        Ajoute une contradiction ; en mode compact, retourne la vue stockée
+        """
+        if isinstance(contradictions, EntrepotContradictions):
+            return contradictions.ajouter(contradiction)
+        contradictions.append(contradiction)
+        return contradiction
+    
+    def _retirer_contradictions(self, contradictions: List[Contradiction]):
+        """
+        Retire un lot de contradictions (une seule réécriture de la liste)
+        """
+        if not contradictions:
+            return
+        if isinstance(self.contradictions, EntrepotContradictions):
+            for contradiction in contradictions:
+                self.contradictions.retirer(contradiction)
+        else:
+            identites = {id(contradiction) for contradiction in contradictions}
+            self.contradictions = [c for c in self.contradictions if id(c) not in identites]
+    
+    def _termes_presents(self, texte: Union[str, 'TexteNormalise']) -> FrozenSet[str]:
+        """
+        Tous les mots-clés du protocole présents dans un texte (un seul passage ;
+        un texte déjà normalisé, cf. Fait.texte_normalise, ne l'est pas à nouveau)
+        """
+        self._passages_mots_cles += 1
+        return self.automate.rechercher(texte)
+    
+    def _est_anomalie(self, information: str, termes: Optional[FrozenSet[str]] = None) -> bool:
         """
         Identifie si une information constitue une anomalie, improbabilité ou incohérence
         """
-        mots_cles_anomalies = [
-            "contradiction", "improbable", "impossible", "incohérence", "anomalie",
-            "étrange", "suspect", "inexpliqué", "inhabituel", "invraisemblable",
-            "paradoxe", "discordance", "aberration", "bizarrerie", "mystère",
-            "chute libre", "température insuffisante", "sans impact", "multiples",
-            "simultanés", "intact", "désintégrés", "fusion", "traces", "mystérieusement"
-        ]
-        return any(mot in information.lower() for mot in mots_cles_anomalies)
+        if termes is None:
+            termes = self._termes_presents(information)
+        return not self.mots_cles_anomalies.isdisjoint(termes)
     
-    def _valider_anomalie(self, anomalie: str, source: Source) -> bool:
+    def _valider_anomalie(self, anomalie: str, source: Source,
+                          termes: Optional[FrozenSet[str]] = None) -> bool:
         """
         Valide la solidité d'une anomalie détectée
         """
+        if termes is None:
+            termes = self._termes_presents(anomalie)
+
         # Critères de validation basiques (à affiner selon le contexte)
         score_validation = 0
-        
+
         # Crédibilité de la source
         score_validation += source.credibilite * 0.4
-        
-        # Type de source (documents > témoignages > alternatives > officielles pour anomalies)
-        type_bonus = {
-            TypeSource.DOCUMENT: 0.3,
-            TypeSource.TEMOIGNAGE: 0.2,
-            TypeSource.ALTERNATIVE: 0.15,
-            TypeSource.OFFICIELLE: 0.1  # Sources officielles moins susceptibles de rapporter leurs propres anomalies
-        }
-        score_validation += type_bonus.get(source.type_source, 0)
-        
+
+        # Type de source (table du paquet de règles)
+        score_validation += self.bonus_type_source.get(source.type_source, 0)
+
         # Spécificité de l'anomalie (plus c'est précis, mieux c'est)
-        if any(terme in anomalie.lower() for terme in ["température", "vitesse", "timing", "coordonnées"]):
+        if not self.termes_specificite.isdisjoint(termes):
             score_validation += 0.2
-        
+
         # Vérifiabilité technique
-        if any(terme in anomalie.lower() for terme in ["physique", "technique", "mesurable", "calculable"]):
+        if not self.termes_verifiabilite.isdisjoint(termes):
             score_validation += 0.1
-        
+
         return score_validation > 0.6  # Seuil de validation
     
     def _evaluer_solidite_fait(self, fait: str, source: Source) -> float:
@@ -161,131 +2503,262 @@ class ProtocoleEspritCritique:
         """
         Évalue la solidité d'un fait confirmé par plusieurs sources
         """
-        if len(fait.sources) == 1:
+        fait.synchroniser_agregats()
+        if fait.nombre_sources == 1:
             return self._evaluer_solidite_fait(fait.description, fait.sources[0])
-        
+
         # Formule de convergence : solidité augmente avec le nombre de sources indépendantes
-        solidite_moyenne = sum(s.credibilite for s in fait.sources) / len(fait.sources)
-        bonus_convergence = min(0.3, (len(fait.sources) - 1) * 0.1)
-        
+        solidite_moyenne = fait.somme_credibilite / fait.nombre_sources
+        bonus_convergence = min(0.3, (fait.nombre_sources - 1) * 0.1)
+
         return min(1.0, solidite_moyenne + bonus_convergence)
     
+    @_etape_instrumentee()
     def identifier_contradictions(self) -> List[Contradiction]:
         """
         Étape 2: Analyser les informations pour identifier improbabilités et contradictions VALIDÉES
         """
-        contradictions = []
-        
-        for i, fait_a in enumerate(self.faits):
-            for j, fait_b in enumerate(self.faits[i+1:], i+1):
-                if self._sont_contradictoires(fait_a.description, fait_b.description):
-                    niveau = self._calculer_niveau_contradiction(fait_a, fait_b)
-                    # Nouveau : seuil minimum pour considérer contradiction valide
-                    if niveau > 0.6:  # Seuil de significativité
-                        contradiction = Contradiction(
-                            fait_a.description, 
-                            fait_b.description, 
-                            niveau
-                        )
-                        contradiction.validee_independamment = self._valider_contradiction(contradiction)
-                        contradictions.append(contradiction)
-        
+        contradictions = self._liste_contradictions_vide()
+        self._contradictions_par_paire = {}
+
+        # Seules les paires partageant des termes complémentaires sont comparées
+        index = self._synchroniser_index()
+
+        self._revision += 1
+
+        if self.vectorise:
+            for i, j, niveau, validee in self._scorer_paires_vectorise(index):
+                fait_a, fait_b = self.faits[i], self.faits[j]
+                contradiction = Contradiction(fait_a.description, fait_b.description, niveau, validee,
+                                              ref_fait_a=fait_a, ref_fait_b=fait_b)
+                contradiction = self._enregistrer_contradiction(contradictions, contradiction)
+                self._contradictions_par_paire[(i, j)] = contradiction
+            self.contradictions = contradictions
+            return contradictions
+
+        paires_comparees = 0
+        for i, j in index.paires_candidates():
+            paires_comparees += 1
+            fait_a, fait_b = self.faits[i], self.faits[j]
+            niveau = self._calculer_niveau_contradiction(fait_a, fait_b)
+            # Nouveau : seuil minimum pour considérer contradiction valide
+            if niveau > 0.6:  # Seuil de significativité
+                contradiction = Contradiction(
+                    fait_a.description, 
+                    fait_b.description, 
+                    niveau,
+                    ref_fait_a=fait_a,
+                    ref_fait_b=fait_b
+                )
+                contradiction.validee_independamment = self._valider_contradiction(contradiction)
+                contradiction = self._enregistrer_contradiction(contradictions, contradiction)
+                self._contradictions_par_paire[(i, j)] = contradiction
+
+        self._paires_comparees += paires_comparees
         self.contradictions = contradictions
         return contradictions
     
-    def _sont_contradictoires(self, fait_a: str, fait_b: str) -> bool:
+    def _scorer_paires_vectorise(self, index: IndexOppositions) -> Iterator[Tuple[int, int, float, bool]]:
+        """
+        Équivalent NumPy de la boucle scalaire : poids, bonus ×1.5, niveau,
+        seuils 0.6/0.7 et validation calculés en bloc
+
+        Deux faits ne peuvent se contredire qu'en fonction de leurs signatures
+        (ensembles de termes d'opposition) : les faits sont regroupés par
+        signature et chaque couple de signatures complémentaires est traité
+        comme un bloc de paires (produit cartésien vectorisé).
+        """
+        nombre, solidite, confirme = self._colonnes_faits()
+        poids = nombre * solidite
+        poids = np.where(confirme, poids * 1.5, poids)
+
+        signatures, groupes = index.groupes_signatures()
+        membres = [np.asarray(groupe, dtype=np.int64) for groupe in groupes]
+
+        blocs_i, blocs_j, blocs_niveaux = [], [], []
+        for a, compatibles in enumerate(index.signatures_compatibles(signatures)):
+            for b in compatibles:
+                if b < a:  # couple déjà traité
+                    continue
+                taille_a, taille_b = len(membres[a]), len(membres[b])
+                self._paires_comparees += taille_a * (taille_a - 1) // 2 if a == b else taille_a * taille_b
+                for i, j, niveaux in self._bloc_paires_vectorise(membres[a], membres[b], a == b, poids):
+                    blocs_i.append(i)
+                    blocs_j.append(j)
+                    blocs_niveaux.append(niveaux)
+        if not blocs_i:
+            return
+
+        i, j, niveaux = np.concatenate(blocs_i), np.concatenate(blocs_j), np.concatenate(blocs_niveaux)
+        ordre = np.lexsort((j, i))  # ordre de la double boucle i/j
+        i, j, niveaux = i[ordre], j[ordre], niveaux[ordre]
+
+        # Validation : tous les faits de même description doivent être solides
+        # (les faits retirés, hors de toute description, vont dans un groupe à part)
+        groupe = np.full(len(solidite), len(self._positions_par_description), dtype=np.intp)
+        for g, positions in enumerate(self._positions_par_description.values()):
+            groupe[positions] = g
+        fragiles = np.bincount(groupe, weights=~(solidite > 0.6),
+                               minlength=len(self._positions_par_description) + 1) > 0
+        validees = ~fragiles[groupe[i]] & ~fragiles[groupe[j]] & (niveaux > 0.7)
+
+        yield from zip(i.tolist(), j.tolist(), niveaux.tolist(), validees.tolist())
+    
+    @staticmethod
+    def _bloc_paires_vectorise(membres_a, membres_b, meme_groupe: bool, poids, taille_bloc: int = 1 << 22):
+        """
+        Paires significatives (niveau > 0.6) entre deux groupes de faits, par tranches
+        de taille bornée pour limiter la mémoire
+        """
+        pas = max(1, taille_bloc // max(len(membres_b), 1))
+        poids_b = poids[membres_b]
+        for debut in range(0, len(membres_a), pas):
+            tranche = membres_a[debut:debut + pas]
+            somme = poids[tranche][:, None] + poids_b[None, :]
+            niveaux = np.minimum(1.0, somme / (somme + 2))
+            masque = niveaux > 0.6  # Seuil de significativité
+            if meme_groupe:
+                masque &= tranche[:, None] < membres_b[None, :]
+            lignes, colonnes = np.nonzero(masque)
+            if len(lignes):
+                x, y = tranche[lignes], membres_b[colonnes]
+                yield np.minimum(x, y), np.maximum(x, y), niveaux[lignes, colonnes]
+    
+    def _colonnes_faits(self):
+        """
+        Colonnes NumPy (nombre de sources, solidité, confirmation) de tous les faits
+        """
+        if isinstance(self.faits, EntrepotFaits):
+            return (np.array(self.faits.nombre_sources, dtype=np.float64),
+                    np.array(self.faits.solidite_factuelle, dtype=np.float64),
+                    np.array(self.faits.confirme, dtype=bool))
+        for fait in self.faits:
+            fait.synchroniser_agregats()
+        n = len(self.faits)
+        return (np.fromiter((f.nombre_sources for f in self.faits), dtype=np.float64, count=n),
+                np.fromiter((f.solidite_factuelle for f in self.faits), dtype=np.float64, count=n),
+                np.fromiter((f.confirme_par_multiples_sources for f in self.faits), dtype=bool, count=n))
+    
+    def _colonnes_contradictions(self):
+        """
+        Colonnes NumPy (niveau, validation) des contradictions courantes
+        """
+        contradictions = self.contradictions
+        if isinstance(contradictions, EntrepotContradictions):
+            actives = np.array(contradictions.active, dtype=bool)
+            return (np.array(contradictions.niveau_incompatibilite, dtype=np.float64)[actives],
+                    np.array(contradictions.validee, dtype=bool)[actives])
+        n = len(contradictions)
+        return (np.fromiter((c.niveau_incompatibilite for c in contradictions), dtype=np.float64, count=n),
+                np.fromiter((c.validee_independamment for c in contradictions), dtype=bool, count=n))
+    
+    def _sont_contradictoires(self, fait_a: str, fait_b: str,
+                              termes_a: Optional[FrozenSet[str]] = None,
+                              termes_b: Optional[FrozenSet[str]] = None) -> bool:
         """
         Méthode améliorée pour détecter les contradictions réelles
         """
-        # Contradictions explicites
-        mots_opposition_directs = [
-            ("possible", "impossible"),
-            ("présent", "absent"),
-            ("élevé", "faible"),
-            ("rapide", "lent"),
-            ("chaud", "froid"),
-            ("intact", "détruit"),
-            ("visible", "invisible")
-        ]
-        
-        for terme_a, terme_b in mots_opposition_directs:
-            if (terme_a in fait_a.lower() and terme_b in fait_b.lower()) or \
-               (terme_b in fait_a.lower() and terme_a in fait_b.lower()):
-                return True
-        
-        # Contradictions contextuelles (à personnaliser selon le domaine)
-        contradictions_specifiques = [
-            ("effondrement par feu", "vitesse chute libre"),
-            ("surprise totale", "exercices simultanés"),
-            ("origine naturelle", "labo épicentre"),
-            ("asymptomatiques contagieux", "transmission rare"),
-            ("simple cambriolage", "équipement sophistiqué")
-        ]
-        
-        for terme_a, terme_b in contradictions_specifiques:
-            if (terme_a in fait_a.lower() and terme_b in fait_b.lower()) or \
-               (terme_b in fait_a.lower() and terme_a in fait_b.lower()):
+        if termes_a is None:
+            termes_a = self._termes_presents(fait_a)
+        if termes_b is None:
+            termes_b = self._termes_presents(fait_b)
+
+        # Contradictions explicites et contextuelles : un terme de A dont le
+        # complémentaire apparaît dans B
+        for terme in termes_a:
+            complements = self.complements_opposition.get(terme)
+            if complements and not complements.isdisjoint(termes_b):
                 return True
-        
+
         return False
     
     def _valider_contradiction(self, contradiction: Contradiction) -> bool:
         """
         Valide qu'une contradiction est réelle et significative
         """
-        # La contradiction doit être basée sur des faits solides
-        faits_contradiction = [f for f in self.faits 
-                             if f.description in [contradiction.fait_a, contradiction.fait_b]]
-        
+        # La contradiction doit être basée sur des faits solides : tous les faits
+        # portant l'une des deux descriptions, via l'index description -> faits
+        faits_contradiction = self.faits_par_description(contradiction.fait_a)
+        if contradiction.fait_b != contradiction.fait_a:
+            faits_contradiction += self.faits_par_description(contradiction.fait_b)
+
         if len(faits_contradiction) < 2:
             return False
-        
+
         # Solidité minimale requise pour chaque fait
         solidite_minimale = all(f.solidite_factuelle > 0.6 for f in faits_contradiction)
-        
+
         # Niveau de contradiction suffisant
         niveau_suffisant = contradiction.niveau_incompatibilite > 0.7
-        
+
         return solidite_minimale and niveau_suffisant
     
     def _calculer_niveau_contradiction(self, fait_a: Fait, fait_b: Fait) -> float:
         """
         Calcule le niveau de contradiction entre deux faits avec pondération par solidité
         """
+        fait_a.synchroniser_agregats()
+        fait_b.synchroniser_agregats()
+
         # Niveau de base selon les sources
-        poids_a = len(fait_a.sources) * fait_a.solidite_factuelle
-        poids_b = len(fait_b.sources) * fait_b.solidite_factuelle
-        
+        poids_a = fait_a.nombre_sources * fait_a.solidite_factuelle
+        poids_b = fait_b.nombre_sources * fait_b.solidite_factuelle
+
         # Bonus pour confirmation multiple
         if fait_a.confirme_par_multiples_sources:
             poids_a *= 1.5
         if fait_b.confirme_par_multiples_sources:
             poids_b *= 1.5
-        
+
         # Niveau de contradiction proportionnel à la solidité des faits contradictoires
         return min(1.0, (poids_a + poids_b) / (poids_a + poids_b + 2))
     
+    @_etape_instrumentee()
+    @_etape_memoisee()
     def calcul_bayesien_probabilites(self) -> Dict[str, float]:
         """
         Étape 3: Approche bayésienne NEUTRE pour calculer les probabilités
         """
+        # Impact des contradictions VALIDÉES uniquement
+        impact_moyen = 0.0
+        if self.vectorise:
+            niveaux, validees = self._colonnes_contradictions()
+            niveaux_valides = niveaux[validees]
+            nombre_validees = len(niveaux_valides)
+            impact_moyen = float(niveaux_valides.mean()) if nombre_validees else 0.0
+        else:
+            contradictions_validees = [c for c in self.contradictions if c.validee_independamment]
+            nombre_validees = len(contradictions_validees)
+            if contradictions_validees:
+                impact_moyen = sum(c.niveau_incompatibilite for c in contradictions_validees) / nombre_validees
+
+        if self.vectorise and isinstance(self.faits, EntrepotFaits):
+            faits_confirmes = int(np.count_nonzero(np.array(self.faits.confirme, dtype=bool)))
+        else:
+            faits_confirmes = sum(1 for fait in self.faits if fait.confirme_par_multiples_sources)
+        return self.probabilites_depuis_comptes(nombre_validees, impact_moyen, faits_confirmes,
+                                                self._nombre_faits_actifs())
+    
+    @staticmethod
+    def probabilites_depuis_comptes(nombre_validees: int, impact_moyen: float,
+                                    faits_confirmes: int, nombre_faits: int) -> Dict[str, float]:
+        """
+        Formule de calcul_bayesien_probabilites à partir des seuls agrégats :
+        contradictions validées et leur niveau moyen, faits confirmés, faits
+        (cf. le mode hors mémoire, qui ne garde jamais tous les faits)
+        """
         # CORRECTION MAJEURE : Prior neutre strict
         prob_officielle = 0.5
         prob_alternative = 0.5
-        
-        # Impact des contradictions VALIDÉES uniquement
-        contradictions_validees = [c for c in self.contradictions if c.validee_independamment]
-        
-        if contradictions_validees:
+
+        if nombre_validees:
             # Réduction proportionnelle au nombre et à la force des contradictions validées
-            impact_moyen = sum(c.niveau_incompatibilite for c in contradictions_validees) / len(contradictions_validees)
-            facteur_reduction = min(0.8, len(contradictions_validees) * impact_moyen * 0.1)  # Maximum 80% de réduction
+            facteur_reduction = min(0.8, nombre_validees * impact_moyen * 0.1)  # Maximum 80% de réduction
             
             prob_officielle *= (1 - facteur_reduction)
             prob_alternative = 1 - prob_officielle
-        
+
         # Bonus pour faits confirmés par sources multiples (s'applique aux deux versions)
-        faits_confirmes = sum(1 for fait in self.faits if fait.confirme_par_multiples_sources)
         if faits_confirmes > 0:
             # Bonus de confirmation générale (stabilité des données)
             facteur_stabilite = min(0.1, faits_confirmes * 0.02)
@@ -299,23 +2772,25 @@ class ProtocoleEspritCritique:
             total = prob_officielle + prob_alternative
             prob_officielle /= total
             prob_alternative /= total
-        
+
         return {
             'version_officielle': prob_officielle,
             'versions_alternatives': prob_alternative,
-            'contradictions_validees': len(contradictions_validees),
-            'facteur_confiance': min(faits_confirmes / max(len(self.faits), 1), 1.0)
+            'contradictions_validees': nombre_validees,
+            'facteur_confiance': min(faits_confirmes / max(nombre_faits, 1), 1.0)
         }
     
+    @_etape_instrumentee(lambda self, acteurs: len(acteurs or ()))
+    @_etape_memoisee(depend_de_l_etat=False)
     def analyser_cui_bono(self, acteurs: List[Dict]) -> Dict[str, float]:
         """
         Étape 4: Méthode du cui bono avec validation de significativité
         """
         if not acteurs:
             return {}
-        
+
         benefices = {}
-        
+
         for acteur in acteurs:
             nom = acteur['nom']
             gains_potentiels = acteur.get('gains', [])
@@ -324,12 +2799,12 @@ class ProtocoleEspritCritique:
             # Score pondéré par la réalité des gains
             score_benefice = len(gains_potentiels) * pouvoir_influence
             benefices[nom] = score_benefice
-        
+
         # Validation : différence significative entre bénéficiaires ?
         if benefices:
             scores = list(benefices.values())
             score_max = max(scores)
-            score_median = sorted(scores)[len(scores)//2] if len(scores) > 1 else score_max
+            score_median = _mediane_haute(scores) if len(scores) > 1 else score_max
             
             # Ratio de significativité
             ratio_significativite = score_max / max(score_median, 0.1)
@@ -337,18 +2812,78 @@ class ProtocoleEspritCritique:
             # Si pas de différence claire, cui bono non concluant
             if ratio_significativite < 1.5:
                 return {"analyse_non_concluante": True}
-        
+
         return benefices
     
+    def classer_cui_bono(self, acteurs: Iterable[Dict], k: int = 10,
+                         taille_echantillon: Optional[int] = None, graine: int = 0) -> Dict:
+        """
+        Variante d'analyser_cui_bono pour les très grands registres d'acteurs
+
+        Les acteurs sont lus au fil de l'eau (itérateur accepté) et ne sont
+        pas conservés : seuls les k meilleurs bénéficiaires (tas borné) et
+        les scores (tableau de flottants) sont gardés, la médiane étant
+        obtenue par sélection. Avec `taille_echantillon`, la médiane est
+        estimée sur un échantillon uniforme de cette taille (mémoire bornée).
+        Les noms d'acteurs sont supposés distincts.
+
+        Retourne les k meilleurs bénéficiaires, par score décroissant (à
+        égalité, ordre d'arrivée), et le ratio de significativité ; avec des
+        noms distincts, le verdict est celui d'analyser_cui_bono.
+        """
+        if k < 0:
+            raise ValueError("k doit être positif")
+        if taille_echantillon is not None and taille_echantillon < 1:
+            raise ValueError("taille_echantillon doit être strictement positive")
+        aleatoire = random.Random(graine)
+        meilleurs: List[Tuple[float, int, str]] = []  # tas (score, -rang, nom) des k meilleurs
+        scores = array('d')
+        score_max = -math.inf
+        nombre = 0
+
+        for acteur in acteurs:
+            score = len(acteur.get('gains', [])) * acteur.get('pouvoir', 0.5)
+            if score > score_max:
+                score_max = score
+            if taille_echantillon is None or nombre < taille_echantillon:
+                scores.append(score)
+            else:
+                # Échantillonnage par réservoir : chaque score retenu avec probabilité m / n
+                remplace = aleatoire.randrange(nombre + 1)
+                if remplace < taille_echantillon:
+                    scores[remplace] = score
+            entree = (score, -nombre, acteur['nom'])
+            if len(meilleurs) < k:
+                heapq.heappush(meilleurs, entree)
+            elif k and entree > meilleurs[0]:
+                heapq.heapreplace(meilleurs, entree)
+            nombre += 1
+
+        if not nombre:
+            return {}
+        score_median = _mediane_haute(scores) if nombre > 1 else score_max
+        ratio_significativite = score_max / max(score_median, 0.1)
+        return {
+            'beneficiaires': {nom: score for score, _, nom in sorted(meilleurs, reverse=True)},
+            'score_max': score_max,
+            'score_median': score_median,
+            'ratio_significativite': ratio_significativite,
+            'analyse_non_concluante': ratio_significativite < 1.5,
+            'mediane_estimee': taille_echantillon is not None and nombre > taille_echantillon,
+            'nombre_acteurs': nombre,
+        }
+    
+    @_etape_instrumentee(lambda self, evenements: len(evenements or ()))
+    @_etape_memoisee(depend_de_l_etat=False)
     def appliquer_rasoir_occam_criminologique(self, evenements: List[Dict]) -> Dict[str, float]:
         """
         Étape 5: Rasoir d'Occam criminologique avec seuils de significativité
         """
         if not evenements or len(evenements) < 2:
             return {"donnees_insuffisantes": True}
-        
+
         patterns_detectes = {}
-        
+
         # Analyse des bénéficiaires récurrents
         beneficiaires_recurrents = {}
         for event in evenements:
@@ -356,14 +2891,10 @@ class ProtocoleEspritCritique:
                 if beneficiaire not in beneficiaires_recurrents:
                     beneficiaires_recurrents[beneficiaire] = []
                 beneficiaires_recurrents[beneficiaire].append(event['nom'])
-        
+
         # Analyse de la synchronisation temporelle
-        synchronisations = 0
-        for i, event_a in enumerate(evenements):
-            for event_b in evenements[i+1:]:
-                if abs(event_a.get('timestamp', 0) - event_b.get('timestamp', 0)) < event_a.get('fenetre_critique', 0):
-                    synchronisations += 1
-        
+        synchronisations = self._compter_synchronisations(evenements)
+
         # Analyse de la cohérence stratégique
         objectifs_communs = {}
         for event in evenements:
@@ -371,24 +2902,24 @@ class ProtocoleEspritCritique:
                 if objectif not in objectifs_communs:
                     objectifs_communs[objectif] = 0
                 objectifs_communs[objectif] += 1
-        
+
         # Score de pattern intentionnel AVEC seuils
         score_pattern = 0
-        
+
         # Points pour bénéficiaires récurrents (seuil : 3+ événements)
         for beneficiaire, events in beneficiaires_recurrents.items():
             if len(events) >= 3:  # Seuil relevé
                 score_pattern += len(events) * 0.2  # Impact réduit
-        
+
         # Points pour synchronisation (seuil : 2+ synchronisations)
         if synchronisations >= 2:
             score_pattern += synchronisations * 0.15
-        
+
         # Points pour objectifs communs (seuil : 3+ occurrences)
         for objectif, count in objectifs_communs.items():
             if count >= 3:
                 score_pattern += count * 0.15
-        
+
         patterns_detectes = {
             'score_pattern_intentionnel': min(score_pattern, 1.0),
             'beneficiaires_recurrents': {k: v for k, v in beneficiaires_recurrents.items() if len(v) >= 3},
@@ -396,73 +2927,127 @@ class ProtocoleEspritCritique:
             'objectifs_communs': {k: v for k, v in objectifs_communs.items() if v >= 3},
             'seuil_significativite_atteint': score_pattern > 0.5
         }
-        
+
         return patterns_detectes
     
-    def determiner_version_probable(self, 
-                                 acteurs: Optional[List[Dict]] = None,
-                                 evenements: Optional[List[Dict]] = None) -> Dict:
+    @staticmethod
+    def _compter_synchronisations(evenements: List[Dict]) -> int:
         """
-        Étape 6: Synthèse ÉQUILIBRÉE pour déterminer la version la plus probable
+        Nombre de paires (a, b), a avant b dans la liste, telles que
+        |t_a - t_b| < fenetre_critique de a (fenêtre asymétrique, portée par a)
+
+        Chronologie triée : pour chaque événement, seuls les timestamps situés
+        dans sa fenêtre sont examinés (recherche dichotomique), d'où
+        O(E log E + occupation des fenêtres) au lieu de O(E²). Le prédicat
+        exact est réappliqué à chaque candidat, le résultat est donc identique.
+
+        Seules l'ordre et la soustraction des timestamps sont utilisés :
+        nombres, ou datetime avec une fenetre_critique en timedelta.
+        """
+        timestamps = [event.get('timestamp', 0) for event in evenements]
+        # Les timestamps NaN ne se synchronisent jamais (comparaison toujours fausse)
+        chronologie = sorted((t, rang) for rang, t in enumerate(timestamps) if t == t)
+        valeurs = [t for t, _ in chronologie]
+
+        synchronisations = 0
+        for rang, event_a in enumerate(evenements):
+            fenetre = event_a.get('fenetre_critique', 0)
+            t_a = timestamps[rang]
+            # Fenêtre vide ou timestamp NaN : aucun |t_a - t_b| ne peut être < fenetre
+            if fenetre == 0 or not fenetre > t_a - t_a:
+                continue
+            # La soustraction arrondie est monotone : les t_b qui vérifient le
+            # prédicat forment une plage contiguë de la chronologie. Les bornes
+            # exactes la situent, à l'arrondi près qui est rattrapé de proche en proche.
+            debut = bisect_left(valeurs, t_a - fenetre)
+            fin = bisect_right(valeurs, t_a + fenetre)
+            while debut > 0 and abs(t_a - valeurs[debut - 1]) < fenetre:
+                debut -= 1
+            while fin < len(valeurs) and abs(t_a - valeurs[fin]) < fenetre:
+                fin += 1
+            for t_b, rang_b in chronologie[debut:fin]:
+                if rang_b > rang and abs(t_a - t_b) < fenetre:
+                    synchronisations += 1
+        return synchronisations
+    
+    def _ajustements_alternatifs(self, acteurs: Optional[List[Dict]],
+                                 evenements: Optional[List[Dict]]) -> Tuple[Dict, Dict, List[float]]:
+        """
+        Analyses cui bono et criminologique retenues par determiner_version_probable,
+        et les ajouts successifs au score des versions alternatives qu'elles
+        justifient (indépendants des faits et des crédibilités)
         """
-        # Vérification préalable des données
-        stats_collecte = self.collecter_informations([])  # Récupérer les stats sans recollecte
-        
-        if not hasattr(self, 'faits') or len(self.faits) == 0:
-            return {
-                'erreur': 'Aucune donnée analysée',
-                'recommandation': 'Collecter des informations avant analyse'
-            }
-        
-        # Calculs bayésiens
-        prob_bayesiennes = self.calcul_bayesien_probabilites()
-        
         # Analyse cui bono avec validation
         analyse_benefices = {}
         if acteurs:
             analyse_benefices = self.analyser_cui_bono(acteurs)
             if analyse_benefices.get("analyse_non_concluante"):
                 analyse_benefices = {}
-        
+
         # Rasoir d'Occam criminologique avec seuils
         patterns_criminologiques = {}
         if evenements:
             patterns_criminologiques = self.appliquer_rasoir_occam_criminologique(evenements)
             if patterns_criminologiques.get("donnees_insuffisantes"):
                 patterns_criminologiques = {}
-        
-        # Score composite ÉQUILIBRÉ
-        score_officiel = prob_bayesiennes['version_officielle']
-        score_alternatif = prob_bayesiennes['versions_alternatives']
-        
+
+        ajustements: List[float] = []
+
         # Ajustement cui bono (RÉDUIT et conditionnel)
         if analyse_benefices and not analyse_benefices.get("analyse_non_concluante"):
             scores_benefices = [v for v in analyse_benefices.values() if isinstance(v, (int, float))]
             if scores_benefices:
                 max_benefice = max(scores_benefices)
                 if max_benefice > 3:  # Seuil plus élevé
-                    score_alternatif += min(0.15, max_benefice * 0.03)  # Impact réduit
-        
+                    ajustements.append(min(0.15, max_benefice * 0.03))  # Impact réduit
+
         # Ajustement patterns criminologiques (RÉDUIT et conditionnel)
         if patterns_criminologiques and patterns_criminologiques.get('seuil_significativite_atteint'):
             score_pattern = patterns_criminologiques.get('score_pattern_intentionnel', 0)
             if score_pattern > 0.6:  # Seuil plus élevé
-                score_alternatif += min(0.2, score_pattern * 0.25)  # Impact réduit
-        
+                ajustements.append(min(0.2, score_pattern * 0.25))  # Impact réduit
+
+        return analyse_benefices, patterns_criminologiques, ajustements
+    
+    @_etape_instrumentee()
+    @_etape_memoisee()
+    def determiner_version_probable(self, 
+                                 acteurs: Optional[List[Dict]] = None,
+                                 evenements: Optional[List[Dict]] = None) -> Dict:
+        """
+        Étape 6: Synthèse ÉQUILIBRÉE pour déterminer la version la plus probable
+        """
+        # Vérification préalable des données
+        if not hasattr(self, 'faits') or len(self.faits) == 0:
+            return {
+                'erreur': 'Aucune donnée analysée',
+                'recommandation': 'Collecter des informations avant analyse'
+            }
+
+        # Calculs bayésiens
+        prob_bayesiennes = self.calcul_bayesien_probabilites()
+
+        analyse_benefices, patterns_criminologiques, ajustements = self._ajustements_alternatifs(
+            acteurs, evenements)
+
+        # Score composite ÉQUILIBRÉ
+        score_officiel = prob_bayesiennes['version_officielle']
+        score_alternatif = prob_bayesiennes['versions_alternatives']
+        for ajustement in ajustements:
+            score_alternatif += ajustement
+
         # Renormalisation pour éviter les scores > 1
         total_score = score_officiel + score_alternatif
         if total_score > 1:
             score_officiel /= total_score
             score_alternatif /= total_score
-        
+
         # Seuil de décision : différence significative requise
-        seuil_decision = 0.15  # 15% de différence minimum pour conclusion nette
-        
-        if abs(score_officiel - score_alternatif) < seuil_decision:
+        if abs(score_officiel - score_alternatif) < self.SEUIL_DECISION:
             version_probable = 'indetermine'
         else:
             version_probable = 'officielle' if score_officiel > score_alternatif else 'alternative'
-        
+
         return {
             'probabilites_bayesiennes': prob_bayesiennes,
             'analyse_cui_bono': analyse_benefices,
@@ -477,6 +3062,8 @@ class ProtocoleEspritCritique:
             'niveau_confiance': prob_bayesiennes.get('facteur_confiance', 0)
         }
     
+    @_etape_instrumentee()
+    @_etape_memoisee()
     def livrer_conclusion(self, 
                          acteurs: Optional[List[Dict]] = None,
                          evenements: Optional[List[Dict]] = None) -> str:
@@ -494,37 +3081,37 @@ avec des faits vérifiables pour fonctionner.
 
 RECOMMANDATION : Fournir des sources documentées avec des informations spécifiques.
             """.strip()
-        
+
         analyse = self.determiner_version_probable(acteurs, evenements)
-        
+
         if 'erreur' in analyse:
             return f"ERREUR D'ANALYSE : {analyse['erreur']}\n{analyse.get('recommandation', '')}"
-        
+
         version_retenue = analyse['version_plus_probable']
         marge_decision = analyse['marge_decision']
-        
+
         # Construction de l'argumentation basée sur des critères objectifs
         raisons = []
-        
+
         # Analyse des contradictions validées
         contradictions_validees = analyse.get('contradictions_validees', 0)
         contradictions_totales = analyse['contradictions_identifiees']
-        
+
         if contradictions_validees > 0:
             raisons.append(f"{contradictions_validees} contradictions majeures validées sur {contradictions_totales} identifiées")
-        
+
         # Faits confirmés par sources multiples
         faits_confirmes = analyse['faits_confirmes_multiples_sources']
         if faits_confirmes > 0:
             raisons.append(f"{faits_confirmes} faits confirmés par sources multiples indépendantes")
-        
+
         # Analyse cui bono si significative
         if analyse['analyse_cui_bono'] and not analyse['analyse_cui_bono'].get('analyse_non_concluante'):
             beneficiaires_significatifs = [k for k, v in analyse['analyse_cui_bono'].items() 
                                          if isinstance(v, (int, float)) and v > 2]
             if beneficiaires_significatifs:
                 raisons.append(f"Bénéficiaires significatifs identifiés: {', '.join(beneficiaires_significatifs)}")
-        
+
         # Patterns criminologiques si seuil atteint
         if analyse['patterns_criminologiques'] and analyse['patterns_criminologiques'].get('seuil_significativite_atteint'):
             patterns = analyse['patterns_criminologiques']
@@ -532,10 +3119,10 @@ RECOMMANDATION : Fournir des sources documentées avec des informations spécifi
                 raisons.append(f"Pattern de bénéficiaires récurrents validé: {list(patterns['beneficiaires_recurrents'].keys())}")
             if patterns.get('objectifs_communs'):
                 raisons.append(f"Objectifs stratégiques récurrents: {list(patterns['objectifs_communs'].keys())}")
-        
+
         # Niveau de confiance
         niveau_confiance = analyse['niveau_confiance']
-        
+
         # Construction de la conclusion
         if version_retenue == 'indetermine':
             conclusion = f"""VERSION LA PLUS PROBABLE: INDÉTERMINÉE
@@ -573,7 +3160,7 @@ JUSTIFICATION:
 • Niveau de confiance des données: {niveau_confiance:.1%}
 • Cohérence vs incohérences: {"Cohérence acceptable" if contradictions_validees <= 1 else "Incohérences significatives"}
             """.strip()
-        
+
         return conclusion
 
 
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Protocole esprit critique - API asynchrone (asyncio)
+====================================================
+
+Ingestion de sources provenant de plusieurs flux lents et concurrents
+(crawlers, API réseau) sans les rassembler au préalable dans une liste.
+
+- Chaque producteur (itérable asynchrone de Source) alimente une file bornée :
+  un flux trop rapide est freiné (contre-pression) sans retarder les autres.
+- Un consommateur unique vide la file par lots et les ingère de façon
+  incrémentale (ajouter_source) dans un exécuteur : l'étiquetage et la
+  réévaluation des contradictions ne bloquent pas la boucle d'événements.
+- Les étapes de calcul (contradictions, scores, conclusion) s'exécutent dans
+  le même exécuteur, à un seul thread : le protocole n'est jamais modifié par
+  deux threads à la fois.
+
+La durée d'ingestion est ainsi bornée par le flux le plus lent, et non par la
+somme des flux. livrer_conclusion attend que les données soient stabilisées :
+tous les flux épuisés, ou aucun nouvel arrivage pendant `calme` secondes.
+"""
+
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import List, Dict, Optional, AsyncIterable
+
+from protocole_esprit_critique import ProtocoleEspritCritique, Source, Contradiction
+
+
+class ProtocoleAsynchrone:
+    """
+    Enveloppe asynchrone d'un ProtocoleEspritCritique
+
+    taille_file : sources en attente d'ingestion avant que les producteurs
+                  ne soient suspendus
+    taille_lot : sources ingérées par appel à l'exécuteur
+    executeur : exécuteur des calculs ; doit sérialiser les appels (défaut :
+                ThreadPoolExecutor à un thread, fermé par fermer())
+    """
+
+    def __init__(self, protocole: Optional[ProtocoleEspritCritique] = None,
+                 taille_file: int = 256, taille_lot: int = 64,
+                 limite_anomalies: int = 20, executeur: Optional[Executor] = None):
+        self.protocole = protocole or ProtocoleEspritCritique()
+        self.taille_lot = max(taille_lot, 1)
+        self.limite_anomalies = limite_anomalies
+        self._executeur_propre = executeur is None
+        self._executeur = executeur or ThreadPoolExecutor(max_workers=1, thread_name_prefix="protocole")
+        self._file: asyncio.Queue = asyncio.Queue(maxsize=max(taille_file, 1))
+        self._producteurs: List[asyncio.Task] = []
+        self._consommateur: Optional[asyncio.Task] = None
+        self._derniere_arrivee = 0.0
+        self.sources_ingerees = 0
+        self.nouvelles_contradictions = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.fermer()
+
+    async def _executer(self, fonction, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executeur, fonction, *args)
+
+    def brancher(self, producteur: AsyncIterable[Source]) -> asyncio.Task:
+        """
+        Commence à consommer un flux de sources ; retourne la tâche du producteur
+        """
+        if self._consommateur is not None and self._consommateur.done():
+            self._consommateur.result()  # consommateur arrêté sur erreur : on la propage
+        if self._consommateur is None:
+            self._consommateur = asyncio.create_task(self._consommer())
+        # Le branchement compte comme un arrivage : la période de calme
+        # d'attendre_stabilisation part au plus tôt d'ici
+        self._derniere_arrivee = asyncio.get_running_loop().time()
+        tache = asyncio.create_task(self._produire(producteur))
+        self._producteurs.append(tache)
+        return tache
+
+    async def _produire(self, producteur: AsyncIterable[Source]):
+        async for source in producteur:
+            await self._file.put(source)
+            self._derniere_arrivee = asyncio.get_running_loop().time()
+
+    async def _consommer(self):
+        try:
+            while True:
+                lot = [await self._file.get()]
+                while len(lot) < self.taille_lot and not self._file.empty():
+                    lot.append(self._file.get_nowait())
+                try:
+                    await self._executer(self._ingerer_lot, lot)
+                finally:
+                    for _ in lot:
+                        self._file.task_done()
+        except Exception:
+            # Plus personne ne vide la file : les flux sont interrompus et les
+            # sources en attente abandonnées, pour que personne n'attende à vide
+            for tache in self._producteurs:
+                tache.cancel()
+            while not self._file.empty():
+                self._file.get_nowait()
+                self._file.task_done()
+            raise
+
+    def _ingerer_lot(self, lot: List[Source]):
+        # Exécuté dans l'exécuteur
+        for source in lot:
+            bilan = self.protocole.ajouter_source(source, self.limite_anomalies)
+            self.nouvelles_contradictions += len(bilan["nouvelles_contradictions"])
+        self.sources_ingerees += len(lot)
+
+    async def attendre_stabilisation(self, calme: Optional[float] = None):
+        """
+        Attend que toutes les sources reçues soient ingérées et que les flux
+        soient épuisés ; avec `calme`, se contente de `calme` secondes sans
+        nouvel arrivage (flux sans fin). L'erreur d'un producteur ou de
+        l'ingestion est propagée.
+        """
+        if self._consommateur is None:
+            return
+        boucle = asyncio.get_running_loop()
+        while True:
+            await self._attendre_file()
+            actifs = [tache for tache in self._producteurs if not tache.done()]
+            if not actifs:
+                await self._attendre_file()
+                return
+            if calme is not None:
+                restant = self._derniere_arrivee + calme - boucle.time()
+                if restant <= 0 and self._file.empty():
+                    return
+                await asyncio.wait(actifs + [self._consommateur], timeout=max(restant, 0),
+                                   return_when=asyncio.FIRST_COMPLETED)
+            else:
+                await asyncio.wait(actifs + [self._consommateur], return_when=asyncio.FIRST_COMPLETED)
+
+    async def _attendre_file(self):
+        """
+        Attend que la file soit vidée, ou que le consommateur s'arrête
+        """
+        vidage = asyncio.ensure_future(self._file.join())
+        try:
+            await asyncio.wait({vidage, self._consommateur}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            vidage.cancel()
+        self._verifier_producteurs()
+
+    def _verifier_producteurs(self):
+        if self._consommateur is not None and self._consommateur.done():
+            self._consommateur.result()
+        for tache in self._producteurs:
+            if tache.done() and not tache.cancelled() and tache.exception() is not None:
+                raise tache.exception()
+
+    async def ingerer(self, *producteurs: AsyncIterable[Source]) -> Dict:
+        """
+        Consomme les flux donnés jusqu'à épuisement ; statistiques de collecte
+        """
+        for producteur in producteurs:
+            self.brancher(producteur)
+        await self.attendre_stabilisation()
+        return await self._executer(self.statistiques_collecte)
+
+    def statistiques_collecte(self) -> Dict:
+        stats = self.protocole.statistiques_collecte()
+        stats.update({
+            "sources_ingerees": self.sources_ingerees,
+            "faits": len(self.protocole.faits),
+            "contradictions": len(self.protocole.contradictions),
+        })
+        return stats
+
+    async def identifier_contradictions(self) -> List[Contradiction]:
+        """
+        Recalcul complet des contradictions (inutile après une ingestion
+        incrémentale, qui les tient déjà à jour)
+        """
+        return await self._executer(self.protocole.identifier_contradictions)
+
+    async def calcul_bayesien_probabilites(self) -> Dict[str, float]:
+        return await self._executer(self.protocole.calcul_bayesien_probabilites)
+
+    async def determiner_version_probable(self, acteurs: Optional[List[Dict]] = None,
+                                          evenements: Optional[List[Dict]] = None,
+                                          calme: Optional[float] = None) -> Dict:
+        await self.attendre_stabilisation(calme)
+        return await self._executer(self.protocole.determiner_version_probable, acteurs, evenements)
+
+    async def livrer_conclusion(self, acteurs: Optional[List[Dict]] = None,
+                                evenements: Optional[List[Dict]] = None,
+                                calme: Optional[float] = None) -> str:
+        """
+        Conclusion dès que les données sont stabilisées (cf. attendre_stabilisation)
+        """
+        await self.attendre_stabilisation(calme)
+        return await self._executer(self.protocole.livrer_conclusion, acteurs, evenements)
+
+    async def fermer(self):
+        """
+        Interrompt les flux encore actifs et libère l'exécuteur
+        """
+        taches = self._producteurs + ([self._consommateur] if self._consommateur else [])
+        for tache in taches:
+            tache.cancel()
+        await asyncio.gather(*taches, return_exceptions=True)
+        self._producteurs, self._consommateur = [], None
+        if self._executeur_propre:
+            self._executeur.shutdown(wait=True)
+
+
+async def _flux_simule(sources: List[Source], latence: float):
+    for source in sources:
+        await asyncio.sleep(latence)
+        yield source
+
+
+async def _demonstration(nombre_flux: int = 8, sources_par_flux: int = 25, latence: float = 0.02):
+    from protocole_esprit_critique_benchmark import generer_corpus
+    corpus = generer_corpus(nombre_flux * sources_par_flux * 8)
+    flux = [corpus.sources[k::nombre_flux][:sources_par_flux] for k in range(nombre_flux)]
+
+    boucle = asyncio.get_running_loop()
+    debut = boucle.time()
+    async with ProtocoleAsynchrone(limite_anomalies=10 ** 6) as protocole:
+        stats = await protocole.ingerer(*(_flux_simule(sources, latence) for sources in flux))
+        duree = boucle.time() - debut
+        conclusion = await protocole.livrer_conclusion(corpus.acteurs, corpus.evenements)
+    print(f"{nombre_flux} flux × {sources_par_flux} sources (latence {latence}s) : {duree:.2f}s "
+          f"(un flux seul : {sources_par_flux * latence:.2f}s, somme : "
+          f"{nombre_flux * sources_par_flux * latence:.2f}s)")
+    print(stats)
+    print(conclusion[:400])
+
+
+if __name__ == "__main__":
+    asyncio.run(_demonstration())
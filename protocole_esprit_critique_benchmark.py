@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Protocole esprit critique - banc d'essai des sept étapes
+========================================================
+
+Générateur de corpus synthétiques reproductibles (graine) et mesure de chaque
+étape du protocole de 10³ à 10⁶ faits : durée, débit (éléments par seconde)
+et pic mémoire. Le rapport peut être enregistré comme référence, puis comparé
+aux exécutions suivantes : toute régression au-delà de la tolérance fait
+échouer la commande (code de sortie 1).
+
+Le générateur contrôle :
+- la densité de mots-clés d'anomalie (part des informations qui en portent) ;
+- le taux de termes d'opposition (part des informations qui en portent) ;
+- le recoupement (part des informations reprises par d'autres sources) ;
+- la taille des listes d'acteurs et d'événements.
+
+Les durées de référence sont ramenées à la machine courante par un étalon
+(collecte et contradictions d'un petit corpus fixe) mesuré à chaque exécution,
+avant et après les passages de chaque taille : la vitesse d'une machine
+partagée dérive en cours d'exécution.
+
+La référence n'est pas versionnée (cf. .gitignore) : l'étalon ne corrige pas
+les écarts de mémoire, de cache ou de version de Python entre machines. Elle
+est enregistrée sur la machine qui compare, avec --enregistrer-reference,
+avant la modification à évaluer.
+
+Usage en ligne de commande :
+    python protocole_esprit_critique_benchmark.py --tailles 1000 10000 100000
+    python protocole_esprit_critique_benchmark.py --enregistrer-reference
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict
+from typing import List, Dict, Optional, Tuple, Callable
+
+from protocole_esprit_critique import (
+    ProtocoleEspritCritique, Source, TypeSource, Instrumentation,
+    MOTS_CLES_ANOMALIES, TERMES_SPECIFICITE, TERMES_VERIFIABILITE,
+    MOTS_OPPOSITION_DIRECTS, CONTRADICTIONS_SPECIFIQUES
+)
+
+
+ETAPES = (
+    "collecter_informations",
+    "identifier_contradictions",
+    "calcul_bayesien_probabilites",
+    "analyser_cui_bono",
+    "appliquer_rasoir_occam_criminologique",
+    "determiner_version_probable",
+    "livrer_conclusion",
+)
+
+TAILLES_DEFAUT = (1000, 10000, 100000, 1000000)
+REFERENCE_DEFAUT = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "protocole_esprit_critique_benchmark_reference.json")
+VERSION_RAPPORT = 2
+
+_NEUTRES = ["rapport", "chronologie", "témoin", "mesure", "analyse", "document",
+            "enquête", "relevé", "archive", "déclaration", "expertise", "registre"]
+_OBJECTIFS = ["pouvoir", "légitimité", "budget", "influence", "contrôle", "image"]
+
+
+class RegressionPerformance(Exception):
+    pass
+
+
+@dataclass
+class ParametresCorpus:
+    densite_anomalies: float = 0.05
+    taux_opposition: float = 0.005
+    taux_recoupement: float = 0.2
+    informations_par_source: int = 8
+    acteurs_par_fait: float = 0.1
+    evenements_par_fait: float = 0.1
+
+
+@dataclass
+class CorpusSynthetique:
+    sources: List[Source]
+    acteurs: List[Dict]
+    evenements: List[Dict]
+    nombre_faits: int
+
+
+def generer_corpus(nombre_faits: int, graine: int = 0,
+                   parametres: Optional[ParametresCorpus] = None) -> CorpusSynthetique:
+    """
+    Corpus de nombre_faits informations distinctes réparties entre sources,
+    avec acteurs et événements proportionnels au nombre de faits
+    """
+    parametres = parametres or ParametresCorpus()
+    aleatoire = random.Random(graine)
+    termes_opposition = [terme for paire in MOTS_OPPOSITION_DIRECTS + CONTRADICTIONS_SPECIFIQUES
+                         for terme in paire]
+    precisions = TERMES_SPECIFICITE + TERMES_VERIFIABILITE
+
+    informations = []
+    for k in range(nombre_faits):
+        mots = [aleatoire.choice(_NEUTRES)]
+        if aleatoire.random() < parametres.densite_anomalies:
+            mots.append(aleatoire.choice(MOTS_CLES_ANOMALIES))
+            # Une anomalie sur deux est précisée (spécificité ou vérifiabilité)
+            if aleatoire.random() < 0.5:
+                mots.append(aleatoire.choice(precisions))
+        if aleatoire.random() < parametres.taux_opposition:
+            mots.append(aleatoire.choice(termes_opposition))
+        mots.append(aleatoire.choice(_NEUTRES))
+        informations.append(f"{' '.join(mots)} n°{k}")
+
+    # Chaque information une fois, plus les reprises par d'autres sources
+    citations = informations + [aleatoire.choice(informations)
+                                for _ in range(int(nombre_faits * parametres.taux_recoupement))]
+    aleatoire.shuffle(citations)
+    types = list(TypeSource)
+    taille = max(parametres.informations_par_source, 1)
+    sources = [Source(f"Source {rang}", aleatoire.choice(types),
+                      round(aleatoire.uniform(0.3, 1.0), 2), citations[debut:debut + taille])
+               for rang, debut in enumerate(range(0, len(citations), taille))]
+
+    nombre_acteurs = max(int(nombre_faits * parametres.acteurs_par_fait), 2)
+    acteurs = [{"nom": f"Acteur {rang}",
+                "gains": aleatoire.sample(_OBJECTIFS, aleatoire.randint(0, 3)),
+                "pouvoir": round(aleatoire.random(), 3)}
+               for rang in range(nombre_acteurs)]
+    # Quelques acteurs dominants pour que l'analyse cui bono reste concluante
+    for acteur in acteurs[:max(nombre_acteurs // 100, 1)]:
+        acteur["gains"] = list(_OBJECTIFS)
+        acteur["pouvoir"] = 1.0
+
+    nombre_evenements = max(int(nombre_faits * parametres.evenements_par_fait), 2)
+    noms_acteurs = [acteur["nom"] for acteur in acteurs]
+    evenements = [{"nom": f"événement {rang}",
+                   "beneficiaires": aleatoire.sample(noms_acteurs, min(2, len(noms_acteurs))),
+                   "objectifs_servis": aleatoire.sample(_OBJECTIFS, aleatoire.randint(1, 3)),
+                   "timestamp": aleatoire.uniform(0, nombre_evenements * 10),
+                   "fenetre_critique": aleatoire.uniform(0, 30)}
+                  for rang in range(nombre_evenements)]
+
+    return CorpusSynthetique(sources, acteurs, evenements, nombre_faits)
+
+
+def _appels_etapes(protocole: ProtocoleEspritCritique,
+                   corpus: CorpusSynthetique) -> List[Tuple[str, Callable[[], object]]]:
+    """
+    Les sept étapes dans l'ordre du protocole ; les étapes 6 et 7 réutilisent
+    les résultats mémoïsés des étapes 3 à 5
+    """
+    limite = len(corpus.sources) * max(len(s.informations) for s in corpus.sources)
+    return [
+        ("collecter_informations", lambda: protocole.collecter_informations(corpus.sources, limite)),
+        ("identifier_contradictions", protocole.identifier_contradictions),
+        ("calcul_bayesien_probabilites", protocole.calcul_bayesien_probabilites),
+        ("analyser_cui_bono", lambda: protocole.analyser_cui_bono(corpus.acteurs)),
+        ("appliquer_rasoir_occam_criminologique",
+         lambda: protocole.appliquer_rasoir_occam_criminologique(corpus.evenements)),
+        ("determiner_version_probable",
+         lambda: protocole.determiner_version_probable(corpus.acteurs, corpus.evenements)),
+        ("livrer_conclusion", lambda: protocole.livrer_conclusion(corpus.acteurs, corpus.evenements)),
+    ]
+
+
+def _mesurer_durees(corpus: CorpusSynthetique, mode_compact: bool) -> Dict[str, Dict[str, float]]:
+    """
+    Un passage complet avec l'instrumentation du protocole ; durée propre
+    (hors étapes imbriquées) de chaque étape
+    """
+    instrumentation = Instrumentation(actif=True)
+    protocole = ProtocoleEspritCritique(mode_compact=mode_compact, instrumentation=instrumentation)
+    gc.collect()
+    for _, appel in _appels_etapes(protocole, corpus):
+        appel()
+    cumuls = instrumentation.instantane()
+    return {etape: cumuls[etape] for etape in ETAPES}
+
+
+def _mesurer_memoire(corpus: CorpusSynthetique, mode_compact: bool) -> Dict[str, int]:
+    """
+    Pic mémoire (tracemalloc) de chaque étape, au-delà de la mémoire déjà
+    occupée au début de l'étape ; passage séparé car tracemalloc ralentit
+    fortement l'exécution
+    """
+    protocole = ProtocoleEspritCritique(mode_compact=mode_compact)
+    pics = {}
+    gc.collect()
+    tracemalloc.start()
+    try:
+        for etape, appel in _appels_etapes(protocole, corpus):
+            tracemalloc.reset_peak()
+            occupe, _ = tracemalloc.get_traced_memory()
+            appel()
+            pics[etape] = tracemalloc.get_traced_memory()[1] - occupe
+    finally:
+        tracemalloc.stop()
+    return pics
+
+
+def mesurer_etalon(repetitions: int = 21) -> float:
+    """
+    Durée médiane d'une charge fixe : sert à ramener les durées de référence
+    à la vitesse de la machine courante. La médiane, après un passage de
+    chauffe, varie bien moins d'une exécution à l'autre que le minimum, qui
+    dépend d'un passage chanceux.
+    """
+    corpus = generer_corpus(2000, graine=0)
+    durees = []
+    gc.collect()
+    for _ in range(repetitions + 1):
+        protocole = ProtocoleEspritCritique()
+        debut = time.perf_counter()
+        protocole.collecter_informations(corpus.sources)
+        protocole.identifier_contradictions()
+        durees.append(time.perf_counter() - debut)
+    return statistics.median(durees[1:])
+
+
+def executer_benchmark(tailles=TAILLES_DEFAUT, graine: int = 0,
+                       parametres: Optional[ParametresCorpus] = None,
+                       repetitions: int = 3, memoire: bool = True,
+                       mode_compact: bool = False, verbeux: bool = True) -> Dict:
+    """
+    Mesure des sept étapes pour chaque taille de corpus
+
+    repetitions : passages chronométrés par taille (la meilleure durée de
+                  chaque étape est retenue)
+    memoire : passage supplémentaire sous tracemalloc pour les pics mémoire
+    """
+    parametres = parametres or ParametresCorpus()
+    rapport = {
+        "version": VERSION_RAPPORT,
+        "python": sys.version.split()[0],
+        "graine": graine,
+        "mode_compact": mode_compact,
+        "parametres": asdict(parametres),
+        "etalons_secondes": {},
+        "mesures": {},
+    }
+
+    for taille in tailles:
+        corpus = generer_corpus(taille, graine, parametres)
+        etalon = mesurer_etalon()
+        passages = [_mesurer_durees(corpus, mode_compact) for _ in range(max(repetitions, 1))]
+        rapport["etalons_secondes"][str(taille)] = (etalon + mesurer_etalon()) / 2
+        pics = _mesurer_memoire(corpus, mode_compact) if memoire else {}
+
+        mesures = {}
+        for etape in ETAPES:
+            meilleur = min((passage[etape] for passage in passages), key=lambda c: c["duree_propre"])
+            secondes = meilleur["duree_propre"]
+            mesures[etape] = {
+                "secondes": secondes,
+                "elements": meilleur["elements"],
+                "debit": meilleur["elements"] / secondes if secondes > 0 else float("inf"),
+                "paires_comparees": meilleur["paires_comparees"],
+                "pic_memoire_octets": pics.get(etape),
+            }
+        rapport["mesures"][str(taille)] = mesures
+        if verbeux:
+            afficher_mesures(taille, mesures)
+        del corpus
+
+    return rapport
+
+
+def afficher_mesures(taille: int, mesures: Dict[str, Dict]):
+    print(f"--- {taille} faits ---")
+    for etape, mesure in mesures.items():
+        pic = mesure["pic_memoire_octets"]
+        pic_texte = f"{pic / 2 ** 20:9.1f} Mio" if pic is not None else "        -"
+        print(f"{etape:>38} : {mesure['secondes']:9.4f}s  {mesure['debit']:12.0f} él./s  {pic_texte}")
+
+
+def comparer_a_reference(rapport: Dict, reference: Dict, tolerance: float = 0.25,
+                         tolerance_memoire: float = 0.25, duree_minimale: float = 0.005,
+                         bruit_relatif: float = 0.05, memoire_minimale: int = 1 << 16) -> List[str]:
+    """
+    Régressions du rapport par rapport à la référence
+
+    Une étape régresse si sa durée, ramenée à l'étalon de sa taille, dépasse
+    la référence de plus de `tolerance` plus un plancher de bruit valant
+    `bruit_relatif` de la durée totale des étapes de cette taille (les
+    petites étapes fluctuent en absolu autant que les grandes), ou si son
+    pic mémoire la dépasse de plus de `tolerance_memoire`. Les étapes dont
+    la durée de référence est inférieure à duree_minimale ne sont pas
+    comparées en temps, ni en mémoire celles dont le pic de référence est
+    inférieur à memoire_minimale octets (bruit). Une taille ou une étape du
+    rapport absente de la référence est signalée comme une régression :
+    elle ne serait sinon jamais vérifiée.
+    """
+    for cle in ("version", "graine", "mode_compact", "parametres"):
+        if rapport[cle] != reference.get(cle):
+            raise ValueError(f"rapport et référence incomparables ({cle} : "
+                             f"{rapport[cle]!r} != {reference.get(cle)!r})")
+
+    regressions = []
+    for taille, mesures in rapport["mesures"].items():
+        mesures_reference = reference["mesures"].get(taille)
+        if mesures_reference is None:
+            regressions.append(f"{taille} faits : taille absente de la référence "
+                               f"(relancer avec --enregistrer-reference)")
+            continue
+        facteur = rapport["etalons_secondes"][taille] / reference["etalons_secondes"][taille]
+        bruit = bruit_relatif * sum(attendu["secondes"] for attendu in mesures_reference.values())
+        for etape, mesure in mesures.items():
+            attendu = mesures_reference.get(etape)
+            if attendu is None:
+                regressions.append(f"{taille} faits, {etape} : étape absente de la référence")
+                continue
+            limite = (attendu["secondes"] * (1 + tolerance) + bruit) * facteur
+            if attendu["secondes"] >= duree_minimale and mesure["secondes"] > limite:
+                regressions.append(f"{taille} faits, {etape} : {mesure['secondes']:.4f}s "
+                                   f"> {limite:.4f}s (référence {attendu['secondes']:.4f}s, "
+                                   f"étalon ×{facteur:.2f})")
+            pic, pic_attendu = mesure["pic_memoire_octets"], attendu["pic_memoire_octets"]
+            if (pic is not None and pic_attendu is not None and pic_attendu >= memoire_minimale
+                    and pic > pic_attendu * (1 + tolerance_memoire)):
+                regressions.append(f"{taille} faits, {etape} : pic mémoire {pic} o "
+                                   f"> {pic_attendu} o (+{tolerance_memoire:.0%} toléré)")
+    return regressions
+
+
+def verifier(rapport: Dict, reference: Dict, **options):
+    """
+    Lève RegressionPerformance si le rapport régresse par rapport à la référence
+    """
+    regressions = comparer_a_reference(rapport, reference, **options)
+    if regressions:
+        raise RegressionPerformance("\n".join(regressions))
+
+
+def charger_reference(chemin: str = REFERENCE_DEFAUT) -> Optional[Dict]:
+    if not os.path.exists(chemin):
+        return None
+    with open(chemin, encoding="utf-8") as fichier:
+        return json.load(fichier)
+
+
+def enregistrer_reference(rapport: Dict, chemin: str = REFERENCE_DEFAUT):
+    provisoire = chemin + ".tmp"
+    with open(provisoire, "w", encoding="utf-8") as fichier:
+        json.dump(rapport, fichier, ensure_ascii=False, indent=1)
+    os.replace(provisoire, chemin)
+
+
+if __name__ == "__main__":
+    parseur = argparse.ArgumentParser(description="Banc d'essai des étapes du protocole esprit critique")
+    parseur.add_argument("--tailles", type=int, nargs="+", default=list(TAILLES_DEFAUT),
+                         help="nombres de faits synthétiques")
+    parseur.add_argument("--graine", type=int, default=0)
+    parseur.add_argument("--densite-anomalies", type=float, default=ParametresCorpus.densite_anomalies)
+    parseur.add_argument("--taux-opposition", type=float, default=ParametresCorpus.taux_opposition)
+    parseur.add_argument("--repetitions", type=int, default=3, help="passages chronométrés par taille")
+    parseur.add_argument("--sans-memoire", action="store_true", help="ne pas mesurer les pics mémoire")
+    parseur.add_argument("--mode-compact", action="store_true", help="faits et contradictions en colonnes")
+    parseur.add_argument("--reference", default=REFERENCE_DEFAUT, help="fichier de référence (JSON)")
+    parseur.add_argument("--enregistrer-reference", action="store_true",
+                         help="remplacer la référence par ce rapport au lieu de comparer")
+    parseur.add_argument("--tolerance", type=float, default=0.25, help="dégradation de durée tolérée")
+    parseur.add_argument("--tolerance-memoire", type=float, default=0.25,
+                         help="dégradation de pic mémoire tolérée")
+    parseur.add_argument("--bruit-relatif", type=float, default=0.05,
+                         help="marge de durée par étape, en part de la durée totale de la taille")
+    arguments = parseur.parse_args()
+
+    parametres = ParametresCorpus(densite_anomalies=arguments.densite_anomalies,
+                                  taux_opposition=arguments.taux_opposition)
+    rapport = executer_benchmark(arguments.tailles, arguments.graine, parametres,
+                                 arguments.repetitions, not arguments.sans_memoire,
+                                 arguments.mode_compact)
+
+    if arguments.enregistrer_reference:
+        enregistrer_reference(rapport, arguments.reference)
+        print(f"référence enregistrée : {arguments.reference}")
+        sys.exit(0)
+
+    reference = charger_reference(arguments.reference)
+    if reference is None:
+        print(f"aucune référence ({arguments.reference}) : relancer avec --enregistrer-reference")
+        sys.exit(0)
+    try:
+        verifier(rapport, reference, tolerance=arguments.tolerance,
+                 tolerance_memoire=arguments.tolerance_memoire, bruit_relatif=arguments.bruit_relatif)
+    except RegressionPerformance as regression:
+        print("RÉGRESSION DE PERFORMANCE :", file=sys.stderr)
+        print(regression, file=sys.stderr)
+        sys.exit(1)
+    print("aucune régression par rapport à la référence")
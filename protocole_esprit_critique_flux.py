@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Protocole esprit critique - lecture de cas en flux et ligne de commande
+=======================================================================
+
+Lit des cas depuis des fichiers JSONL (éventuellement compressés en gzip)
+ou Parquet, sans jamais charger le fichier entier : un seul cas est
+construit à la fois (plus ceux en cours d'analyse, cf. analyser_lot), et
+chaque résultat est écrit dès qu'il est prêt. La mémoire reste ainsi
+bornée par la taille d'un cas, quelle que soit celle du fichier.
+
+Formats JSONL acceptés, mélangeables dans un même fichier :
+
+- un cas par ligne :
+    {"identifiant": "cas-1", "sources": [{"nom": ..., "type_source": "document",
+     "credibilite": 0.8, "informations": [...]}, ...], "acteurs": [...],
+     "evenements": [...], "limite_anomalies": 20}
+- une source par ligne, les lignes d'un même cas étant consécutives :
+    {"cas": "cas-1", "nom": ..., "type_source": ..., "credibilite": ..., "informations": [...]}
+  et, n'importe où parmi elles, le contexte du cas :
+    {"cas": "cas-1", "acteurs": [...], "evenements": [...]}
+
+Parquet (pyarrow requis) : une source par ligne, colonnes cas, nom,
+type_source, credibilite, informations (liste de chaînes) et, facultatives,
+raisonnement_rationnel, acteurs et evenements (JSON).
+
+Les résultats sont écrits en JSONL, un objet par cas : identifiant, analyse
+(determiner_version_probable), statistiques_collecte, conclusion
+(livrer_conclusion, sur demande), erreur et duree.
+
+Usage en ligne de commande :
+    python protocole_esprit_critique_flux.py cas.jsonl.gz -o resultats.jsonl --travailleurs 8
+    python protocole_esprit_critique_flux.py - < cas.jsonl > resultats.jsonl
+"""
+
+import argparse
+import gzip
+import io
+import json
+import sys
+import time
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Union
+
+from protocole_esprit_critique import Source, TypeSource
+from protocole_esprit_critique_lot import (CasAnalyse, ResultatCas, analyser_lot,
+                                           _analyser_cas_borne)
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # lecture Parquet indisponible
+    pq = None
+
+try:
+    from orjson import loads as _decoder_json  # décodage JSON plus rapide, facultatif
+except ImportError:
+    _decoder_json = json.loads
+
+_TAILLE_TAMPON = 1 << 20
+_LIGNES_PARQUET = 4096  # lignes lues par lot dans un fichier Parquet
+
+
+# Types de source par valeur ("document") ou par nom ("DOCUMENT")
+_TYPES_SOURCE = {**{t.value: t for t in TypeSource}, **{t.name: t for t in TypeSource}}
+
+
+def source_depuis_dict(donnees: Dict) -> Source:
+    """
+    Source décrite par un objet JSON (type par valeur ou par nom)
+
+    TypeError si informations n'est pas une liste de chaînes, ValueError si
+    la crédibilité n'est pas un nombre fini de [0, 1]
+    """
+    type_source = _TYPES_SOURCE.get(donnees["type_source"])
+    if type_source is None:
+        raise ValueError(f"type de source inconnu : {donnees['type_source']!r}")
+    informations = donnees["informations"]
+    if not isinstance(informations, list) or not all(isinstance(info, str) for info in informations):
+        raise TypeError("informations : liste de chaînes attendue")
+    credibilite = float(donnees["credibilite"])
+    if not 0.0 <= credibilite <= 1.0:  # exclut aussi NaN et les infinis
+        raise ValueError(f"crédibilité hors de [0, 1] : {credibilite}")
+    return Source(str(donnees["nom"]), type_source, credibilite,
+                  list(informations), bool(donnees.get("raisonnement_rationnel", True)))
+
+
+def _ouvrir(chemin: str) -> io.BufferedIOBase:
+    if chemin == "-":
+        return sys.stdin.buffer
+    if chemin.endswith(".gz"):
+        return io.BufferedReader(gzip.open(chemin, "rb"), _TAILLE_TAMPON)
+    return open(chemin, "rb", buffering=_TAILLE_TAMPON)
+
+
+def _enregistrements_jsonl(chemin: str) -> Iterator[Union[Dict, ResultatCas]]:
+    """
+    Objets du fichier, ligne à ligne ; une ligne illisible devient un
+    ResultatCas en erreur
+    """
+    fichier = _ouvrir(chemin)
+    try:
+        for numero, ligne in enumerate(fichier, 1):
+            if not ligne.strip():
+                continue
+            try:
+                donnees = _decoder_json(ligne)
+                if not isinstance(donnees, dict):
+                    raise ValueError("objet JSON attendu")
+            except ValueError as erreur:
+                yield ResultatCas(f"{chemin}:{numero}", erreur=f"ligne illisible : {erreur}")
+                continue
+            donnees.setdefault("_ligne", numero)
+            yield donnees
+    finally:
+        if fichier is not sys.stdin.buffer:
+            fichier.close()
+
+
+def _enregistrements_parquet(chemin: str) -> Iterator[Dict]:
+    if pq is None:
+        raise RuntimeError("lecture Parquet indisponible : installer pyarrow")
+    fichier = pq.ParquetFile(chemin)
+    for lot in fichier.iter_batches(batch_size=_LIGNES_PARQUET):
+        for donnees in lot.to_pylist():
+            for cle in ("acteurs", "evenements"):
+                if isinstance(donnees.get(cle), str):
+                    donnees[cle] = json.loads(donnees[cle])
+            if donnees.get("raisonnement_rationnel") is None:
+                donnees.pop("raisonnement_rationnel", None)
+            yield donnees
+
+
+def _regrouper(enregistrements: Iterable[Union[Dict, ResultatCas]], chemin: str,
+               limite_anomalies: int, regles: Optional[str],
+               conclusion: bool) -> Iterator[Union[CasAnalyse, ResultatCas]]:
+    """
+    Cas complets à partir des enregistrements : un cas par ligne tel quel,
+    les sources consécutives d'un même cas rassemblées
+    """
+    courant: Optional[CasAnalyse] = None
+    for donnees in enregistrements:
+        if isinstance(donnees, ResultatCas):
+            yield donnees
+            continue
+        ligne = donnees.pop("_ligne", None)
+        identifiant = donnees.get("identifiant", donnees.get("cas"))
+        if identifiant is None:
+            identifiant = f"{chemin}:{ligne}"
+        try:
+            if "sources" in donnees:
+                cas = CasAnalyse(str(identifiant), [source_depuis_dict(s) for s in donnees["sources"]],
+                                 donnees.get("acteurs"), donnees.get("evenements"),
+                                 int(donnees.get("limite_anomalies", limite_anomalies)), regles, conclusion)
+                if courant is not None:
+                    yield courant
+                    courant = None
+                yield cas
+                continue
+            source = source_depuis_dict(donnees) if "informations" in donnees else None
+            limite = int(donnees["limite_anomalies"]) if "limite_anomalies" in donnees else None
+        except (KeyError, TypeError, ValueError) as erreur:
+            if courant is not None and courant.identifiant != str(identifiant):
+                yield courant
+                courant = None
+            yield ResultatCas(str(identifiant), erreur=f"enregistrement invalide : {type(erreur).__name__}: {erreur}")
+            continue
+        if courant is None or courant.identifiant != str(identifiant):
+            if courant is not None:
+                yield courant
+            courant = CasAnalyse(str(identifiant), [], limite_anomalies=limite_anomalies,
+                                 regles=regles, conclusion=conclusion)
+        if source is not None:
+            courant.sources.append(source)
+        for cle in ("acteurs", "evenements"):
+            if donnees.get(cle) is not None:
+                setattr(courant, cle, donnees[cle])
+        if limite is not None:
+            courant.limite_anomalies = limite
+    if courant is not None:
+        yield courant
+
+
+def lire_cas(chemin: str, format: Optional[str] = None, limite_anomalies: int = 20,
+             regles: Optional[str] = None,
+             conclusion: bool = False) -> Iterator[Union[CasAnalyse, ResultatCas]]:
+    """
+    Cas d'un fichier JSONL ou Parquet, construits à la demande
+
+    format : "jsonl" ou "parquet" (défaut : d'après l'extension ; "-" : JSONL
+             sur l'entrée standard)
+    Un enregistrement illisible ou invalide est produit sous la forme d'un
+    ResultatCas en erreur, sans interrompre la lecture.
+    """
+    if format is None:
+        format = "parquet" if chemin.endswith((".parquet", ".pq")) else "jsonl"
+    if format == "jsonl":
+        enregistrements = _enregistrements_jsonl(chemin)
+    elif format == "parquet":
+        enregistrements = _enregistrements_parquet(chemin)
+    else:
+        raise ValueError(f"format inconnu : {format!r}")
+    return _regrouper(enregistrements, chemin, limite_anomalies, regles, conclusion)
+
+
+def resultat_en_dict(resultat: ResultatCas) -> Dict:
+    donnees = {"identifiant": resultat.identifiant, "analyse": resultat.analyse,
+               "statistiques_collecte": resultat.statistiques_collecte}
+    if resultat.conclusion is not None:
+        donnees["conclusion"] = resultat.conclusion
+    donnees.update({"erreur": resultat.erreur, "duree": round(resultat.duree, 6)})
+    return donnees
+
+
+def analyser_flux(elements: Iterable[Union[CasAnalyse, ResultatCas]],
+                  nombre_travailleurs: int = 1, processus: bool = True,
+                  delai_par_cas: Optional[float] = None) -> Iterator[ResultatCas]:
+    """
+    Analyse les cas lus par lire_cas ; les erreurs de lecture sont restituées
+    au fil de l'eau
+
+    nombre_travailleurs : 1 analyse dans le processus courant, dans l'ordre du
+                          fichier ; au-delà, analyser_lot (ordre de fin de traitement)
+    """
+    if nombre_travailleurs <= 1:
+        for element in elements:
+            if isinstance(element, ResultatCas):
+                yield element
+                continue
+            try:
+                yield _analyser_cas_borne(element, delai_par_cas)
+            except Exception as erreur:
+                yield ResultatCas(element.identifiant, erreur=f"{type(erreur).__name__}: {erreur}")
+        return
+
+    erreurs_lecture = deque()
+
+    def cas_valides() -> Iterator[CasAnalyse]:
+        for element in elements:
+            if isinstance(element, ResultatCas):
+                erreurs_lecture.append(element)
+            else:
+                yield element
+
+    for resultat in analyser_lot(cas_valides(), nombre_travailleurs, processus,
+                                 delai_par_cas=delai_par_cas):
+        while erreurs_lecture:
+            yield erreurs_lecture.popleft()
+        yield resultat
+    while erreurs_lecture:
+        yield erreurs_lecture.popleft()
+
+
+def ecrire_resultats(resultats: Iterable[ResultatCas], sortie: TextIO) -> Dict:
+    """
+    Écrit un objet JSON par résultat ; retourne le bilan (cas, erreurs)
+    """
+    bilan = {"cas": 0, "erreurs": 0}
+    for resultat in resultats:
+        sortie.write(json.dumps(resultat_en_dict(resultat), ensure_ascii=False))
+        sortie.write("\n")
+        bilan["cas"] += 1
+        bilan["erreurs"] += resultat.erreur is not None
+    sortie.flush()
+    return bilan
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    parseur = argparse.ArgumentParser(
+        description="Analyse en flux de cas JSONL/Parquet ; résultats en JSONL")
+    parseur.add_argument("entree", help="fichier de cas (.jsonl, .jsonl.gz, .parquet) ou - (entrée standard)")
+    parseur.add_argument("-o", "--sortie", default="-", help="fichier de résultats JSONL (défaut : sortie standard)")
+    parseur.add_argument("--format", choices=("jsonl", "parquet"), help="format d'entrée (défaut : extension)")
+    parseur.add_argument("--travailleurs", type=int, default=1,
+                         help="analyses en parallèle (1 : dans l'ordre du fichier)")
+    parseur.add_argument("--threads", action="store_true", help="pool de threads plutôt que de processus")
+    parseur.add_argument("--delai", type=float, help="secondes d'exécution avant abandon d'un cas")
+    parseur.add_argument("--limite-anomalies", type=int, default=20)
+    parseur.add_argument("--regles", help="fichier JSON du paquet de règles du domaine")
+    parseur.add_argument("--conclusion", action="store_true", help="joindre le texte de livrer_conclusion")
+    options = parseur.parse_args(arguments)
+
+    debut = time.perf_counter()
+    cas = lire_cas(options.entree, options.format, options.limite_anomalies, options.regles,
+                   options.conclusion)
+    resultats = analyser_flux(cas, options.travailleurs, not options.threads, options.delai)
+    if options.sortie == "-":
+        bilan = ecrire_resultats(resultats, sys.stdout)
+    else:
+        with open(options.sortie, "w", encoding="utf-8", buffering=_TAILLE_TAMPON) as sortie:
+            bilan = ecrire_resultats(resultats, sortie)
+    duree = time.perf_counter() - debut
+    print(f"{bilan['cas']} cas en {duree:.2f}s ({bilan['cas'] / max(duree, 1e-9):.0f} cas/s, "
+          f"{bilan['erreurs']} erreurs)", file=sys.stderr)
+    return 1 if bilan["erreurs"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
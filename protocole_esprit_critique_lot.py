@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Protocole esprit critique - analyse par lots
+============================================
+
+Exécute de nombreux cas indépendants (sources, acteurs, événements) sur un
+pool de processus ou de threads et restitue le résultat de
+determiner_version_probable de chaque cas dès qu'il est terminé.
+
+- Contre-pression : au plus `en_vol_max` cas soumis à la fois ; les cas
+  d'entrée sont lus paresseusement, au rythme de la consommation des résultats.
+- Délai par cas : un cas qui dépasse `delai_par_cas` secondes d'exécution
+  (l'attente dans la file du pool n'est pas comptée) est restitué en erreur.
+  En mode processus, le travail est interrompu dans le processus de travail
+  (SIGALRM, Unix). En mode threads, le délai ne peut pas être imposé : le cas
+  est restitué en erreur mais son thread poursuit le calcul jusqu'au bout, et
+  continue d'occuper une place du pool (il reste compté dans la contre-pression).
+"""
+
+import os
+import random
+import signal
+import threading
+import time
+from concurrent.futures import (ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED,
+                                wait)
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Iterable, Iterator
+
+from protocole_esprit_critique import (ProtocoleEspritCritique, Source, TypeSource,
+                                       registre_sources_partage)
+
+
+@dataclass
+class CasAnalyse:
+    identifiant: str
+    sources: List[Source]
+    acteurs: Optional[List[Dict]] = None
+    evenements: Optional[List[Dict]] = None
+    limite_anomalies: int = 20
+    regles: Optional[str] = None  # fichier de règles du domaine, compilé une fois par travailleur
+    conclusion: bool = False  # joindre le texte de livrer_conclusion au résultat
+    sources_partagees: bool = False  # sources internées dans le registre du travailleur
+
+
+@dataclass
+class ResultatCas:
+    identifiant: str
+    analyse: Optional[Dict] = None  # sortie de determiner_version_probable
+    statistiques_collecte: Optional[Dict] = None
+    erreur: Optional[str] = None
+    duree: float = 0.0
+    conclusion: Optional[str] = None  # texte de livrer_conclusion (cf. CasAnalyse.conclusion)
+
+
+class DelaiDepasse(Exception):
+    pass
+
+
+def analyser_cas(cas: CasAnalyse) -> ResultatCas:
+    """
+    Chaîne complète pour un cas : collecte, contradictions, version probable
+    """
+    debut = time.perf_counter()
+    registre = registre_sources_partage() if cas.sources_partagees else None
+    protocole = ProtocoleEspritCritique(regles=cas.regles, registre_sources=registre)
+    stats = protocole.collecter_informations(cas.sources, limite_anomalies=cas.limite_anomalies)
+    protocole.identifier_contradictions()
+    analyse = protocole.determiner_version_probable(cas.acteurs, cas.evenements)
+    conclusion = protocole.livrer_conclusion(cas.acteurs, cas.evenements) if cas.conclusion else None
+    return ResultatCas(cas.identifiant, analyse, stats, duree=time.perf_counter() - debut,
+                       conclusion=conclusion)
+
+
+def _declencher_delai(signum, frame):
+    raise DelaiDepasse()
+
+
+def _analyser_cas_borne(cas: CasAnalyse, delai: Optional[float]) -> ResultatCas:
+    """
+    analyser_cas interrompu après `delai` secondes lorsque le signal d'alarme
+    est disponible (processus de travail, thread principal)
+    """
+    minuterie = (delai is not None and hasattr(signal, "setitimer")
+                 and threading.current_thread() is threading.main_thread())
+    if minuterie:
+        precedent = signal.signal(signal.SIGALRM, _declencher_delai)
+        signal.setitimer(signal.ITIMER_REAL, delai)
+    try:
+        return analyser_cas(cas)
+    except DelaiDepasse:
+        return ResultatCas(cas.identifiant, erreur=f"délai dépassé ({delai}s)", duree=delai)
+    finally:
+        if minuterie:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, precedent)
+
+
+def analyser_lot(cas: Iterable[CasAnalyse],
+                 nombre_travailleurs: Optional[int] = None,
+                 processus: bool = True,
+                 en_vol_max: Optional[int] = None,
+                 delai_par_cas: Optional[float] = None) -> Iterator[ResultatCas]:
+    """
+    Analyse des cas en parallèle ; les résultats sont produits dans l'ordre
+    de fin de traitement
+
+    nombre_travailleurs : taille du pool (défaut : nombre de cœurs)
+    processus : pool de processus (True) ou de threads (False)
+    en_vol_max : cas soumis simultanément (défaut : nombre_travailleurs)
+    delai_par_cas : secondes d'exécution avant abandon d'un cas (None : pas
+                    de limite) ; imposé seulement en mode processus
+    """
+    nombre_travailleurs = nombre_travailleurs or os.cpu_count() or 1
+    en_vol_max = max(en_vol_max or nombre_travailleurs, 1)
+    executeur_classe = ProcessPoolExecutor if processus else ThreadPoolExecutor
+    # Le pool de processus marque « en cours » jusqu'à un cas de plus que de
+    # travailleurs : ce cas peut encore attendre au plus un délai avant de
+    # démarrer. La minuterie du travailleur tranche ; l'appelant n'est qu'un filet.
+    delai_appelant = None if delai_par_cas is None else delai_par_cas * (2 if processus else 1)
+    sondage = None if delai_par_cas is None else min(max(delai_par_cas / 20, 0.001), 0.05)
+    entrees = iter(cas)
+    en_vol = {}  # future -> [identifiant, échéance (None tant que le cas n'a pas démarré)]
+    abandonnes = set()  # futures abandonnées mais toujours en cours d'exécution
+
+    executeur = executeur_classe(max_workers=nombre_travailleurs)
+    try:
+        epuise = False
+        while True:
+            abandonnes = {future for future in abandonnes if not future.done()}
+            # Contre-pression : on ne lit de nouveaux cas que s'il reste de la
+            # place, les cas abandonnés encore en cours occupant toujours la leur
+            while not epuise and len(en_vol) + len(abandonnes) < en_vol_max:
+                suivant = next(entrees, None)
+                if suivant is None:
+                    epuise = True
+                    break
+                future = executeur.submit(_analyser_cas_borne, suivant, delai_par_cas)
+                en_vol[future] = [suivant.identifiant, None]
+            if not en_vol:
+                return
+
+            maintenant = time.monotonic()
+            if delai_appelant is not None:
+                for future, etat in en_vol.items():
+                    if etat[1] is None and future.running():
+                        etat[1] = maintenant + delai_appelant
+            echeances = [e for _, e in en_vol.values() if e is not None]
+            attente = max(min(echeances) - maintenant, 0) if echeances else None
+            if delai_appelant is not None and len(echeances) < len(en_vol):
+                # Des cas n'ont pas encore démarré : on surveille leur démarrage
+                attente = sondage if attente is None else min(attente, sondage)
+            elif abandonnes and not epuise:
+                attente = sondage if attente is None else min(attente, sondage)
+            terminees, _ = wait(en_vol, timeout=attente, return_when=FIRST_COMPLETED)
+
+            for future in terminees:
+                identifiant, _ = en_vol.pop(future)
+                try:
+                    yield future.result()
+                except Exception as erreur:
+                    yield ResultatCas(identifiant, erreur=f"{type(erreur).__name__}: {erreur}")
+
+            maintenant = time.monotonic()
+            for future, (identifiant, echeance) in list(en_vol.items()):
+                if echeance is not None and maintenant >= echeance and not future.done():
+                    del en_vol[future]
+                    if not future.cancel():
+                        abandonnes.add(future)
+                    yield ResultatCas(identifiant, erreur=f"délai dépassé ({delai_par_cas}s)",
+                                      duree=delai_par_cas)
+    finally:
+        executeur.shutdown(wait=False, cancel_futures=True)
+
+
+def _cas_synthetiques(nombre: int, graine: int = 0) -> Iterator[CasAnalyse]:
+    aleatoire = random.Random(graine)
+    informations = [
+        "Analyse révèle incohérence temporelle impossible",
+        "Données physiques incompatibles avec version officielle",
+        "Température insuffisante pour expliquer la fusion",
+        "Chronologie établie par les autorités",
+        "Le bâtiment est resté intact",
+        "Structure détruite en quelques secondes",
+    ]
+    for k in range(nombre):
+        sources = [Source(f"Source {s}", aleatoire.choice(list(TypeSource)),
+                          round(aleatoire.uniform(0.4, 1.0), 2),
+                          aleatoire.sample(informations, 3))
+                   for s in range(aleatoire.randint(3, 12))]
+        acteurs = [{"nom": f"Acteur {a}", "gains": ["pouvoir"] * aleatoire.randint(0, 5),
+                    "pouvoir": aleatoire.random()} for a in range(4)]
+        yield CasAnalyse(f"cas-{k}", sources, acteurs)
+
+
+if __name__ == "__main__":
+    nombre_cas = 2000
+    for en_processus in (False, True):
+        debut = time.perf_counter()
+        resultats = list(analyser_lot(_cas_synthetiques(nombre_cas), processus=en_processus,
+                                      delai_par_cas=10))
+        duree = time.perf_counter() - debut
+        erreurs = sum(1 for r in resultats if r.erreur)
+        mode = "processus" if en_processus else "threads"
+        print(f"{mode:>9} : {len(resultats)} cas en {duree:.2f}s "
+              f"({len(resultats) / duree:.0f} cas/s, {erreurs} erreurs)")
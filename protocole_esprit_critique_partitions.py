@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Protocole esprit critique - analyse hors mémoire par partitions
+===============================================================
+
+Pour les archives plus grandes que la mémoire : les faits ne sont jamais
+tous présents à la fois, et la mémoire de travail reste sous `memoire_max`.
+
+1. ingerer(sources) : chaque information est examinée comme dans
+   collecter_informations (mots-clés, anomalies) puis écrite dans une
+   partition sur disque choisie par empreinte de sa description : toutes
+   les occurrences d'un même fait arrivent dans la même partition. Les
+   tampons d'écriture sont vidés dès qu'ils atteignent leur part de
+   `memoire_max`.
+2. Chaque partition de descriptions est agrégée seule (sources, solidité,
+   confirmation de chaque fait) ; une partition trop grosse est d'abord
+   redécoupée. Un fait portant des termes d'opposition est réduit à
+   (poids, solidité suffisante) et rangé dans la partition de sa signature
+   d'opposition ; les autres ne sont que comptés.
+3. Les contradictions sont comptées couple de partitions par couple de
+   partitions : seules des signatures complémentaires peuvent se contredire
+   (cf. IndexOppositions.signatures_compatibles), et chaque couple est lu
+   par tranches bornées.
+
+Les agrégats (contradictions validées et leur niveau moyen, faits confirmés,
+nombre de faits) alimentent ProtocoleEspritCritique.probabilites_depuis_comptes :
+le résultat est celui de calcul_bayesien_probabilites après
+collecter_informations et identifier_contradictions sur le même corpus, aux
+arrondis de la somme des niveaux près.
+
+La fusion des quasi-doublons (seuil_quasi_doublons) n'est pas prise en
+charge : elle compare chaque information à toutes celles déjà vues.
+
+Usage en ligne de commande : mémoire de pointe contre le protocole en mémoire
+    python protocole_esprit_critique_partitions.py --faits 200000 --memoire-max 8
+"""
+
+import argparse
+import os
+import shutil
+import struct
+import tempfile
+import time
+import tracemalloc
+import zlib
+from array import array
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple, Union
+
+from protocole_esprit_critique import (ProtocoleEspritCritique, Source, PaquetRegles,
+                                       IndexOppositions, np)
+
+
+# Information collectée : crédibilité de la source, solidité initiale,
+# signature d'opposition, longueur de la description (UTF-8 à la suite)
+_INFORMATION = struct.Struct("<ddII")
+# Fait agrégé d'une partition de signature : poids, solidité > 0.6
+_FAIT = struct.Struct("<dB")
+# Mémoire occupée par description distincte pendant l'agrégation, rapportée
+# à la taille de ses enregistrements sur disque (mesure, chaînes courtes)
+_FACTEUR_AGREGATION = 4
+_PROFONDEUR_MAX = 4  # redécoupages successifs d'une partition trop grosse
+
+
+def _lire_enregistrements(chemin: str, taille_tampon: int) -> Iterator[Tuple[float, float, int, bytes]]:
+    """
+    Informations d'une partition, lues par blocs de `taille_tampon` octets
+    """
+    reste = b""
+    with open(chemin, "rb") as fichier:
+        while True:
+            bloc = fichier.read(taille_tampon)
+            if not bloc:
+                break
+            donnees = reste + bloc
+            position, fin = 0, len(donnees)
+            while position + _INFORMATION.size <= fin:
+                credibilite, solidite, signature, longueur = _INFORMATION.unpack_from(donnees, position)
+                debut = position + _INFORMATION.size
+                if debut + longueur > fin:
+                    break
+                yield credibilite, solidite, signature, donnees[debut:debut + longueur]
+                position = debut + longueur
+            reste = donnees[position:]
+
+
+class _Tampons:
+    """
+    Tampons d'écriture par partition, vidés en bloc sur disque dès que leur
+    total dépasse `capacite` octets
+    """
+
+    def __init__(self, repertoire: str, capacite: int):
+        self.repertoire = repertoire
+        self.capacite = max(capacite, 1)
+        self._tampons: Dict[str, bytearray] = {}
+        self._total = 0
+
+    def ecrire(self, nom: str, donnees: bytes):
+        tampon = self._tampons.get(nom)
+        if tampon is None:
+            tampon = self._tampons[nom] = bytearray()
+        tampon += donnees
+        self._total += len(donnees)
+        if self._total >= self.capacite:
+            self.vider()
+
+    def vider(self):
+        for nom, tampon in self._tampons.items():
+            with open(os.path.join(self.repertoire, nom), "ab") as fichier:
+                fichier.write(tampon)
+        self._tampons, self._total = {}, 0
+
+
+class AnalysePartitionnee:
+    """
+    Collecte, contradictions et probabilités bayésiennes d'un corpus plus
+    grand que la mémoire (cf. l'en-tête du module)
+
+    memoire_max : octets de travail (tampons, agrégation d'une partition,
+                  tranches de poids) ; les sources elles-mêmes sont lues au
+                  fil de l'itérable et ne sont pas comptées
+    repertoire : répertoire où créer celui des partitions (défaut : répertoire
+                 temporaire du système) ; fermer() le supprime
+    nombre_partitions : partitions de descriptions à l'écriture
+
+    Plusieurs appels à ingerer valent une seule collecte sur la réunion des
+    sources (mêmes faits, même limite d'anomalies).
+    """
+
+    def __init__(self, memoire_max: int = 256 << 20, repertoire: Optional[str] = None,
+                 nombre_partitions: int = 64, regles: Union[PaquetRegles, str, None] = None,
+                 limite_anomalies: int = 20):
+        self.memoire_max = max(memoire_max, 1 << 16)
+        self.nombre_partitions = max(nombre_partitions, 1)
+        self.limite_anomalies = limite_anomalies
+        self.repertoire = tempfile.mkdtemp(prefix="protocole_partitions_", dir=repertoire)
+        # Protocole vide : règles, étiquetage et évaluations, jamais de faits
+        self.protocole = ProtocoleEspritCritique(regles=regles)
+        self._index = IndexOppositions(self.protocole.paires_opposition)
+        self._signatures: List[FrozenSet[str]] = [frozenset()]
+        self._numeros_signatures: Dict[FrozenSet[str], int] = {frozenset(): 0}
+        self._tampons = _Tampons(self.repertoire, self.memoire_max // 2)
+        self.compteur_anomalies = 0
+        self.anomalies_validees = 0
+        self.informations_ecrites = 0
+        self._comptes: Optional[Dict] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+    def _partition_description(self, octets: bytes) -> str:
+        return f"d{zlib.crc32(octets) % self.nombre_partitions:04d}"
+
+    def ingerer(self, sources: Iterable[Source]) -> Dict:
+        """
+        Étape 1 sans garder les faits : anomalies comptées et validées comme
+        dans collecter_informations, informations écrites dans leur partition
+        """
+        protocole = self.protocole
+        for source in sources:
+            if not source.raisonnement_rationnel:
+                continue
+            for info in source.informations:
+                termes = protocole._termes_presents(info)
+                if protocole._est_anomalie(info, termes):
+                    if self.compteur_anomalies >= self.limite_anomalies:
+                        continue
+                    self.compteur_anomalies += 1
+                    if protocole._valider_anomalie(info, source, termes):
+                        self.anomalies_validees += 1
+
+                signature = termes & self._index.ensemble_termes
+                numero = self._numeros_signatures.get(signature)
+                if numero is None:
+                    numero = self._numeros_signatures[signature] = len(self._signatures)
+                    self._signatures.append(signature)
+                octets = info.encode("utf-8")
+                self._tampons.ecrire(self._partition_description(octets), _INFORMATION.pack(
+                    source.credibilite, protocole._evaluer_solidite_fait(info, source), numero, len(octets)
+                ) + octets)
+                self.informations_ecrites += 1
+        self._tampons.vider()
+        self._comptes = None
+        return {
+            "anomalies_detectees": self.compteur_anomalies,
+            "anomalies_validees": self.anomalies_validees,
+            "taux_validation": self.anomalies_validees / max(self.compteur_anomalies, 1),
+            "donnees_suffisantes": self.anomalies_validees >= protocole.seuil_minimum_anomalies
+        }
+
+    def _partitions_agregeables(self, chemin: str, profondeur: int = 0) -> Iterator[str]:
+        """
+        La partition elle-même si son agrégation tient dans memoire_max ;
+        sinon ses sous-partitions (redécoupage par une autre empreinte)
+        """
+        taille = os.path.getsize(chemin)
+        if taille * _FACTEUR_AGREGATION <= self.memoire_max or profondeur >= _PROFONDEUR_MAX:
+            yield chemin
+            return
+        nombre = -(-taille * _FACTEUR_AGREGATION // self.memoire_max) + 1
+        nom = os.path.basename(chemin)
+        tampons = _Tampons(self.repertoire, self.memoire_max // 4)
+        for credibilite, solidite, signature, octets in _lire_enregistrements(chemin, self.memoire_max // 8):
+            sous_partition = zlib.crc32(octets, profondeur + 1) % nombre
+            tampons.ecrire(f"{nom}.{sous_partition}",
+                           _INFORMATION.pack(credibilite, solidite, signature, len(octets)) + octets)
+        tampons.vider()
+        for sous_partition in range(nombre):
+            sous_chemin = os.path.join(self.repertoire, f"{nom}.{sous_partition}")
+            if os.path.exists(sous_chemin):
+                try:
+                    yield from self._partitions_agregeables(sous_chemin, profondeur + 1)
+                finally:
+                    os.remove(sous_chemin)
+
+    def _agreger(self) -> Dict[str, int]:
+        """
+        Étape 2 : faits agrégés partition par partition ; ceux qui portent des
+        termes d'opposition sont rangés par signature
+        """
+        for nom in os.listdir(self.repertoire):
+            if nom.startswith("s"):
+                os.remove(os.path.join(self.repertoire, nom))
+        tampons = _Tampons(self.repertoire, self.memoire_max // 4)
+        nombre_faits = faits_confirmes = 0
+        partitions = sorted(nom for nom in os.listdir(self.repertoire) if nom.startswith("d"))
+        for partition in partitions:
+            for chemin in self._partitions_agregeables(os.path.join(self.repertoire, partition)):
+                # description -> [sources, somme des crédibilités, solidité initiale, signature]
+                faits: Dict[bytes, List] = {}
+                for credibilite, solidite, signature, octets in _lire_enregistrements(chemin,
+                                                                                      self.memoire_max // 8):
+                    fait = faits.get(octets)
+                    if fait is None:
+                        faits[octets] = [1, credibilite, solidite, signature]
+                    else:
+                        fait[0] += 1
+                        fait[1] += credibilite
+                for nombre_sources, somme_credibilite, solidite, signature in faits.values():
+                    if nombre_sources > 1:
+                        # cf. _evaluer_solidite_fait_multiple
+                        solidite = min(1.0, somme_credibilite / nombre_sources +
+                                       min(0.3, (nombre_sources - 1) * 0.1))
+                    confirme = nombre_sources >= 3
+                    nombre_faits += 1
+                    faits_confirmes += confirme
+                    if signature:
+                        poids = nombre_sources * solidite
+                        if confirme:
+                            poids *= 1.5
+                        tampons.ecrire(f"s{signature}", _FAIT.pack(poids, solidite > 0.6))
+                del faits
+        tampons.vider()
+        return {"faits": nombre_faits, "faits_confirmes": faits_confirmes,
+                "partitions_descriptions": len(partitions)}
+
+    def _tranches(self, signature: int, taille: int) -> Iterator[Tuple[List[float], List[bool]]]:
+        """
+        Poids et solidités d'une partition de signature, par tranches de `taille` faits
+        """
+        with open(os.path.join(self.repertoire, f"s{signature}"), "rb") as fichier:
+            while True:
+                bloc = fichier.read(taille * _FAIT.size)
+                if not bloc:
+                    return
+                if np is not None:
+                    lignes = np.frombuffer(bloc, dtype=np.dtype([("poids", "<f8"), ("solide", "u1")]))
+                    yield lignes["poids"].copy(), lignes["solide"].astype(bool)
+                else:
+                    poids, solides = array("d"), []
+                    for valeur, solide in _FAIT.iter_unpack(bloc):
+                        poids.append(valeur)
+                        solides.append(bool(solide))
+                    yield poids, solides
+
+    def _compter_bloc(self, poids_a, solides_a, poids_b, solides_b, meme_tranche: bool) -> Tuple[int, int, float]:
+        """
+        Contradictions significatives, validées et somme des niveaux validés
+        entre deux tranches (paires i < j seulement si `meme_tranche`)
+        """
+        if np is None:
+            contradictions = validees = 0
+            somme_niveaux = 0.0
+            for i, poids_i in enumerate(poids_a):
+                debut = i + 1 if meme_tranche else 0
+                for j in range(debut, len(poids_b)):
+                    somme = poids_i + poids_b[j]
+                    niveau = min(1.0, somme / (somme + 2))
+                    if niveau > 0.6:  # cf. identifier_contradictions
+                        contradictions += 1
+                        if niveau > 0.7 and solides_a[i] and solides_b[j]:  # cf. _valider_contradiction
+                            validees += 1
+                            somme_niveaux += niveau
+            return contradictions, validees, somme_niveaux
+
+        contradictions = validees = 0
+        somme_niveaux = 0.0
+        lignes = max(1, (self.memoire_max // 8) // (32 * max(len(poids_b), 1)))
+        for debut in range(0, len(poids_a), lignes):
+            somme = poids_a[debut:debut + lignes, None] + poids_b[None, :]
+            niveaux = np.minimum(1.0, somme / (somme + 2))
+            significatives = niveaux > 0.6
+            if meme_tranche:
+                significatives &= (np.arange(debut, debut + len(somme))[:, None] <
+                                   np.arange(len(poids_b))[None, :])
+            valides = (significatives & (niveaux > 0.7) &
+                       solides_a[debut:debut + lignes, None] & solides_b[None, :])
+            contradictions += int(np.count_nonzero(significatives))
+            validees += int(np.count_nonzero(valides))
+            somme_niveaux += float(niveaux[valides].sum())
+        return contradictions, validees, somme_niveaux
+
+    def identifier_contradictions(self) -> Dict:
+        """
+        Étapes 2 et 3 hors mémoire : agrégats des faits et des contradictions
+        (nombres, niveaux), sans liste de faits ni de contradictions
+        """
+        if self._comptes is not None:
+            return self._comptes
+        comptes = self._agreger()
+        presentes = [numero for numero in range(1, len(self._signatures))
+                     if os.path.exists(os.path.join(self.repertoire, f"s{numero}"))]
+        compatibles = self._index.signatures_compatibles([self._signatures[numero] for numero in presentes])
+        taille_tranche = max(1024, self.memoire_max // (8 * _FAIT.size))
+
+        contradictions = validees = paires = 0
+        somme_niveaux = 0.0
+        for a, partenaires in enumerate(compatibles):
+            for b in partenaires:
+                if b < a:  # couple déjà traité
+                    continue
+                for rang_a, (poids_a, solides_a) in enumerate(self._tranches(presentes[a], taille_tranche)):
+                    for rang_b, (poids_b, solides_b) in enumerate(self._tranches(presentes[b], taille_tranche)):
+                        if a == b and rang_b < rang_a:
+                            continue
+                        meme_tranche = a == b and rang_a == rang_b
+                        paires += (len(poids_a) * (len(poids_a) - 1) // 2 if meme_tranche
+                                   else len(poids_a) * len(poids_b))
+                        bloc = self._compter_bloc(poids_a, solides_a, poids_b, solides_b, meme_tranche)
+                        contradictions += bloc[0]
+                        validees += bloc[1]
+                        somme_niveaux += bloc[2]
+        comptes.update({
+            "partitions_signatures": len(presentes),
+            "paires_comparees": paires,
+            "contradictions": contradictions,
+            "contradictions_validees": validees,
+            "impact_moyen": somme_niveaux / validees if validees else 0.0,
+        })
+        self._comptes = comptes
+        return comptes
+
+    def calcul_bayesien_probabilites(self) -> Dict[str, float]:
+        """
+        Étape 3 du protocole à partir des agrégats des partitions
+        """
+        comptes = self.identifier_contradictions()
+        return ProtocoleEspritCritique.probabilites_depuis_comptes(
+            comptes["contradictions_validees"], comptes["impact_moyen"],
+            comptes["faits_confirmes"], comptes["faits"])
+
+    def fermer(self):
+        """
+        Supprime le répertoire des partitions
+        """
+        shutil.rmtree(self.repertoire, ignore_errors=True)
+
+
+def _mesurer(fonction):
+    tracemalloc.start()
+    debut = time.perf_counter()
+    try:
+        resultat = fonction()
+        return resultat, time.perf_counter() - debut, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark(nombre_faits: int = 200000, memoire_max: int = 8 << 20) -> Dict:
+    """
+    Même corpus analysé en mémoire puis par partitions : probabilités et
+    mémoire de pointe (hors corpus, déjà chargé)
+    """
+    from protocole_esprit_critique_benchmark import generer_corpus
+    corpus = generer_corpus(nombre_faits)
+
+    def en_memoire():
+        protocole = ProtocoleEspritCritique(mode_compact=True)
+        protocole.collecter_informations(corpus.sources, limite_anomalies=10 ** 6)
+        protocole.identifier_contradictions()
+        return protocole.calcul_bayesien_probabilites()
+
+    def par_partitions():
+        with AnalysePartitionnee(memoire_max=memoire_max, limite_anomalies=10 ** 6) as analyse:
+            analyse.ingerer(corpus.sources)
+            return analyse.calcul_bayesien_probabilites(), analyse.identifier_contradictions()
+
+    reference, duree_reference, pic_reference = _mesurer(en_memoire)
+    (probabilites, comptes), duree, pic = _mesurer(par_partitions)
+    print(f"en mémoire (compact) : {duree_reference:.2f}s, pic {pic_reference / 2 ** 20:.1f} Mio")
+    print(f"par partitions       : {duree:.2f}s, pic {pic / 2 ** 20:.1f} Mio "
+          f"(memoire_max {memoire_max / 2 ** 20:.0f} Mio)")
+    print(comptes)
+    print(reference)
+    print(probabilites)
+    return {"reference": reference, "partitions": probabilites, "comptes": comptes,
+            "pic_reference": pic_reference, "pic_partitions": pic}
+
+
+if __name__ == "__main__":
+    parseur = argparse.ArgumentParser(description="Analyse hors mémoire par partitions")
+    parseur.add_argument("--faits", type=int, default=200000, help="nombre approximatif de faits synthétiques")
+    parseur.add_argument("--memoire-max", type=int, default=8, help="mémoire de travail en Mio")
+    arguments = parseur.parse_args()
+    benchmark(arguments.faits, arguments.memoire_max << 20)
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Protocole esprit critique - sensibilité aux crédibilités (Monte Carlo)
+======================================================================
+
+Quelle est la stabilité de version_plus_probable si les crédibilités des
+sources sont un peu fausses ? Plutôt que de relancer la chaîne collecte ->
+contradictions -> décision pour chaque scénario, la structure qui ne dépend
+pas des crédibilités est extraite une fois :
+
+- les paires candidates (termes d'opposition complémentaires) et, pour
+  chacune, le nombre de faits portant ses deux descriptions ;
+- les liens fait -> sources, le nombre de sources et la confirmation de
+  chaque fait concerné ;
+- les faits confirmés, le nombre de faits et les ajustements cui bono /
+  criminologiques (cf. ProtocoleEspritCritique._ajustements_alternatifs).
+
+Chaque lot de scénarios (matrice scénarios × sources de crédibilités) est
+ensuite rescoré par opérations sur tableaux : solidité des faits, poids,
+niveau et validation des paires, probabilités bayésiennes, scores et
+décision. Sans NumPy, les scénarios sont rescorés un à un sur la même
+structure.
+
+La solidité des faits est recalculée depuis les crédibilités comme à la
+collecte ; aux crédibilités d'origine, le résultat est celui de
+identifier_contradictions puis determiner_version_probable.
+
+Usage en ligne de commande : 10 000 scénarios contre des réexécutions complètes
+    python protocole_esprit_critique_sensibilite.py --faits 2000 --scenarios 10000
+"""
+
+import argparse
+import random
+import time
+from typing import Dict, List, Optional, Sequence
+
+from protocole_esprit_critique import ProtocoleEspritCritique, Source, EntrepotFaits, np
+
+
+DECISIONS = ("officielle", "alternative", "indetermine")
+_ELEMENTS_PAR_LOT = 1 << 22  # cases des matrices scénarios × (paires + liens) par lot
+
+
+class AnalyseSensibilite:
+    """
+    Structure d'un protocole figée pour rescorer des vecteurs de crédibilités
+
+    sources : colonnes des matrices de crédibilités (une par source distincte)
+    credibilites : crédibilités d'origine, dans l'ordre de `sources`
+    """
+
+    def __init__(self, protocole: ProtocoleEspritCritique, acteurs: Optional[List[Dict]] = None,
+                 evenements: Optional[List[Dict]] = None):
+        if not len(protocole.faits):
+            raise ValueError("aucun fait collecté : rien à perturber")
+        index = protocole._synchroniser_index()
+        paires = list(index.paires_candidates())
+
+        # Faits concernés : ceux des paires et ceux qui partagent leur
+        # description (validation), rangés par description
+        faits = protocole.faits
+        descriptions = dict.fromkeys(faits[position].description for paire in paires for position in paire)
+        groupes = [protocole._positions_par_description[description] for description in descriptions]
+        concernes = [position for groupe in groupes for position in groupe]
+        colonne_fait = {position: k for k, position in enumerate(concernes)}
+
+        # Sources distinctes et liens fait -> sources (multiplicité comprise)
+        self.sources: List[Source] = []
+        colonne_source: Dict[int, int] = {}
+        compact = isinstance(faits, EntrepotFaits)
+        self._liens: List[List[int]] = []
+        for position in concernes:
+            if compact:
+                sources = [faits.registre[identifiant] for identifiant in faits.identifiants_sources(position)]
+            else:
+                sources = faits[position].sources
+            liens = []
+            for source in sources:
+                colonne = colonne_source.get(id(source))
+                if colonne is None:
+                    colonne = colonne_source[id(source)] = len(self.sources)
+                    self.sources.append(source)
+                liens.append(colonne)
+            if not liens:
+                raise ValueError(f"fait sans source : {faits[position].description!r}")
+            self._liens.append(liens)
+        self.credibilites = [source.credibilite for source in self.sources]
+
+        self._nombres = [len(liens) for liens in self._liens]
+        # Fait à source unique : solidité = crédibilité × facteur (cf. _evaluer_solidite_fait)
+        self._facteurs = [1.0 if self.sources[liens[0]].raisonnement_rationnel else 0.5 for liens in self._liens]
+        self._bonus = [min(0.3, (nombre - 1) * 0.1) for nombre in self._nombres]
+        self._confirmes = [bool(faits[position].confirme_par_multiples_sources) for position in concernes]
+        self._debuts_groupes = []
+        groupe_fait = []
+        for g, groupe in enumerate(groupes):
+            self._debuts_groupes.append(len(groupe_fait))
+            groupe_fait.extend([g] * len(groupe))
+        self._paires_a = [colonne_fait[i] for i, _ in paires]
+        self._paires_b = [colonne_fait[j] for _, j in paires]
+        self._groupes_a = [groupe_fait[a] for a in self._paires_a]
+        self._groupes_b = [groupe_fait[b] for b in self._paires_b]
+        # cf. _valider_contradiction : au moins deux faits portant l'une des descriptions
+        self._assez_faits = [len(groupes[ga]) + (len(groupes[gb]) if ga != gb else 0) >= 2
+                             for ga, gb in zip(self._groupes_a, self._groupes_b)]
+
+        self.nombre_faits = protocole._nombre_faits_actifs()
+        self.faits_confirmes = sum(1 for fait in faits if fait.confirme_par_multiples_sources)
+        self.ajustements = protocole._ajustements_alternatifs(acteurs, evenements)[2]
+        self.seuil_decision = protocole.SEUIL_DECISION
+        if np is not None:
+            self._preparer_tableaux()
+
+    def _preparer_tableaux(self):
+        self._a_liens = np.fromiter((colonne for liens in self._liens for colonne in liens), dtype=np.intp)
+        self._a_debuts = np.cumsum([0] + self._nombres[:-1], dtype=np.intp)
+        self._a_nombres = np.asarray(self._nombres, dtype=np.float64)
+        self._a_premieres = np.asarray([liens[0] for liens in self._liens], dtype=np.intp)
+        self._a_facteurs = np.asarray(self._facteurs, dtype=np.float64)
+        self._a_bonus = np.asarray(self._bonus, dtype=np.float64)
+        self._a_confirmes = np.asarray(self._confirmes, dtype=bool)
+        self._a_debuts_groupes = np.asarray(self._debuts_groupes, dtype=np.intp)
+        self._a_paires_a = np.asarray(self._paires_a, dtype=np.intp)
+        self._a_paires_b = np.asarray(self._paires_b, dtype=np.intp)
+        self._a_groupes_a = np.asarray(self._groupes_a, dtype=np.intp)
+        self._a_groupes_b = np.asarray(self._groupes_b, dtype=np.intp)
+        self._a_assez_faits = np.asarray(self._assez_faits, dtype=bool)
+
+    def _scorer_lot(self, credibilites):
+        """
+        Scores officiels, scores alternatifs et codes de décision (indices de
+        DECISIONS) d'une matrice scénarios × sources
+        """
+        nombre = len(credibilites)
+        if len(self._liens):
+            sommes = np.add.reduceat(credibilites[:, self._a_liens], self._a_debuts, axis=1)
+            solidite = np.where(self._a_nombres == 1,
+                                credibilites[:, self._a_premieres] * self._a_facteurs,
+                                np.minimum(1.0, sommes / self._a_nombres + self._a_bonus))
+            poids = self._a_nombres * solidite
+            poids = np.where(self._a_confirmes, poids * 1.5, poids)
+            somme = poids[:, self._a_paires_a] + poids[:, self._a_paires_b]
+            niveaux = np.minimum(1.0, somme / (somme + 2))
+            fragiles = np.logical_or.reduceat(~(solidite > 0.6), self._a_debuts_groupes, axis=1)
+            validees = ((niveaux > 0.7) & self._a_assez_faits &
+                        ~fragiles[:, self._a_groupes_a] & ~fragiles[:, self._a_groupes_b])
+            nombre_validees = np.count_nonzero(validees, axis=1)
+            impact_moyen = np.where(validees, niveaux, 0.0).sum(axis=1) / np.maximum(nombre_validees, 1)
+        else:
+            nombre_validees = np.zeros(nombre, dtype=np.int64)
+            impact_moyen = np.zeros(nombre)
+
+        # cf. probabilites_depuis_comptes
+        reduction = np.minimum(0.8, nombre_validees * impact_moyen * 0.1)
+        officielle = np.where(nombre_validees > 0, 0.5 * (1 - reduction), 0.5)
+        alternative = np.where(nombre_validees > 0, 1 - officielle, 0.5)
+        if self.faits_confirmes > 0:
+            stabilite = min(0.1, self.faits_confirmes * 0.02)
+            superieure = officielle > alternative
+            officielle = np.where(superieure, np.minimum(1.0, officielle + stabilite), officielle)
+            alternative = np.where(superieure, alternative, np.minimum(1.0, alternative + stabilite))
+            total = officielle + alternative
+            officielle, alternative = officielle / total, alternative / total
+
+        # cf. determiner_version_probable
+        for ajustement in self.ajustements:
+            alternative = alternative + ajustement
+        total = officielle + alternative
+        officielle = np.where(total > 1, officielle / total, officielle)
+        alternative = np.where(total > 1, alternative / total, alternative)
+        decisions = np.where(officielle > alternative, 0, 1)
+        decisions[np.abs(officielle - alternative) < self.seuil_decision] = 2
+        return officielle, alternative, decisions
+
+    def _scorer_scenario(self, credibilites: Sequence[float]):
+        """
+        Équivalent scalaire de _scorer_lot pour un scénario (sans NumPy)
+        """
+        solidites, poids = [], []
+        for liens, nombre, facteur, bonus, confirme in zip(self._liens, self._nombres, self._facteurs,
+                                                           self._bonus, self._confirmes):
+            if nombre == 1:
+                solidite = credibilites[liens[0]] * facteur
+            else:
+                somme = 0.0
+                for colonne in liens:
+                    somme += credibilites[colonne]
+                solidite = min(1.0, somme / nombre + bonus)
+            solidites.append(solidite)
+            poids.append(nombre * solidite * 1.5 if confirme else nombre * solidite)
+        fragiles = [False] * len(self._debuts_groupes)
+        groupe = -1
+        for k, solidite in enumerate(solidites):
+            if groupe + 1 < len(self._debuts_groupes) and k == self._debuts_groupes[groupe + 1]:
+                groupe += 1
+            if not solidite > 0.6:
+                fragiles[groupe] = True
+
+        nombre_validees, somme_niveaux = 0, 0.0
+        for a, b, ga, gb, assez in zip(self._paires_a, self._paires_b, self._groupes_a, self._groupes_b,
+                                       self._assez_faits):
+            somme = poids[a] + poids[b]
+            niveau = min(1.0, somme / (somme + 2))
+            if niveau > 0.7 and assez and not fragiles[ga] and not fragiles[gb]:
+                nombre_validees += 1
+                somme_niveaux += niveau
+        probabilites = ProtocoleEspritCritique.probabilites_depuis_comptes(
+            nombre_validees, somme_niveaux / nombre_validees if nombre_validees else 0.0,
+            self.faits_confirmes, self.nombre_faits)
+
+        officielle, alternative = probabilites['version_officielle'], probabilites['versions_alternatives']
+        for ajustement in self.ajustements:
+            alternative += ajustement
+        total = officielle + alternative
+        if total > 1:
+            officielle, alternative = officielle / total, alternative / total
+        if abs(officielle - alternative) < self.seuil_decision:
+            return officielle, alternative, 2
+        return officielle, alternative, 0 if officielle > alternative else 1
+
+    def simuler(self, scenarios: int = 10000, ecart_type: float = 0.05, graine: int = 0,
+                credibilites=None) -> Dict:
+        """
+        Distributions de score_version_officielle, marge_decision et
+        version_plus_probable sur des crédibilités perturbées
+
+        Par défaut, chaque crédibilité reçoit un bruit gaussien d'écart-type
+        `ecart_type`, borné à [0, 1] ; `credibilites` (scénarios × sources,
+        colonnes dans l'ordre de self.sources) fournit d'autres scénarios.
+        """
+        if credibilites is not None:
+            scenarios = len(credibilites)
+        scores, marges, decisions = [], [], []
+        if np is not None:
+            generateur = np.random.default_rng(graine)
+            base = np.asarray(self.credibilites, dtype=np.float64)
+            lot = max(1, _ELEMENTS_PAR_LOT // max(len(self._paires_a) + len(self._a_liens), 1))
+            for debut in range(0, scenarios, lot):
+                taille = min(lot, scenarios - debut)
+                if credibilites is not None:
+                    matrice = np.asarray(credibilites[debut:debut + taille], dtype=np.float64)
+                else:
+                    matrice = np.clip(base + generateur.normal(0.0, ecart_type, (taille, len(base))), 0.0, 1.0)
+                officielle, alternative, codes = self._scorer_lot(matrice)
+                scores.append(officielle)
+                marges.append(np.abs(officielle - alternative))
+                decisions.append(codes)
+            scores = np.concatenate(scores) if scores else np.zeros(0)
+            marges = np.concatenate(marges) if marges else np.zeros(0)
+            decisions = np.concatenate(decisions) if decisions else np.zeros(0, dtype=np.int64)
+            comptes = np.bincount(decisions, minlength=len(DECISIONS)).tolist()
+        else:
+            aleatoire = random.Random(graine)
+            for rang in range(scenarios):
+                if credibilites is not None:
+                    scenario = credibilites[rang]
+                else:
+                    scenario = [min(1.0, max(0.0, c + aleatoire.gauss(0.0, ecart_type))) for c in self.credibilites]
+                officielle, alternative, code = self._scorer_scenario(scenario)
+                scores.append(officielle)
+                marges.append(abs(officielle - alternative))
+                decisions.append(code)
+            comptes = [decisions.count(code) for code in range(len(DECISIONS))]
+
+        nominale = DECISIONS[self._scorer_scenario(self.credibilites)[2]]
+        return {
+            "scenarios": scenarios,
+            "score_version_officielle": scores,
+            "marge_decision": marges,
+            "version_plus_probable": [DECISIONS[code] for code in decisions],
+            "repartition_decisions": {decision: nombre / max(scenarios, 1)
+                                      for decision, nombre in zip(DECISIONS, comptes)},
+            "decision_nominale": nominale,
+            "stabilite": comptes[DECISIONS.index(nominale)] / max(scenarios, 1),
+            "resume": {"score_version_officielle": _resumer(scores), "marge_decision": _resumer(marges)},
+        }
+
+
+def _resumer(valeurs) -> Dict[str, float]:
+    """
+    Moyenne, écart-type et quantiles 5 / 50 / 95 %
+    """
+    valeurs = sorted(valeurs.tolist() if hasattr(valeurs, "tolist") else valeurs)
+    if not valeurs:
+        return {}
+    moyenne = sum(valeurs) / len(valeurs)
+    quantile = lambda q: valeurs[min(len(valeurs) - 1, int(q * len(valeurs)))]
+    return {
+        "moyenne": moyenne,
+        "ecart_type": (sum((v - moyenne) ** 2 for v in valeurs) / len(valeurs)) ** 0.5,
+        "q05": quantile(0.05), "q50": quantile(0.5), "q95": quantile(0.95),
+    }
+
+
+def analyser_sensibilite(protocole: ProtocoleEspritCritique, acteurs: Optional[List[Dict]] = None,
+                         evenements: Optional[List[Dict]] = None, scenarios: int = 10000,
+                         ecart_type: float = 0.05, graine: int = 0) -> Dict:
+    """
+    Raccourci : structure extraite puis `scenarios` scénarios rescorés
+    """
+    return AnalyseSensibilite(protocole, acteurs, evenements).simuler(scenarios, ecart_type, graine)
+
+
+def benchmark(nombre_faits: int = 2000, scenarios: int = 10000, ecart_type: float = 0.05) -> Dict:
+    """
+    Durée de `scenarios` scénarios rescorés contre une réexécution complète
+    (collecte, contradictions, décision) avec des crédibilités perturbées
+    """
+    from protocole_esprit_critique_benchmark import generer_corpus
+    corpus = generer_corpus(nombre_faits)
+
+    debut = time.perf_counter()
+    protocole = ProtocoleEspritCritique()
+    protocole.collecter_informations(corpus.sources, limite_anomalies=10 ** 6)
+    protocole.identifier_contradictions()
+    nominal = protocole.determiner_version_probable(corpus.acteurs, corpus.evenements)
+    duree_execution = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    analyse = AnalyseSensibilite(protocole, corpus.acteurs, corpus.evenements)
+    duree_structure = time.perf_counter() - debut
+    debut = time.perf_counter()
+    resultat = analyse.simuler(scenarios, ecart_type)
+    duree_scenarios = time.perf_counter() - debut
+
+    print(f"faits: {len(protocole.faits)}  sources: {len(analyse.sources)}  "
+          f"paires candidates: {len(analyse._paires_a)}")
+    print(f"réexécution complète : {duree_execution:.3f}s (décision {nominal['version_plus_probable']})")
+    print(f"structure : {duree_structure:.3f}s  {scenarios} scénarios : {duree_scenarios:.3f}s "
+          f"(= {(duree_structure + duree_scenarios) / duree_execution:.1f} réexécutions)")
+    print(resultat["repartition_decisions"], f"stabilité {resultat['stabilite']:.3f}")
+    print(resultat["resume"])
+    return {"execution": duree_execution, "structure": duree_structure, "scenarios": duree_scenarios,
+            "resultat": resultat}
+
+
+if __name__ == "__main__":
+    parseur = argparse.ArgumentParser(description="Sensibilité de la décision aux crédibilités des sources")
+    parseur.add_argument("--faits", type=int, default=2000, help="nombre approximatif de faits synthétiques")
+    parseur.add_argument("--scenarios", type=int, default=10000, help="nombre de scénarios perturbés")
+    parseur.add_argument("--ecart-type", type=float, default=0.05, help="bruit gaussien sur les crédibilités")
+    arguments = parseur.parse_args()
+    benchmark(arguments.faits, arguments.scenarios, arguments.ecart_type)
@@ -0,0 +1,541 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Protocole esprit critique - service local d'analyse
+===================================================
+
+Serveur HTTP/1.1 minimal (TCP local ou socket Unix, asyncio) qui garde des
+cas nommés chargés en mémoire : un outil interactif n'a plus à relancer un
+processus ni à reconstruire l'état du protocole à chaque requête.
+
+    PUT    /cas/{nom}                   crée ou remplace un cas :
+                                        {"sources": [...], "acteurs": [...], "evenements": [...],
+                                         "limite_anomalies": 20, "mode_compact": false}
+    POST   /cas/{nom}/sources           ajoute des sources (ajouter_source, incrémental)
+    DELETE /cas/{nom}/sources/{source}  rétracte les sources de ce nom (retirer_source)
+    PUT    /cas/{nom}/contexte          remplace acteurs et événements
+    GET    /cas/{nom}/version           determiner_version_probable
+    GET    /cas/{nom}/conclusion        livrer_conclusion
+    DELETE /cas/{nom}                   décharge le cas
+    PUT    /sources/{nom}               crédibilité d'une source pour tous les cas (registre
+                                        partagé) : {"type_source": "document", "credibilite": 0.3}
+    GET    /cas                         cas chargés
+    GET    /statistiques                requêtes reçues, calculs lancés, requêtes regroupées
+
+Sources au format de protocole_esprit_critique_flux.source_depuis_dict.
+Avec un registre partagé (--sources-partagees), les sources de même nom et
+de même type sont stockées une fois pour tous les cas.
+
+Les calculs s'exécutent dans un pool de threads, un cas à la fois (verrou
+par cas, dans l'ordre d'arrivée). Les requêtes de lecture identiques qui
+arrivent pendant qu'un calcul est en cours pour le même état du cas (même
+génération) ne le relancent pas : elles attendent ce calcul et reçoivent
+la même réponse, encodée une seule fois.
+
+Usage en ligne de commande :
+    python protocole_esprit_critique_serveur.py servir --port 8765
+    python protocole_esprit_critique_serveur.py servir --unix /tmp/protocole.sock
+    python protocole_esprit_critique_serveur.py charge --connexions 32 --duree 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+from protocole_esprit_critique import (ProtocoleEspritCritique, Source, RegistreSourcesPartage,
+                                       registre_sources_partage)
+from protocole_esprit_critique_flux import source_depuis_dict, _TYPES_SOURCE
+
+_TAILLE_MAX_CORPS = 64 << 20
+
+
+class ErreurRequete(Exception):
+    def __init__(self, statut: HTTPStatus, message: str):
+        super().__init__(message)
+        self.statut = statut
+
+
+class CasCharge:
+    """
+    Cas gardé en mémoire : protocole, contexte et génération (incrémentée à
+    chaque modification, elle distingue les états du cas pour le regroupement)
+    """
+
+    def __init__(self, protocole: ProtocoleEspritCritique, acteurs: Optional[List[Dict]],
+                 evenements: Optional[List[Dict]], limite_anomalies: int):
+        self.protocole = protocole
+        self.acteurs = acteurs
+        self.evenements = evenements
+        self.limite_anomalies = limite_anomalies
+        self.generation = 0
+        self.sources_par_nom: Dict[str, List[Source]] = {}
+        self.verrou = asyncio.Lock()
+
+    def indexer_sources(self, sources: List[Source]):
+        registre = self.protocole.registre_sources
+        for source in sources:
+            if registre is not None:
+                source = registre.canonique(source)
+            self.sources_par_nom.setdefault(source.nom, []).append(source)
+
+
+def _encoder(donnees) -> bytes:
+    return json.dumps(donnees, ensure_ascii=False).encode("utf-8")
+
+
+def _decoder_sources(donnees) -> List[Source]:
+    if isinstance(donnees, dict):
+        donnees = donnees.get("sources", [])
+    if not isinstance(donnees, list):
+        raise ErreurRequete(HTTPStatus.BAD_REQUEST, "liste de sources attendue")
+    try:
+        return [source_depuis_dict(source) for source in donnees]
+    except (KeyError, TypeError, ValueError) as erreur:
+        raise ErreurRequete(HTTPStatus.BAD_REQUEST, f"source invalide : {type(erreur).__name__}: {erreur}")
+
+
+def _decoder_contexte(donnees) -> Tuple[Optional[List[Dict]], Optional[List[Dict]]]:
+    if not isinstance(donnees, dict):
+        raise ErreurRequete(HTTPStatus.BAD_REQUEST, "objet JSON attendu")
+    contexte = donnees.get("acteurs"), donnees.get("evenements")
+    for cle, valeur in zip(("acteurs", "evenements"), contexte):
+        if valeur is not None and not (isinstance(valeur, list) and all(isinstance(v, dict) for v in valeur)):
+            raise ErreurRequete(HTTPStatus.BAD_REQUEST, f"{cle} : liste d'objets attendue")
+    return contexte
+
+
+def _decoder_limite(donnees: Dict) -> int:
+    limite = donnees.get("limite_anomalies", 20)
+    if isinstance(limite, bool) or not isinstance(limite, int) or limite < 0:
+        raise ErreurRequete(HTTPStatus.BAD_REQUEST, "limite_anomalies : entier positif ou nul attendu")
+    return limite
+
+
+class ServeurProtocole:
+    """
+    Cas nommés en mémoire servis en HTTP
+
+    nombre_threads : calculs simultanés (sur des cas différents)
+    regroupement : fusion des requêtes de lecture identiques simultanées
+    registre_sources : registre partagé par tous les cas (None : sources propres à chaque cas)
+    """
+
+    def __init__(self, nombre_threads: int = 4, regroupement: bool = True,
+                 registre_sources: Optional[RegistreSourcesPartage] = None):
+        self.cas: Dict[str, CasCharge] = {}
+        self.regroupement = regroupement
+        self.registre_sources = registre_sources
+        self._executeur = ThreadPoolExecutor(max_workers=max(nombre_threads, 1),
+                                             thread_name_prefix="protocole")
+        self._en_cours: Dict[Tuple, asyncio.Future] = {}
+        self.requetes = 0
+        self.calculs = 0
+        self.requetes_regroupees = 0
+
+    async def _sur_cas(self, cas: CasCharge, fonction: Callable, *args, modification: bool = False):
+        """
+        Exécute `fonction` dans le pool, seule sur ce cas
+        """
+        async with cas.verrou:
+            resultat = await asyncio.get_running_loop().run_in_executor(self._executeur, fonction, *args)
+            if modification:
+                cas.generation += 1
+            return resultat
+
+    async def _lecture(self, nom: str, cas: CasCharge, etape: str, fonction: Callable) -> bytes:
+        """
+        Réponse encodée d'une étape de lecture ; un calcul en cours pour la
+        même étape et le même état du cas est partagé
+        """
+        def calculer() -> bytes:
+            self.calculs += 1
+            return _encoder(fonction())
+
+        if not self.regroupement:
+            return await self._sur_cas(cas, calculer)
+        cle = (nom, id(cas), cas.generation, etape)
+        tache = self._en_cours.get(cle)
+        if tache is None:
+            tache = asyncio.ensure_future(self._sur_cas(cas, calculer))
+            self._en_cours[cle] = tache
+            tache.add_done_callback(lambda _: self._en_cours.pop(cle, None))
+        else:
+            self.requetes_regroupees += 1
+        # shield : la déconnexion d'un client n'annule pas le calcul des autres
+        return await asyncio.shield(tache)
+
+    def _cas(self, nom: str) -> CasCharge:
+        cas = self.cas.get(nom)
+        if cas is None:
+            raise ErreurRequete(HTTPStatus.NOT_FOUND, f"cas inconnu : {nom}")
+        return cas
+
+    async def traiter(self, methode: str, cible: str, corps: bytes) -> Tuple[HTTPStatus, bytes]:
+        """
+        Route une requête ; retourne le statut et le corps JSON encodé
+        """
+        self.requetes += 1
+        segments = [unquote(segment) for segment in urlsplit(cible).path.strip("/").split("/") if segment]
+        try:
+            donnees = json.loads(corps) if corps else {}
+        except ValueError as erreur:
+            raise ErreurRequete(HTTPStatus.BAD_REQUEST, f"JSON invalide : {erreur}")
+
+        if segments == ["cas"] and methode == "GET":
+            return HTTPStatus.OK, _encoder({
+                nom: {"faits": len(cas.protocole.faits), "contradictions": len(cas.protocole.contradictions),
+                      "generation": cas.generation}
+                for nom, cas in self.cas.items()})
+        if segments == ["statistiques"] and methode == "GET":
+            return HTTPStatus.OK, _encoder({"requetes": self.requetes, "calculs": self.calculs,
+                                            "requetes_regroupees": self.requetes_regroupees})
+        if len(segments) == 2 and segments[0] == "sources" and methode == "PUT":
+            return await self._modifier_source(segments[1], donnees)
+        if len(segments) < 2 or segments[0] != "cas":
+            raise ErreurRequete(HTTPStatus.NOT_FOUND, f"route inconnue : {cible}")
+        nom, action = segments[1], tuple(segments[2:])
+
+        if action == () and methode == "PUT":
+            return await self._creer(nom, donnees)
+        if action == () and methode == "DELETE":
+            self._cas(nom)
+            del self.cas[nom]
+            return HTTPStatus.OK, _encoder({"supprime": nom})
+
+        cas = self._cas(nom)
+        if action == ("version",) and methode == "GET":
+            return HTTPStatus.OK, await self._lecture(
+                nom, cas, "version", lambda: cas.protocole.determiner_version_probable(cas.acteurs, cas.evenements))
+        if action == ("conclusion",) and methode == "GET":
+            return HTTPStatus.OK, await self._lecture(
+                nom, cas, "conclusion",
+                lambda: {"conclusion": cas.protocole.livrer_conclusion(cas.acteurs, cas.evenements)})
+        if action == ("sources",) and methode == "POST":
+            sources = _decoder_sources(donnees)
+            bilan = await self._sur_cas(cas, self._ajouter_sources, cas, sources, modification=True)
+            return HTTPStatus.OK, _encoder(bilan)
+        if len(action) == 2 and action[0] == "sources" and methode == "DELETE":
+            bilan = await self._sur_cas(cas, self._retirer_sources, cas, action[1], modification=True)
+            return HTTPStatus.OK, _encoder(bilan)
+        if action == ("contexte",) and methode == "PUT":
+            acteurs, evenements = _decoder_contexte(donnees)
+            async with cas.verrou:
+                cas.acteurs, cas.evenements = acteurs, evenements
+                cas.generation += 1
+            return HTTPStatus.OK, _encoder({"generation": cas.generation})
+        raise ErreurRequete(HTTPStatus.NOT_FOUND, f"route inconnue : {methode} {cible}")
+
+    async def _creer(self, nom: str, donnees: Dict) -> Tuple[HTTPStatus, bytes]:
+        acteurs, evenements = _decoder_contexte(donnees)
+        limite_anomalies = _decoder_limite(donnees)
+        sources = _decoder_sources(donnees.get("sources", []))
+        protocole = ProtocoleEspritCritique(mode_compact=bool(donnees.get("mode_compact", False)),
+                                            registre_sources=self.registre_sources)
+        cas = CasCharge(protocole, acteurs, evenements, limite_anomalies)
+
+        def charger() -> Dict:
+            stats = protocole.collecter_informations(sources, cas.limite_anomalies)
+            protocole.identifier_contradictions()
+            cas.indexer_sources(sources)
+            return stats
+
+        stats = await self._sur_cas(cas, charger)
+        remplace = nom in self.cas
+        self.cas[nom] = cas
+        stats.update({"faits": len(protocole.faits), "contradictions": len(protocole.contradictions)})
+        return (HTTPStatus.OK if remplace else HTTPStatus.CREATED), _encoder(stats)
+
+    async def _modifier_source(self, nom: str, donnees: Dict) -> Tuple[HTTPStatus, bytes]:
+        """
+        Les cas recalculent les faits de la source à leur prochaine étape
+        (la génération change : aucune réponse antérieure n'est réutilisée)
+        """
+        if self.registre_sources is None:
+            raise ErreurRequete(HTTPStatus.CONFLICT, "registre de sources partagé désactivé")
+        try:
+            type_source = _TYPES_SOURCE[donnees["type_source"]]
+            credibilite = float(donnees["credibilite"])
+        except (KeyError, TypeError, ValueError) as erreur:
+            raise ErreurRequete(HTTPStatus.BAD_REQUEST, f"{type(erreur).__name__}: {erreur}")
+        try:
+            identifiant = self.registre_sources.modifier_credibilite(nom, type_source, credibilite)
+        except KeyError as erreur:
+            raise ErreurRequete(HTTPStatus.NOT_FOUND, str(erreur))
+        except ValueError as erreur:
+            raise ErreurRequete(HTTPStatus.BAD_REQUEST, str(erreur))
+        for cas in self.cas.values():
+            cas.generation += 1
+        return HTTPStatus.OK, _encoder({"source": identifiant, "version": self.registre_sources.version})
+
+    @staticmethod
+    def _ajouter_sources(cas: CasCharge, sources: List[Source]) -> Dict:
+        nouvelles = 0
+        for source in sources:
+            nouvelles += len(cas.protocole.ajouter_source(source, cas.limite_anomalies)["nouvelles_contradictions"])
+        cas.indexer_sources(sources)
+        return {"sources": len(sources), "nouvelles_contradictions": nouvelles,
+                "faits": len(cas.protocole.faits), "contradictions": len(cas.protocole.contradictions)}
+
+    @staticmethod
+    def _retirer_sources(cas: CasCharge, nom_source: str) -> Dict:
+        bilan = {"sources": 0, "faits_modifies": 0, "faits_retires": 0, "contradictions_retirees": 0}
+        for source in cas.sources_par_nom.pop(nom_source, ()):
+            retrait = cas.protocole.retirer_source(source)
+            bilan["sources"] += 1
+            for cle in ("faits_modifies", "faits_retires", "contradictions_retirees"):
+                bilan[cle] += retrait[cle]
+        return bilan
+
+    async def _servir_connexion(self, lecteur: asyncio.StreamReader, ecrivain: asyncio.StreamWriter):
+        """
+        Requêtes successives d'une connexion (keep-alive HTTP/1.1)
+        """
+        try:
+            while True:
+                ligne = await lecteur.readline()
+                if not ligne:
+                    break
+                methode, cible, version = ligne.decode("latin-1").split()
+                entetes = {}
+                while True:
+                    ligne = await lecteur.readline()
+                    if ligne in (b"\r\n", b"\n", b""):
+                        break
+                    cle, _, valeur = ligne.decode("latin-1").partition(":")
+                    entetes[cle.strip().lower()] = valeur.strip()
+                longueur = int(entetes.get("content-length", 0))
+                if longueur > _TAILLE_MAX_CORPS:
+                    statut, reponse = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, _encoder({"erreur": "corps trop volumineux"})
+                    entetes["connection"] = "close"
+                else:
+                    corps = await lecteur.readexactly(longueur) if longueur else b""
+                    try:
+                        statut, reponse = await self.traiter(methode, cible, corps)
+                    except ErreurRequete as erreur:
+                        statut, reponse = erreur.statut, _encoder({"erreur": str(erreur)})
+                    except Exception as erreur:
+                        statut = HTTPStatus.INTERNAL_SERVER_ERROR
+                        reponse = _encoder({"erreur": f"{type(erreur).__name__}: {erreur}"})
+                fermer = entetes.get("connection", "").lower() == "close" or version == "HTTP/1.0"
+                ecrivain.write(f"HTTP/1.1 {statut.value} {statut.phrase}\r\n"
+                               f"Content-Type: application/json; charset=utf-8\r\n"
+                               f"Content-Length: {len(reponse)}\r\n"
+                               f"{'Connection: close' if fermer else 'Connection: keep-alive'}\r\n\r\n"
+                               .encode("latin-1") + reponse)
+                await ecrivain.drain()
+                if fermer:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass  # client parti ou requête mal formée : connexion abandonnée
+        finally:
+            ecrivain.close()
+
+    async def demarrer(self, hote: str = "127.0.0.1", port: int = 8765,
+                       unix: Optional[str] = None) -> asyncio.AbstractServer:
+        if unix is not None:
+            return await asyncio.start_unix_server(self._servir_connexion, unix)
+        return await asyncio.start_server(self._servir_connexion, hote, port)
+
+    def fermer(self):
+        self._executeur.shutdown(wait=True)
+
+
+async def _servir(hote: str, port: int, unix: Optional[str], nombre_threads: int, regroupement: bool,
+                  sources_partagees: bool):
+    service = ServeurProtocole(nombre_threads, regroupement,
+                               registre_sources_partage() if sources_partagees else None)
+    serveur = await service.demarrer(hote, port, unix)
+    adresse = unix or "%s:%d" % serveur.sockets[0].getsockname()[:2]
+    print(f"écoute {adresse}", flush=True)
+    try:
+        async with serveur:
+            await serveur.serve_forever()
+    finally:
+        service.fermer()
+
+
+# --- Générateur de charge ---------------------------------------------------
+
+class ClientProtocole:
+    """
+    Client HTTP minimal à connexion persistante (générateur de charge, tests)
+    """
+
+    def __init__(self, lecteur: asyncio.StreamReader, ecrivain: asyncio.StreamWriter):
+        self._lecteur = lecteur
+        self._ecrivain = ecrivain
+
+    @classmethod
+    async def connecter(cls, hote: str = "127.0.0.1", port: int = 8765,
+                        unix: Optional[str] = None) -> 'ClientProtocole':
+        if unix is not None:
+            return cls(*await asyncio.open_unix_connection(unix))
+        return cls(*await asyncio.open_connection(hote, port))
+
+    async def requete(self, methode: str, chemin: str, donnees=None) -> Tuple[int, object]:
+        corps = b"" if donnees is None else _encoder(donnees)
+        self._ecrivain.write(f"{methode} {chemin} HTTP/1.1\r\nHost: localhost\r\n"
+                             f"Content-Length: {len(corps)}\r\n\r\n".encode("latin-1") + corps)
+        await self._ecrivain.drain()
+        statut = int((await self._lecteur.readline()).split()[1])
+        longueur = 0
+        while True:
+            ligne = await self._lecteur.readline()
+            if ligne in (b"\r\n", b"\n", b""):
+                break
+            cle, _, valeur = ligne.decode("latin-1").partition(":")
+            if cle.strip().lower() == "content-length":
+                longueur = int(valeur)
+        return statut, json.loads(await self._lecteur.readexactly(longueur))
+
+    async def fermer(self):
+        self._ecrivain.close()
+        await self._ecrivain.wait_closed()
+
+
+def _centile(valeurs: List[float], q: float) -> float:
+    valeurs = sorted(valeurs)
+    return valeurs[min(len(valeurs) - 1, int(q * len(valeurs)))] if valeurs else 0.0
+
+
+async def generer_charge(hote: str = "127.0.0.1", port: int = 8765, unix: Optional[str] = None,
+                         cas: Optional[List[str]] = None, connexions: int = 32, duree: float = 5.0,
+                         part_ecritures: float = 0.02, graine: int = 0) -> Dict:
+    """
+    Rejoue un mélange de lectures (version, conclusion) et d'ajouts de
+    sources sur les cas donnés, depuis `connexions` clients simultanés ;
+    retourne débit et latences
+    """
+    from protocole_esprit_critique_benchmark import generer_corpus
+    cas = cas or ["demo"]
+    informations = [info for source in generer_corpus(200).sources for info in source.informations]
+    latences: List[float] = []
+    erreurs = 0
+    fin = time.perf_counter() + duree
+
+    async def client(numero: int):
+        nonlocal erreurs
+        aleatoire = random.Random(graine + numero)
+        connexion = await ClientProtocole.connecter(hote, port, unix)
+        try:
+            while time.perf_counter() < fin:
+                nom = aleatoire.choice(cas)
+                if aleatoire.random() < part_ecritures:
+                    requete = ("POST", f"/cas/{nom}/sources", [{
+                        "nom": f"Charge {numero}", "type_source": "temoignage",
+                        "credibilite": round(aleatoire.uniform(0.4, 1.0), 2),
+                        "informations": aleatoire.sample(informations, 3)}])
+                else:
+                    requete = ("GET", f"/cas/{nom}/{aleatoire.choice(('version', 'conclusion'))}", None)
+                debut = time.perf_counter()
+                statut, _ = await connexion.requete(*requete)
+                latences.append(time.perf_counter() - debut)
+                erreurs += statut >= 400
+        finally:
+            await connexion.fermer()
+
+    debut = time.perf_counter()
+    await asyncio.gather(*(client(k) for k in range(connexions)))
+    ecoule = time.perf_counter() - debut
+    connexion = await ClientProtocole.connecter(hote, port, unix)
+    try:
+        _, serveur = await connexion.requete("GET", "/statistiques")
+    finally:
+        await connexion.fermer()
+    return {
+        "serveur": serveur,
+        "requetes": len(latences),
+        "erreurs": erreurs,
+        "requetes_par_seconde": len(latences) / ecoule,
+        "p50_ms": _centile(latences, 0.50) * 1e3,
+        "p99_ms": _centile(latences, 0.99) * 1e3,
+        "max_ms": max(latences, default=0.0) * 1e3,
+    }
+
+
+async def _charger_cas_demo(hote: str, port: int, unix: Optional[str], nombre_cas: int, faits: int):
+    from protocole_esprit_critique_benchmark import generer_corpus
+    connexion = await ClientProtocole.connecter(hote, port, unix)
+    try:
+        for k in range(nombre_cas):
+            corpus = generer_corpus(faits, graine=k)
+            await connexion.requete("PUT", f"/cas/demo-{k}", {
+                "sources": [{"nom": s.nom, "type_source": s.type_source.value, "credibilite": s.credibilite,
+                             "informations": s.informations, "raisonnement_rationnel": s.raisonnement_rationnel}
+                            for s in corpus.sources],
+                "acteurs": corpus.acteurs, "evenements": corpus.evenements})
+    finally:
+        await connexion.fermer()
+    return [f"demo-{k}" for k in range(nombre_cas)]
+
+
+def charge(connexions: int = 32, duree: float = 5.0, nombre_cas: int = 4, faits: int = 2000,
+           part_ecritures: float = 0.02, unix: bool = False, regroupement: bool = True) -> Dict:
+    """
+    Démarre un serveur local dans un processus séparé, y charge des cas de
+    démonstration et mesure débit et latences sous charge
+    """
+    repertoire = tempfile.mkdtemp() if unix else None
+    commande = [sys.executable, os.path.abspath(__file__), "servir", "--port", "0"]
+    if unix:
+        commande += ["--unix", os.path.join(repertoire, "protocole.sock")]
+    if not regroupement:
+        commande.append("--sans-regroupement")
+    serveur = subprocess.Popen(commande, stdout=subprocess.PIPE, text=True)
+    try:
+        adresse = serveur.stdout.readline().split(" ", 1)[1].strip()
+        hote, port, chemin = "127.0.0.1", 0, None
+        if unix:
+            chemin = adresse
+        else:
+            hote, port = adresse.rsplit(":", 1)[0], int(adresse.rsplit(":", 1)[1])
+        cas = asyncio.run(_charger_cas_demo(hote, port, chemin, nombre_cas, faits))
+        return asyncio.run(generer_charge(hote, port, chemin, cas, connexions, duree, part_ecritures))
+    finally:
+        serveur.terminate()
+        serveur.wait()
+        if repertoire:
+            shutil.rmtree(repertoire, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parseur = argparse.ArgumentParser(description="Service local d'analyse et générateur de charge")
+    commandes = parseur.add_subparsers(dest="commande", required=True)
+    servir = commandes.add_parser("servir", help="démarre le serveur")
+    servir.add_argument("--hote", default="127.0.0.1")
+    servir.add_argument("--port", type=int, default=8765, help="0 : port libre choisi par le système")
+    servir.add_argument("--unix", help="chemin d'un socket Unix (remplace hôte et port)")
+    servir.add_argument("--threads", type=int, default=4, help="calculs simultanés")
+    servir.add_argument("--sans-regroupement", action="store_true", help="désactive la fusion des requêtes")
+    servir.add_argument("--sources-partagees", action="store_true",
+                        help="sources internées une fois pour tous les cas (registre partagé)")
+    mesure = commandes.add_parser("charge", help="mesure débit et latences contre un serveur local")
+    mesure.add_argument("--connexions", type=int, default=32)
+    mesure.add_argument("--duree", type=float, default=5.0)
+    mesure.add_argument("--cas", type=int, default=4, help="cas de démonstration chargés")
+    mesure.add_argument("--faits", type=int, default=2000, help="faits synthétiques par cas")
+    mesure.add_argument("--ecritures", type=float, default=0.02, help="part des requêtes ajoutant une source")
+    mesure.add_argument("--unix", action="store_true", help="socket Unix plutôt que TCP")
+    mesure.add_argument("--sans-regroupement", action="store_true")
+    options = parseur.parse_args()
+    if options.commande == "servir":
+        try:
+            asyncio.run(_servir(options.hote, options.port, options.unix, options.threads,
+                                not options.sans_regroupement, options.sources_partagees))
+        except KeyboardInterrupt:
+            pass
+    else:
+        resultat = charge(options.connexions, options.duree, options.cas, options.faits,
+                          options.ecritures, options.unix, not options.sans_regroupement)
+        print(json.dumps(resultat, ensure_ascii=False, indent=2))
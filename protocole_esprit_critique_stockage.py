@@ -0,0 +1,579 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Protocole esprit critique - stockage persistant des cas
+=======================================================
+
+Sauvegarde d'un ProtocoleEspritCritique (faits, sources, contradictions,
+compteurs, signatures d'opposition et scores précalculés) dans un fichier
+binaire compact, et rechargement par projection mémoire (mmap).
+
+Format (petit-boutiste ou gros-boutiste selon la machine, noté dans l'en-tête) :
+    MAGIC (8 octets) | longueur des métadonnées (u32) | métadonnées JSON
+    | répertoire : nombre de sections (u32) puis (nom 16 o, décalage u64, longueur u64)
+    | sections alignées sur 8 octets
+Les chaînes (descriptions, noms, informations) sont rangées dans des tables
+de chaînes (blob UTF-8 + décalages) ; faits, liens fait -> source, sources et
+contradictions sont des colonnes à largeur fixe, recopiées telles quelles
+dans les tableaux du mode compact au rechargement.
+
+ouvrir_cas() ne lit que l'en-tête : l'ouverture est quasi instantanée quelle
+que soit la taille du fichier, et les colonnes sont lues à la demande.
+CasStocke.protocole() reconstruit un protocole prêt pour l'ingestion
+incrémentale (ajouter_source) sans réétiqueter ni rescanner les paires.
+Les descriptions et l'index description -> faits restent dans le fichier
+projeté (empreintes triées, recherche dichotomique) ; le rechargement reste
+en O(n) pour la copie des colonnes numériques (copies mémoire brutes) et
+la reconstruction de l'index des oppositions depuis les signatures, en
+O(sources) pour le décodage des sources.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from bisect import bisect_left
+from array import array
+from typing import Dict, List, Optional
+
+from protocole_esprit_critique import (
+    ProtocoleEspritCritique, Fait, Source, Contradiction, TypeSource, EntrepotFaits,
+    EntrepotContradictions, IndexOppositions, RegistreSources
+)
+
+
+MAGIC = b"PECCAS\x00\x01"
+VERSION_FORMAT = 4
+_ENTREE_REPERTOIRE = struct.Struct("<16sQQ")
+_TYPES_SOURCE = list(TypeSource)
+
+
+def _table_chaines(chaines) -> Dict[str, array]:
+    """
+    Table de chaînes : blob UTF-8 et décalages (n + 1 entrées)
+    """
+    blob = bytearray()
+    decalages = array("Q", [0])
+    for chaine in chaines:
+        blob += chaine.encode("utf-8")
+        decalages.append(len(blob))
+    return {"txt": array("B", blob), "off": decalages}
+
+
+class _TableChainesProjetee:
+    """
+    Séquence de chaînes décodées à la demande depuis le fichier projeté ;
+    append conserve le comportement de liste pour l'ingestion reprise
+    """
+
+    def __init__(self, blob: memoryview, decalages: memoryview):
+        self._blob = blob
+        self._decalages = decalages
+        self._nombre = len(decalages) - 1
+        self._ajouts: List[str] = []
+
+    def __len__(self) -> int:
+        return self._nombre + len(self._ajouts)
+
+    def __getitem__(self, indice: int) -> str:
+        if indice < 0:
+            indice += len(self)
+        if indice >= self._nombre:
+            return self._ajouts[indice - self._nombre]
+        return bytes(self._blob[self._decalages[indice]:self._decalages[indice + 1]]).decode("utf-8")
+
+    def __iter__(self):
+        return iter(self.decoder_tout())
+
+    def decoder_tout(self) -> List[str]:
+        """
+        Décodage en bloc (une seule copie du blob)
+        """
+        donnees = bytes(self._blob)
+        decalages = self._decalages.tolist()
+        return [donnees[debut:fin].decode("utf-8") for debut, fin in zip(decalages, decalages[1:])] + self._ajouts
+
+    def append(self, chaine: str):
+        self._ajouts.append(chaine)
+
+
+def _empreinte_description(description: str) -> int:
+    return zlib.crc32(description.encode("utf-8"))
+
+
+class _PositionsParDescriptionProjetees:
+    """
+    Index description -> positions des faits du protocole rechargé, lu dans
+    les colonnes projetées (empreintes triées) au lieu d'être reconstruit.
+    
+    Une description consultée passe dans un dictionnaire propre, où les
+    modifications du protocole sont faites ; values, items et len (parcours
+    de tout le corpus : chemins vectorisé et parallèle) matérialisent
+    l'index complet.
+    """
+
+    def __init__(self, descriptions, empreintes: memoryview, positions: memoryview):
+        self._descriptions = descriptions
+        self._empreintes = empreintes
+        self._positions = positions
+        self._consultees: Dict[str, Optional[List[int]]] = {}  # None : description absente
+        self._complet: Optional[Dict[str, List[int]]] = None
+
+    def _projetees(self, description: str) -> Optional[List[int]]:
+        empreinte = _empreinte_description(description)
+        trouvees = []
+        rang = bisect_left(self._empreintes, empreinte)
+        while rang < len(self._empreintes) and self._empreintes[rang] == empreinte:
+            position = self._positions[rang]
+            if self._descriptions[position] == description:  # collision d'empreintes
+                trouvees.append(position)
+            rang += 1
+        return trouvees or None
+
+    def get(self, description: str, defaut=None):
+        if self._complet is not None:
+            return self._complet.get(description, defaut)
+        if description not in self._consultees:
+            self._consultees[description] = self._projetees(description)
+        positions = self._consultees[description]
+        return defaut if positions is None else positions
+
+    def __getitem__(self, description: str) -> List[int]:
+        positions = self.get(description)
+        if positions is None:
+            raise KeyError(description)
+        return positions
+
+    def __contains__(self, description: str) -> bool:
+        return self.get(description) is not None
+
+    def setdefault(self, description: str, defaut: List[int]) -> List[int]:
+        positions = self.get(description)
+        if positions is None:
+            positions = defaut
+            (self._complet if self._complet is not None else self._consultees)[description] = positions
+        return positions
+
+    def __setitem__(self, description: str, positions: List[int]):
+        (self._complet if self._complet is not None else self._consultees)[description] = positions
+
+    def __delitem__(self, description: str):
+        if self._complet is not None:
+            del self._complet[description]
+        else:
+            self[description]
+            self._consultees[description] = None
+
+    def _materialiser(self) -> Dict[str, List[int]]:
+        if self._complet is None:
+            descriptions = list(self._descriptions)
+            complet: Dict[str, List[int]] = {}
+            for position in sorted(self._positions.tolist()):
+                complet.setdefault(descriptions[position], []).append(position)
+            for description, positions in self._consultees.items():
+                if positions is None:
+                    complet.pop(description, None)
+                else:
+                    complet[description] = positions
+            self._complet, self._consultees = complet, {}
+        return self._complet
+
+    def __len__(self) -> int:
+        return len(self._materialiser())
+
+    def __iter__(self):
+        return iter(self._materialiser())
+
+    def values(self):
+        return self._materialiser().values()
+
+    def items(self):
+        return self._materialiser().items()
+
+
+def sauvegarder_cas(protocole: ProtocoleEspritCritique, chemin: str):
+    """
+    Écrit l'état complet d'un protocole (écriture atomique via fichier temporaire)
+    """
+    if isinstance(protocole.faits, EntrepotFaits):
+        entrepot = protocole.faits
+    else:
+        entrepot = EntrepotFaits()
+        for fait in protocole.faits:
+            fait.synchroniser_agregats()
+            entrepot.append(fait)
+
+    # Signatures d'opposition : évite de réétiqueter les faits au rechargement
+    index = protocole._synchroniser_index()
+    signatures, groupes = index.groupes_signatures()
+    signature_par_fait = array("i", [-1]) * len(entrepot)
+    for s, positions in enumerate(groupes):
+        for position in positions:
+            signature_par_fait[position] = s
+
+    # Sources du cas seulement, renumérotées : un registre partagé entre cas
+    # (cf. RegistreSourcesPartage) contient aussi celles des autres cas
+    sources_fait, liens = entrepot._sources_fait, entrepot._lien_source
+    identifiants = sorted({identifiant for identifiant in sources_fait if identifiant >= 0}.union(liens))
+    sources = [entrepot.registre[identifiant] for identifiant in identifiants]
+    if len(identifiants) < len(entrepot.registre):
+        rangs = {identifiant: rang for rang, identifiant in enumerate(identifiants)}
+        sources_fait = array("i", (rangs[v] if v >= 0 else v for v in sources_fait))
+        liens = array("I", (rangs[v] for v in liens))
+
+    colonnes: Dict[str, array] = {}
+    for nom, colonne in _table_chaines(entrepot.descriptions).items():
+        colonnes[f"f.desc.{nom}"] = colonne
+    colonnes.update({
+        "f.prob.i": array("I", sorted(entrepot.probabilites)),
+        "f.prob.v": array("d", (entrepot.probabilites[k] for k in sorted(entrepot.probabilites))),
+        "f.sol": entrepot.solidite_factuelle,
+        "f.scred": entrepot.somme_credibilite,
+        "f.nsrc": entrepot.nombre_sources,
+        "f.conf": entrepot.confirme,
+        "f.src": sources_fait,
+        "f.sig": signature_par_fait,
+        "l.src": liens,
+        "l.suiv": entrepot._lien_suivant,
+    })
+    # Index description -> positions des faits non retirés, trié par
+    # empreinte (ordre des positions conservé) : consulté dans la projection
+    # au rechargement
+    empreintes = array("I", (_empreinte_description(description) for description in entrepot.descriptions))
+    ordre = sorted((position for position in range(len(entrepot)) if position not in protocole._faits_retires),
+                   key=empreintes.__getitem__)
+    colonnes["d.emp"] = array("I", (empreintes[position] for position in ordre))
+    colonnes["d.pos"] = array("I", ordre)
+    for rang, type_source in enumerate(_TYPES_SOURCE):
+        colonnes[f"f.type{rang}"] = entrepot.comptes_par_type[type_source]
+
+    # Sources internées
+    for nom, colonne in _table_chaines(s.nom for s in sources).items():
+        colonnes[f"s.nom.{nom}"] = colonne
+    colonnes["s.type"] = array("b", (_TYPES_SOURCE.index(s.type_source) for s in sources))
+    colonnes["s.cred"] = array("d", (s.credibilite for s in sources))
+    colonnes["s.rat"] = array("b", (bool(s.raisonnement_rationnel) for s in sources))
+    colonnes["s.inf.nb"] = array("I", (len(s.informations) for s in sources))
+    for nom, colonne in _table_chaines(info for s in sources for info in s.informations).items():
+        colonnes[f"s.inf.{nom}"] = colonne
+
+    # Contradictions : positions des deux faits, niveau, validation
+    positions_a, positions_b = array("I"), array("I")
+    niveaux, validees = array("d"), array("b")
+    if isinstance(protocole.contradictions, EntrepotContradictions):
+        stock = protocole.contradictions
+        for ligne in range(len(stock.active)):
+            if stock.active[ligne]:
+                positions_a.append(stock.position_a[ligne])
+                positions_b.append(stock.position_b[ligne])
+                niveaux.append(stock.niveau_incompatibilite[ligne])
+                validees.append(stock.validee[ligne])
+    else:
+        position_par_fait = {id(fait): k for k, fait in enumerate(protocole.faits)}
+        derniere_position = {d: positions[-1] for d, positions in protocole._positions_par_description.items()}
+        for contradiction in protocole.contradictions:
+            for reference, description, cible in ((contradiction.ref_fait_a, contradiction.fait_a, positions_a),
+                                                  (contradiction.ref_fait_b, contradiction.fait_b, positions_b)):
+                cible.append(position_par_fait.get(id(reference), derniere_position.get(description, 0)))
+            niveaux.append(contradiction.niveau_incompatibilite)
+            validees.append(bool(contradiction.validee_independamment))
+    colonnes.update({"c.a": positions_a, "c.b": positions_b, "c.niv": niveaux, "c.val": validees})
+
+    meta = {
+        "version": VERSION_FORMAT,
+        "ordre_octets": sys.byteorder,
+        "nombre_faits": len(entrepot),
+        "nombre_sources": len(sources),
+        "nombre_contradictions": len(niveaux),
+        "compteur_anomalies": protocole.compteur_anomalies,
+        "anomalies_validees": protocole.anomalies_validees,
+        "seuil_minimum_anomalies": protocole.seuil_minimum_anomalies,
+        "paires_opposition": [list(paire) for paire in protocole.paires_opposition],
+        "signatures": [sorted(signature) for signature in signatures],
+        "variantes": {str(indice): variantes for indice, variantes in entrepot.variantes.items()},
+        "faits_retires": sorted(protocole._faits_retires),
+        "types_colonnes": {nom: colonne.typecode for nom, colonne in colonnes.items()},
+        "scores": protocole.calcul_bayesien_probabilites() if len(protocole.faits) else None,
+    }
+    _ecrire(chemin, meta, colonnes)
+
+
+def _ecrire(chemin: str, meta: Dict, colonnes: Dict[str, array]):
+    octets_meta = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+    debut_donnees = len(MAGIC) + 4 + len(octets_meta) + 4 + _ENTREE_REPERTOIRE.size * len(colonnes)
+    debut_donnees += -debut_donnees % 8
+
+    repertoire = []
+    decalage = debut_donnees
+    for nom, colonne in colonnes.items():
+        longueur = len(colonne) * colonne.itemsize
+        repertoire.append(_ENTREE_REPERTOIRE.pack(nom.encode("ascii"), decalage, longueur))
+        decalage += longueur + (-longueur % 8)
+
+    temporaire = f"{chemin}.tmp"
+    with open(temporaire, "wb") as fichier:
+        fichier.write(MAGIC)
+        fichier.write(struct.pack("<I", len(octets_meta)))
+        fichier.write(octets_meta)
+        fichier.write(struct.pack("<I", len(colonnes)))
+        fichier.write(b"".join(repertoire))
+        fichier.write(b"\0" * (debut_donnees - fichier.tell()))
+        for colonne in colonnes.values():
+            longueur = len(colonne) * colonne.itemsize
+            colonne.tofile(fichier)
+            fichier.write(b"\0" * (-longueur % 8))
+    os.replace(temporaire, chemin)
+
+
+class CasStocke:
+    """
+    Cas ouvert par projection mémoire ; rien n'est décodé avant usage
+    """
+
+    def __init__(self, chemin: str):
+        self._fichier = open(chemin, "rb")
+        self._projection = mmap.mmap(self._fichier.fileno(), 0, access=mmap.ACCESS_READ)
+        self._vue = memoryview(self._projection)
+        if bytes(self._vue[:len(MAGIC)]) != MAGIC:
+            self.fermer()
+            raise ValueError(f"{chemin} n'est pas un cas sauvegardé par le protocole")
+
+        position = len(MAGIC)
+        (longueur_meta,) = struct.unpack_from("<I", self._projection, position)
+        position += 4
+        self.meta = json.loads(bytes(self._vue[position:position + longueur_meta]).decode("utf-8"))
+        if self.meta["version"] != VERSION_FORMAT:
+            self.fermer()
+            raise ValueError(f"version de format non prise en charge : {self.meta['version']}")
+        position += longueur_meta
+        (nombre_sections,) = struct.unpack_from("<I", self._projection, position)
+        position += 4
+        self._sections = {}
+        for _ in range(nombre_sections):
+            nom, decalage, longueur = _ENTREE_REPERTOIRE.unpack_from(self._projection, position)
+            self._sections[nom.rstrip(b"\0").decode("ascii")] = (decalage, longueur)
+            position += _ENTREE_REPERTOIRE.size
+        self._vues_exportees: Dict[str, memoryview] = {}  # une vue par colonne, libérée par fermer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+    def __len__(self) -> int:
+        return self.meta["nombre_faits"]
+
+    @property
+    def scores(self) -> Optional[Dict]:
+        """
+        Probabilités bayésiennes calculées à la sauvegarde
+        """
+        return self.meta["scores"]
+
+    def colonne(self, nom: str) -> memoryview:
+        """
+        Vue typée sans copie sur une colonne du fichier (valide jusqu'à fermer())
+        """
+        vue = self._vues_exportees.get(nom)
+        if vue is None:
+            vue = self._vues_exportees[nom] = self._vue_colonne(self._vue, nom)
+        return vue
+
+    def _vue_colonne(self, projection: memoryview, nom: str) -> memoryview:
+        decalage, longueur = self._sections[nom]
+        code = self.meta["types_colonnes"][nom]
+        if self.meta["ordre_octets"] != sys.byteorder:
+            colonne = array(code, bytes(projection[decalage:decalage + longueur]))
+            colonne.byteswap()
+            return memoryview(colonne)
+        return projection[decalage:decalage + longueur].cast(code)
+
+    def _colonnes_independantes(self, *noms: str) -> List[memoryview]:
+        """
+        Vues sur une projection propre, non libérée par fermer() : le
+        protocole reconstruit peut survivre au CasStocke. La projection est
+        libérée avec la dernière vue (ramasse-miettes).
+        """
+        vue = memoryview(mmap.mmap(self._fichier.fileno(), 0, access=mmap.ACCESS_READ))
+        return [self._vue_colonne(vue, nom) for nom in noms]
+
+    def _tableau(self, nom: str) -> array:
+        """
+        Copie d'une colonne dans un tableau modifiable (copie mémoire brute)
+        """
+        decalage, longueur = self._sections[nom]
+        colonne = array(self.meta["types_colonnes"][nom])
+        colonne.frombytes(self._vue[decalage:decalage + longueur])
+        if self.meta["ordre_octets"] != sys.byteorder:
+            colonne.byteswap()
+        return colonne
+
+    def descriptions(self) -> _TableChainesProjetee:
+        return _TableChainesProjetee(self.colonne("f.desc.txt"), self.colonne("f.desc.off"))
+
+    def description(self, indice: int) -> str:
+        return self.descriptions()[indice]
+
+    def fait(self, indice: int) -> Dict:
+        """
+        Lecture ponctuelle d'un fait sans charger le cas
+        """
+        return {
+            "description": self.description(indice),
+            "probabilite": self._probabilite(indice),
+            "solidite_factuelle": self.colonne("f.sol")[indice],
+            "confirme_par_multiples_sources": bool(self.colonne("f.conf")[indice]),
+            "nombre_sources": self.colonne("f.nsrc")[indice],
+            "variantes": self.meta.get("variantes", {}).get(str(indice), []),
+        }
+
+    def _probabilite(self, indice: int) -> float:
+        indices = self.colonne("f.prob.i")
+        rang = bisect_left(indices, indice)
+        if rang < len(indices) and indices[rang] == indice:
+            return self.colonne("f.prob.v")[rang]
+        return EntrepotFaits.PROBABILITE_DEFAUT
+
+    def _sources(self) -> List[Source]:
+        noms = _TableChainesProjetee(self.colonne("s.nom.txt"), self.colonne("s.nom.off")).decoder_tout()
+        informations = _TableChainesProjetee(self.colonne("s.inf.txt"), self.colonne("s.inf.off")).decoder_tout()
+        types, credibilites = self.colonne("s.type").tolist(), self.colonne("s.cred").tolist()
+        rationnels, nombres = self.colonne("s.rat").tolist(), self.colonne("s.inf.nb").tolist()
+        sources, curseur = [], 0
+        for k in range(self.meta["nombre_sources"]):
+            infos = informations[curseur:curseur + nombres[k]]
+            curseur += nombres[k]
+            sources.append(Source(noms[k], _TYPES_SOURCE[types[k]], credibilites[k], infos, bool(rationnels[k])))
+        return sources
+
+    def protocole(self, mode_compact: bool = True, **options) -> ProtocoleEspritCritique:
+        """
+        Reconstruit un protocole prêt pour l'ingestion incrémentale
+        (descriptions décodées à la demande en mode compact, depuis une
+        projection propre au protocole : le cas peut être fermé ensuite)
+
+        Avec registre_sources, les sources du cas sont internées dans le
+        registre partagé : les crédibilités qu'il tient font foi, et ses
+        modifications ultérieures valent aussi pour le cas rechargé.
+        """
+        protocole = ProtocoleEspritCritique(mode_compact=mode_compact, **options)
+        sources = self._sources()
+        partage = protocole.registre_sources
+        if partage is None:
+            registre = RegistreSources()
+            for source in sources:
+                registre.interner(source)
+        else:
+            registre = partage
+            identifiants = [partage.interner(source) for source in sources]
+            divergentes = {identifiant for identifiant, source in zip(identifiants, sources)
+                           if partage.credibilites[identifiant] != source.credibilite}
+
+        entrepot = EntrepotFaits(registre)
+        entrepot.descriptions = (_TableChainesProjetee(*self._colonnes_independantes("f.desc.txt", "f.desc.off"))
+                                 if mode_compact else self.descriptions().decoder_tout())
+        entrepot.probabilites = dict(zip(self.colonne("f.prob.i").tolist(), self.colonne("f.prob.v").tolist()))
+        entrepot.solidite_factuelle = self._tableau("f.sol")
+        entrepot.somme_credibilite = self._tableau("f.scred")
+        entrepot.nombre_sources = self._tableau("f.nsrc")
+        entrepot.confirme = self._tableau("f.conf")
+        entrepot._sources_fait = self._tableau("f.src")
+        entrepot._lien_source = self._tableau("l.src")
+        entrepot._lien_suivant = self._tableau("l.suiv")
+        if partage is not None:
+            # Identifiants du fichier renumérotés dans le registre partagé
+            for position, tete in enumerate(entrepot._sources_fait):
+                if tete >= 0:
+                    entrepot._sources_fait[position] = identifiants[tete]
+            entrepot._lien_source = array("I", [identifiants[k] for k in entrepot._lien_source])
+        for rang, type_source in enumerate(_TYPES_SOURCE):
+            entrepot.comptes_par_type[type_source] = self._tableau(f"f.type{rang}")
+        entrepot.variantes = {int(indice): variantes
+                              for indice, variantes in self.meta.get("variantes", {}).items()}
+
+        if mode_compact:
+            protocole.faits = entrepot
+        else:
+            protocole.faits = [Fait(v.description, v.sources, v.probabilite,
+                                    v.confirme_par_multiples_sources, v.solidite_factuelle, v.variantes)
+                               for v in entrepot]
+
+        protocole.compteur_anomalies = self.meta["compteur_anomalies"]
+        protocole.anomalies_validees = self.meta["anomalies_validees"]
+        protocole.seuil_minimum_anomalies = self.meta["seuil_minimum_anomalies"]
+
+        # Index des oppositions repris des signatures si le vocabulaire n'a pas
+        # changé ; sinon les faits sont réétiquetés. Les faits retirés (sans
+        # source, cf. retirer_source) le restent.
+        retires = set(self.meta.get("faits_retires", ()))
+        index = IndexOppositions(protocole.paires_opposition, protocole._termes_presents)
+        if [list(p) for p in protocole.paires_opposition] == self.meta["paires_opposition"]:
+            signatures = [frozenset(s) for s in self.meta["signatures"]]
+            vide = frozenset()
+            signature_par_fait = self.colonne("f.sig").tolist()
+            index.termes_par_fait = [signatures[s] if s >= 0 else vide for s in signature_par_fait]
+            for position, s in enumerate(signature_par_fait):
+                if s >= 0:
+                    for terme in signatures[s]:
+                        index.faits_par_terme.setdefault(terme, []).append(position)
+            index.retires = set(retires)
+            protocole._positions_par_description = _PositionsParDescriptionProjetees(
+                entrepot.descriptions, *self._colonnes_independantes("d.emp", "d.pos"))
+        protocole._index_oppositions = index
+        protocole._faits_indexes = protocole.faits
+        protocole._faits_retires = retires
+        protocole._synchroniser_index()
+
+        contradictions = protocole._liste_contradictions_vide()
+        positions_a, positions_b = self.colonne("c.a"), self.colonne("c.b")
+        niveaux, validees = self.colonne("c.niv"), self.colonne("c.val")
+        if isinstance(contradictions, EntrepotContradictions):
+            contradictions.position_a = self._tableau("c.a")
+            contradictions.position_b = self._tableau("c.b")
+            contradictions.niveau_incompatibilite = self._tableau("c.niv")
+            contradictions.validee = self._tableau("c.val")
+            contradictions.active = array("b", [1]) * len(niveaux)
+            contradictions._nombre_actives = len(niveaux)
+            for ligne, vue in enumerate(contradictions):
+                protocole._contradictions_par_paire[(positions_a[ligne], positions_b[ligne])] = vue
+        else:
+            for ligne in range(len(niveaux)):
+                fait_a, fait_b = protocole.faits[positions_a[ligne]], protocole.faits[positions_b[ligne]]
+                contradiction = Contradiction(fait_a.description, fait_b.description, niveaux[ligne],
+                                              bool(validees[ligne]), ref_fait_a=fait_a, ref_fait_b=fait_b)
+                contradictions.append(contradiction)
+                protocole._contradictions_par_paire[(positions_a[ligne], positions_b[ligne])] = contradiction
+        protocole.contradictions = contradictions
+        protocole.invalider_cache()
+        if partage is not None and divergentes:
+            protocole._recalculer_faits_des_sources(divergentes)
+        return protocole
+
+    def fermer(self):
+        for vue in self._vues_exportees.values():
+            vue.release()
+        self._vues_exportees = {}
+        self._vue.release()
+        self._projection.close()
+        self._fichier.close()
+
+
+def ouvrir_cas(chemin: str) -> CasStocke:
+    """
+    Ouvre un cas sauvegardé sans le charger (lecture de l'en-tête seulement)
+    """
+    return CasStocke(chemin)
+
+
+def charger_cas(chemin: str, mode_compact: bool = True, **options) -> ProtocoleEspritCritique:
+    """
+    Raccourci : ouvre le fichier et reconstruit le protocole
+
+    En mode compact les descriptions restent projetées depuis le fichier,
+    par une projection propre au protocole.
+    """
+    with CasStocke(chemin) as cas:
+        return cas.protocole(mode_compact, **options)
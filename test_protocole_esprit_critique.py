@@ -0,0 +1,1072 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests du protocole esprit critique : équivalences entre les chemins
+optimisés et le calcul de référence, et cas limites.
+
+    python -m pytest -q test_protocole_esprit_critique.py
+    python -m unittest test_protocole_esprit_critique
+"""
+
+import asyncio
+import dataclasses
+import datetime
+import gzip
+import json
+import math
+import os
+import random
+import re
+import tempfile
+import tracemalloc
+import unittest
+import unittest.mock
+
+from protocole_esprit_critique import (ProtocoleEspritCritique, Source, TypeSource, AutomateMotsCles,
+                                       FenetreSynchronisation, Instrumentation, charger_regles,
+                                       normaliser_texte, np, RegistreSourcesPartage, TexteNormalise,
+                                       _mediane_haute, _selection)
+from protocole_esprit_critique_asynchrone import ProtocoleAsynchrone
+from protocole_esprit_critique_benchmark import (generer_corpus, ParametresCorpus, comparer_a_reference, verifier,
+                                                 RegressionPerformance, ETAPES, VERSION_RAPPORT)
+from protocole_esprit_critique_flux import lire_cas, analyser_flux, source_depuis_dict, main as main_flux
+from protocole_esprit_critique_lot import analyser_lot, analyser_cas, CasAnalyse, _cas_synthetiques
+from protocole_esprit_critique_parallele import identifier_contradictions_parallele
+from protocole_esprit_critique_serveur import ServeurProtocole, ClientProtocole, ErreurRequete
+from protocole_esprit_critique_stockage import sauvegarder_cas, charger_cas, ouvrir_cas
+
+CORPUS = generer_corpus(600, 3, ParametresCorpus(densite_anomalies=0.3, taux_opposition=0.15))
+
+
+def _protocole(**options) -> ProtocoleEspritCritique:
+    protocole = ProtocoleEspritCritique(**options)
+    protocole.collecter_informations(CORPUS.sources, limite_anomalies=10 ** 6)
+    return protocole
+
+
+def _resume(contradictions):
+    return sorted((c.fait_a, c.fait_b, c.niveau_incompatibilite, bool(c.validee_independamment))
+                  for c in contradictions)
+
+
+class TestEquivalences(unittest.TestCase):
+
+    def test_index_equivaut_au_balayage_n2(self):
+        protocole = _protocole()
+        attendu = []
+        for i, fait_a in enumerate(protocole.faits):
+            for fait_b in protocole.faits[i + 1:]:
+                if protocole._sont_contradictoires(fait_a.description, fait_b.description):
+                    niveau = protocole._calculer_niveau_contradiction(fait_a, fait_b)
+                    if niveau > 0.6:
+                        attendu.append((fait_a.description, fait_b.description, niveau))
+        obtenu = [r[:3] for r in _resume(protocole.identifier_contradictions())]
+        self.assertTrue(attendu)
+        self.assertEqual(obtenu, sorted(attendu))
+
+    def test_automate_equivaut_aux_recherches_de_sous_chaines(self):
+        protocole = ProtocoleEspritCritique()
+        automate = protocole.automate
+        informations = [info for source in CORPUS.sources for info in source.informations]
+        aleatoire = random.Random(0)
+        textes = informations[:300] + [" ".join(aleatoire.sample(informations, 12)) for _ in range(50)]
+        textes += ["Effondrement par FEU, chute libre", "températures insuffisantes", "sans impacts"]
+        for texte in textes:
+            attendu = frozenset(mot for mot in automate.motifs
+                                if re.search(r"(?<![^\W\d_])" + re.escape(mot), normaliser_texte(texte)))
+            self.assertEqual(automate.rechercher(texte), attendu)
+            self.assertEqual(automate.rechercher(TexteNormalise(texte)), attendu)
+        self.assertEqual(AutomateMotsCles(["possible", "impossible"]).rechercher("IMPOSSIBLE"), {"impossible"})
+        self.assertEqual(AutomateMotsCles(["covid19", "n°3"]).rechercher("Cas COVID19, n°3"), {"covid19", "n°3"})
+
+    def test_accents_et_casse_ignores(self):
+        protocole = ProtocoleEspritCritique()
+        for texte in ("Une incoherence", "Une INCOHÉRENCE", "une incohérence"):
+            self.assertTrue(protocole._est_anomalie(texte), texte)
+        self.assertEqual(normaliser_texte("Cœur Élevé ﬁn"), "coeur eleve fin")
+        # En début de mot seulement, avec ou sans accents (même règle pour tous les textes)
+        automate = AutomateMotsCles(["élevé"])
+        for texte in ("Niveau eleve", "Niveau ÉLEVÉ", "Niveaux élevés", "l'élévé"):
+            self.assertEqual(automate.rechercher(texte), {"eleve"}, texte)
+        for texte in ("Niveau surélevé", "Niveau sureleve", "Niveau relevé", "Niveau élargi"):
+            self.assertEqual(automate.rechercher(texte), frozenset(), texte)
+        self.assertTrue(protocole._sont_contradictoires("Suspect present", "Suspect ABSENT"))
+
+    def test_textes_normalises_une_fois_par_fait(self):
+        import protocole_esprit_critique as module
+        texte = TexteNormalise("L'INCOHÉRENCE du témoin, l'incohérence 2")
+        self.assertEqual(texte.forme, "l'incoherence du temoin, l'incoherence 2")
+        self.assertEqual(texte.jetons, ("l", "incoherence", "du", "temoin"))
+        self.assertIs(texte.jetons[1], TexteNormalise("incohérence").jetons[0])
+        for mode_compact in (False, True):
+            protocole = _protocole(mode_compact=mode_compact)
+            attendu = _resume(protocole.identifier_contradictions())
+            fait = protocole.faits[3]
+            self.assertEqual(fait.texte_normalise.jetons, TexteNormalise(fait.description).jetons)
+            # Index reconstruit : les faits ne sont pas normalisés à nouveau, seule la
+            # forme de ceux qui ont tous les mots d'un mot-clé composé est recalculée
+            with unittest.mock.patch.object(module, "normaliser_texte", wraps=module.normaliser_texte) as appels:
+                protocole.invalider_cache()
+                protocole._faits_indexes = None
+                self.assertEqual(_resume(protocole.identifier_contradictions()), attendu)
+            composes = sum(any(all(mot in " ".join(f.texte_normalise.jetons) for mot in motif.split())
+                               for motif in protocole.automate.motifs if " " in motif)
+                           for f in protocole.faits)
+            self.assertLessEqual(appels.call_count, composes)
+        fait = module.Fait("Une INCOHÉRENCE", [])
+        fait.texte_normalise
+        with unittest.mock.patch.object(module, "normaliser_texte") as appels:
+            self.assertEqual(fait.texte_normalise.jetons, ("une", "incoherence"))
+        self.assertEqual(appels.call_count, 0)
+        fait.description = "Autre description"
+        self.assertEqual(fait.texte_normalise.jetons, ("autre", "description"))
+
+    def test_ingestion_incrementale_equivaut_au_recalcul(self):
+        protocole = ProtocoleEspritCritique()
+        for source in CORPUS.sources:
+            protocole.ajouter_source(source, limite_anomalies=10 ** 6)
+        incrementales = _resume(protocole.contradictions)
+        self.assertTrue(incrementales)
+        self.assertEqual(incrementales, _resume(protocole.identifier_contradictions()))
+
+    def test_agregats_courants_des_faits(self):
+        for mode_compact in (False, True):
+            protocole = ProtocoleEspritCritique(mode_compact=mode_compact)
+            for source in CORPUS.sources:
+                protocole.ajouter_source(source, limite_anomalies=10 ** 6)
+            for source in CORPUS.sources[::40]:
+                protocole.retirer_source(source)
+            multiples = 0
+            for fait in protocole.faits:
+                sources = fait.sources
+                self.assertEqual(fait.nombre_sources, len(sources))
+                self.assertAlmostEqual(fait.somme_credibilite, sum(s.credibilite for s in sources), places=12)
+                par_type = {}
+                for source in sources:
+                    par_type[source.type_source] = par_type.get(source.type_source, 0) + 1
+                self.assertEqual(fait.sources_par_type, par_type)
+                multiples += len(par_type) > 1
+            self.assertTrue(multiples)
+
+    def test_validation_par_index_des_descriptions(self):
+        protocole = _protocole()
+        # Une seconde collecte ajoute des faits de même description
+        protocole.collecter_informations(CORPUS.sources[:60], limite_anomalies=10 ** 6)
+        contradictions = protocole.identifier_contradictions()
+        self.assertTrue(any(c.validee_independamment for c in contradictions))
+        doublons = 0
+        for contradiction in contradictions:
+            faits = [f for f in protocole.faits if f.description in (contradiction.fait_a, contradiction.fait_b)]
+            doublons += len(faits) > 2
+            attendu = (len(faits) >= 2 and all(f.solidite_factuelle > 0.6 for f in faits)
+                       and contradiction.niveau_incompatibilite > 0.7)
+            self.assertEqual(protocole._valider_contradiction(contradiction), attendu)
+            self.assertEqual(bool(contradiction.validee_independamment), attendu)
+        self.assertTrue(doublons)
+        # Liste des faits réaffectée : l'index est reconstruit
+        protocole.faits = protocole.faits[::2]
+        for fait in protocole.faits[:50]:
+            self.assertEqual(protocole.faits_par_description(fait.description),
+                             [f for f in protocole.faits if f.description == fait.description])
+
+    def test_mode_compact_equivaut_au_mode_objets(self):
+        objets, compact = _protocole(), _protocole(mode_compact=True)
+        self.assertEqual(_resume(objets.identifier_contradictions()),
+                         _resume(compact.identifier_contradictions()))
+        self.assertEqual(objets.calcul_bayesien_probabilites(), compact.calcul_bayesien_probabilites())
+        self.assertEqual([f.sources for f in objets.faits], [f.sources for f in compact.faits])
+
+    def test_index_des_descriptions_compact_equivaut_au_dictionnaire(self):
+        index = {}
+        for mode_compact in (False, True):
+            protocole = ProtocoleEspritCritique(mode_compact=mode_compact)
+            for source in CORPUS.sources:
+                protocole.ajouter_source(source, limite_anomalies=10 ** 6)
+            for source in CORPUS.sources[::25]:
+                protocole.retirer_source(source)
+            protocole.collecter_informations(CORPUS.sources[:40], limite_anomalies=10 ** 6)
+            protocole.identifier_contradictions()
+            index[mode_compact] = dict(protocole._positions_par_description.items())
+            self.assertEqual(len(protocole._positions_par_description), len(index[mode_compact]))
+            for description, positions in index[mode_compact].items():
+                self.assertEqual(protocole._positions_par_description.get(description), positions)
+        self.assertTrue(any(len(positions) > 1 for positions in index[True].values()))
+        self.assertEqual(index[True], index[False])
+
+    def test_mode_compact_divise_la_memoire_par_cinq(self):
+        corpus = generer_corpus(20000, 0)
+        octets = {}
+        for mode_compact in (False, True):
+            tracemalloc.start()
+            try:
+                protocole = ProtocoleEspritCritique(mode_compact=mode_compact)
+                octets[mode_compact] = []
+                for etape in (lambda: protocole.collecter_informations(corpus.sources),
+                              protocole.identifier_contradictions, protocole.calcul_bayesien_probabilites,
+                              lambda: protocole.livrer_conclusion(corpus.acteurs, corpus.evenements)):
+                    etape()
+                    octets[mode_compact].append(tracemalloc.get_traced_memory()[0])
+                del protocole
+            finally:
+                tracemalloc.stop()
+        for objets, compact in zip(octets[False], octets[True]):
+            self.assertGreater(objets, 5 * compact)
+
+    @unittest.skipIf(np is None, "NumPy absent")
+    def test_vectorise_equivaut_au_scalaire(self):
+        scalaire, vectorise = _protocole(), _protocole(vectorise=True)
+        attendu = _resume(scalaire.identifier_contradictions())
+        obtenu = _resume(vectorise.identifier_contradictions())
+        self.assertEqual([r[:2] + r[3:] for r in obtenu], [r[:2] + r[3:] for r in attendu])
+        for a, b in zip(obtenu, attendu):
+            self.assertAlmostEqual(a[2], b[2], places=12)
+        for cle, valeur in scalaire.calcul_bayesien_probabilites().items():
+            self.assertAlmostEqual(vectorise.calcul_bayesien_probabilites()[cle], valeur, places=12)
+
+    def test_retrait_de_source_equivaut_a_l_ingestion_sans_elle(self):
+        retirees = CORPUS.sources[::150]
+        restantes = [source for source in CORPUS.sources if all(source is not r for r in retirees)]
+        for mode_compact in (False, True):
+            protocole = _protocole(mode_compact=mode_compact)
+            protocole.identifier_contradictions()
+            protocole.calcul_bayesien_probabilites()
+            bilans = [protocole.retirer_source(source) for source in retirees]
+            self.assertTrue(sum(bilan["faits_retires"] for bilan in bilans))
+            self.assertTrue(sum(bilan["contradictions_retirees"] for bilan in bilans))
+
+            reference = ProtocoleEspritCritique(mode_compact=mode_compact)
+            reference.collecter_informations(restantes, limite_anomalies=10 ** 6)
+            attendu = _resume(reference.identifier_contradictions())
+            self.assertEqual(_resume(protocole.contradictions), attendu)
+            self.assertEqual(_resume(protocole.identifier_contradictions()), attendu)
+            for cle, valeur in reference.calcul_bayesien_probabilites().items():
+                self.assertAlmostEqual(protocole.calcul_bayesien_probabilites()[cle], valeur, places=12)
+            faits = sorted((f.description, f.nombre_sources, f.solidite_factuelle,
+                            f.confirme_par_multiples_sources) for f in protocole.faits if f.nombre_sources)
+            self.assertEqual(faits, sorted((f.description, f.nombre_sources, f.solidite_factuelle,
+                                            f.confirme_par_multiples_sources) for f in reference.faits))
+            self.assertEqual(protocole.retirer_source(retirees[0])["faits_modifies"], 0)
+            if np is not None:
+                protocole.vectorise = True
+                self.assertEqual([r[:2] + r[3:] for r in _resume(protocole.identifier_contradictions())],
+                                 [r[:2] + r[3:] for r in attendu])
+
+    def test_registre_partage_entre_cas(self):
+        cible = CORPUS.sources[3]
+        modifiees = [dataclasses.replace(s, credibilite=0.2) if s is cible else s for s in CORPUS.sources]
+        for mode_compact in (False, True):
+            registre = RegistreSourcesPartage()
+            cas = []
+            for _ in range(2):
+                # Chaque cas reçoit ses propres copies des sources
+                protocole = ProtocoleEspritCritique(mode_compact=mode_compact, registre_sources=registre)
+                protocole.collecter_informations([dataclasses.replace(s) for s in CORPUS.sources], 10 ** 6)
+                protocole.identifier_contradictions()
+                cas.append(protocole)
+            self.assertEqual(len(registre), len(CORPUS.sources))
+            self.assertIs(cas[0].faits[0].sources[0], cas[1].faits[0].sources[0])
+            reference = _protocole(mode_compact=mode_compact)
+            self.assertEqual(_resume(cas[0].contradictions), _resume(reference.identifier_contradictions()))
+            self.assertEqual(cas[0].calcul_bayesien_probabilites(), reference.calcul_bayesien_probabilites())
+
+            # Une mise à jour vaut pour tous les cas
+            registre.modifier_credibilite(cible.nom, cible.type_source, 0.2)
+            reference = ProtocoleEspritCritique(mode_compact=mode_compact)
+            reference.collecter_informations(modifiees, 10 ** 6)
+            attendu = _resume(reference.identifier_contradictions())
+            for protocole in cas:
+                self.assertEqual(_resume(protocole.contradictions), attendu)
+                for cle, valeur in reference.calcul_bayesien_probabilites().items():
+                    self.assertAlmostEqual(protocole.calcul_bayesien_probabilites()[cle], valeur, places=12)
+                self.assertEqual(_resume(protocole.identifier_contradictions()), attendu)
+            # Rétractation avec l'objet d'origine : c'est la source partagée qui est retirée
+            bilan = cas[0].retirer_source(cible)
+            self.assertTrue(bilan["faits_modifies"] + bilan["faits_retires"])
+            self.assertEqual(cas[0].retirer_source(cible)["faits_modifies"], 0)
+
+    def test_modification_concurrente_du_registre(self):
+        premiere, seconde = CORPUS.sources[3], CORPUS.sources[7]
+        registre = RegistreSourcesPartage()
+        protocole = ProtocoleEspritCritique(registre_sources=registre)
+        protocole.collecter_informations([dataclasses.replace(s) for s in CORPUS.sources], 10 ** 6)
+        protocole.identifier_contradictions()
+        for credibilite in (1.5, -0.1, math.nan):
+            with self.assertRaises(ValueError):
+                registre.modifier_credibilite(premiere.nom, premiere.type_source, credibilite)
+        self.assertEqual(registre.version, 0)
+        service = ServeurProtocole(nombre_threads=1, registre_sources=registre)
+        self.addCleanup(service.fermer)
+        with self.assertRaises(ErreurRequete) as erreur:
+            asyncio.run(service.traiter("PUT", "/sources/" + premiere.nom,
+                                        json.dumps({"type_source": premiere.type_source.value,
+                                                    "credibilite": 2}).encode()))
+        self.assertEqual(erreur.exception.statut, 400)
+
+        # Seconde modification publiée juste après la lecture du journal par le cas
+        modifications_depuis = registre.modifications_depuis
+
+        def lecture_concurrente(*arguments):
+            modifiees = modifications_depuis(*arguments)
+            if registre.version == 1:
+                registre.modifier_credibilite(seconde.nom, seconde.type_source, 0.95)
+            return modifiees
+
+        registre.modifier_credibilite(premiere.nom, premiere.type_source, 0.2)
+        with unittest.mock.patch.object(registre, "modifications_depuis", lecture_concurrente):
+            protocole.identifier_contradictions()
+        self.assertEqual(registre.version, 2)
+        reference = ProtocoleEspritCritique()
+        reference.collecter_informations([dataclasses.replace(s, credibilite=0.2) if s is premiere else
+                                          dataclasses.replace(s, credibilite=0.95) if s is seconde else s
+                                          for s in CORPUS.sources], 10 ** 6)
+        self.assertEqual(_resume(protocole.identifier_contradictions()),
+                         _resume(reference.identifier_contradictions()))
+        for fait, attendu in zip(protocole.faits, reference.faits):
+            self.assertAlmostEqual(fait.solidite_factuelle, attendu.solidite_factuelle, places=12)
+
+    def test_parallele_equivaut_au_sequentiel(self):
+        import protocole_esprit_critique_parallele as parallele
+
+        def sequence(contradictions):
+            return [(c.fait_a, c.fait_b, c.niveau_incompatibilite, bool(c.validee_independamment))
+                    for c in contradictions]
+
+        for mode_compact in (False, True):
+            protocole = _protocole(mode_compact=mode_compact, instrumentation=Instrumentation(actif=True))
+            attendu = sequence(protocole.identifier_contradictions())
+            self.assertNotEqual(attendu, sorted(attendu))
+            self.assertEqual(sequence(identifier_contradictions_parallele(protocole, 2, 64, seuil_faits=0)), attendu)
+            mesures = protocole.instrumentation.instantane()
+            self.assertGreater(mesures["identifier_contradictions"]["paires_comparees"], 0)
+            self.assertEqual(mesures["identifier_contradictions_parallele"]["paires_comparees"],
+                             mesures["identifier_contradictions"]["paires_comparees"])
+            # Sous le seuil : boucle série, sans démarrer de pool
+            with unittest.mock.patch.object(parallele, "ProcessPoolExecutor", side_effect=AssertionError):
+                self.assertEqual(sequence(identifier_contradictions_parallele(
+                    protocole, 2, 64, seuil_faits=len(protocole.faits) + 1)), attendu)
+
+    def test_partitions_hors_memoire_equivalent_au_protocole(self):
+        import protocole_esprit_critique_partitions as partitions
+        for limite, numpy in ((20, np), (10 ** 6, np), (10 ** 6, None)):
+            protocole = ProtocoleEspritCritique()
+            attendu_collecte = protocole.collecter_informations(CORPUS.sources, limite_anomalies=limite)
+            contradictions = protocole.identifier_contradictions()
+            attendu = protocole.calcul_bayesien_probabilites()
+            # Une seule partition à l'écriture et mémoire minimale : redécoupage forcé
+            with unittest.mock.patch.object(partitions, "np", numpy), \
+                    partitions.AnalysePartitionnee(memoire_max=0, nombre_partitions=1,
+                                                   limite_anomalies=limite) as analyse:
+                milieu = len(CORPUS.sources) // 2
+                analyse.ingerer(iter(CORPUS.sources[:milieu]))
+                self.assertEqual(analyse.ingerer(iter(CORPUS.sources[milieu:])), attendu_collecte)
+                comptes = analyse.identifier_contradictions()
+                obtenu = analyse.calcul_bayesien_probabilites()
+            self.assertEqual(comptes["faits"], len(protocole.faits))
+            self.assertEqual(comptes["contradictions"], len(contradictions))
+            self.assertEqual(comptes["contradictions_validees"],
+                             sum(1 for c in contradictions if c.validee_independamment))
+            for cle, valeur in attendu.items():
+                self.assertAlmostEqual(obtenu[cle], valeur, places=12)
+            self.assertFalse(os.path.exists(analyse.repertoire))
+
+    def test_sensibilite_equivaut_aux_reexecutions(self):
+        import protocole_esprit_critique_sensibilite as sensibilite
+        for mode_compact in (False, True):
+            protocole = _protocole(mode_compact=mode_compact)
+            protocole.identifier_contradictions()
+            attendu = protocole.determiner_version_probable(CORPUS.acteurs, CORPUS.evenements)
+            analyse = sensibilite.AnalyseSensibilite(protocole, CORPUS.acteurs, CORPUS.evenements)
+            aleatoire = random.Random(1)
+            scenarios = [analyse.credibilites] + [[min(1.0, max(0.0, c + aleatoire.gauss(0, 0.2)))
+                                                   for c in analyse.credibilites] for _ in range(40)]
+            resultats = [analyse.simuler(credibilites=scenarios)]
+            if np is not None:
+                with unittest.mock.patch.object(sensibilite, "np", None):
+                    resultats.append(analyse.simuler(credibilites=scenarios))
+            for resultat in resultats:
+                self.assertEqual(resultat["decision_nominale"], attendu["version_plus_probable"])
+                self.assertEqual(resultat["version_plus_probable"][0], attendu["version_plus_probable"])
+                self.assertAlmostEqual(resultat["score_version_officielle"][0],
+                                       attendu["score_version_officielle"], places=12)
+                self.assertAlmostEqual(resultat["marge_decision"][0], attendu["marge_decision"], places=12)
+            self.assertEqual(resultats[0]["version_plus_probable"], resultats[-1]["version_plus_probable"])
+            for a, b in zip(resultats[0]["score_version_officielle"], resultats[-1]["score_version_officielle"]):
+                self.assertAlmostEqual(a, b, places=12)
+            # Une réexécution complète sur des crédibilités perturbées donne le même score
+            for source, credibilite in zip(analyse.sources, scenarios[1]):
+                source.credibilite = credibilite
+            try:
+                reexecution = _protocole(mode_compact=mode_compact)
+                reexecution.identifier_contradictions()
+                self.assertAlmostEqual(reexecution.determiner_version_probable(
+                    CORPUS.acteurs, CORPUS.evenements)["score_version_officielle"],
+                    resultats[0]["score_version_officielle"][1], places=12)
+            finally:
+                for source, credibilite in zip(analyse.sources, analyse.credibilites):
+                    source.credibilite = credibilite
+
+    def test_ingestion_asynchrone_equivaut_a_la_synchrone(self):
+        def etat(protocole):
+            faits = sorted((f.description, sorted(s.nom for s in f.sources)) for f in protocole.faits)
+            contradictions = sorted((tuple(sorted((c.fait_a, c.fait_b))), c.niveau_incompatibilite)
+                                    for c in protocole.contradictions)
+            return faits, contradictions
+
+        reference = ProtocoleEspritCritique()
+        for source in CORPUS.sources:
+            reference.ajouter_source(source, limite_anomalies=10 ** 6)
+        attendu = etat(reference)
+
+        async def flux(sources, latence):
+            for source in sources:
+                await asyncio.sleep(latence)
+                yield source
+
+        async def scenario():
+            # Quatre flux concurrents, file courte : les producteurs attendent le consommateur
+            async with ProtocoleAsynchrone(taille_file=2, taille_lot=3, limite_anomalies=10 ** 6) as protocole:
+                stats = await protocole.ingerer(*(flux(CORPUS.sources[k::4], 0.001 * k) for k in range(4)))
+            self.assertEqual(stats["sources_ingerees"], len(CORPUS.sources))
+            self.assertEqual(stats["contradictions"], protocole.nouvelles_contradictions)
+            sequentiel = ProtocoleEspritCritique()
+            bilans = [bilan async for bilan in sequentiel.ingerer_sources_async(flux(CORPUS.sources, 0), 10 ** 6)]
+            self.assertEqual(len(bilans), len(CORPUS.sources))
+            return protocole.protocole, sequentiel
+
+        for protocole in asyncio.run(asyncio.wait_for(scenario(), timeout=60)):
+            faits, contradictions = etat(protocole)
+            self.assertEqual(faits, attendu[0])
+            self.assertEqual([c[0] for c in contradictions], [c[0] for c in attendu[1]])
+            for (_, niveau), (_, niveau_attendu) in zip(contradictions, attendu[1]):
+                self.assertAlmostEqual(niveau, niveau_attendu, places=12)
+
+    def test_quasi_doublons_fusionnes(self):
+        reference = "Le suspect a été vu devant la banque centrale le mardi 12 mars vers 21h30"
+        reformulee = "Le suspect a ete vu devant la banque centrale le mardi 12 mars vers 21h35"
+        etrangere = "La météo annonçait un temps sec sur toute la région ce jour-là"
+        sources = [Source("Témoin", TypeSource.TEMOIGNAGE, 0.8, [reference]),
+                   Source("Presse", TypeSource.OFFICIELLE, 0.6, [reformulee, etrangere])]
+        protocole = ProtocoleEspritCritique(seuil_quasi_doublons=0.8)
+        protocole.collecter_informations(sources)
+        self.assertEqual(sorted(f.description for f in protocole.faits), sorted([reference, etrangere]))
+        fait = protocole.faits_par_description(reference)[0]
+        self.assertEqual([s.nom for s in fait.sources], ["Témoin", "Presse"])
+        self.assertEqual([v for v, _ in protocole.expliquer_variantes(fait)], [reformulee])
+        self.assertGreaterEqual(protocole.expliquer_variantes(fait)[0][1], 0.8)
+        self.assertEqual(protocole.faits_par_description(etrangere)[0].nombre_sources, 1)
+        # Sans seuil, la reformulation reste un fait distinct, comme avant la fusion
+        sans_fusion = ProtocoleEspritCritique()
+        sans_fusion.collecter_informations(sources)
+        self.assertEqual(len(sans_fusion.faits), 3)
+        self.assertFalse(any(f.variantes for f in sans_fusion.faits))
+        self.assertEqual(sorted(f.description for f in sans_fusion.faits),
+                         sorted([reference, reformulee, etrangere]))
+        self.assertTrue(all(f.nombre_sources == 1 for f in sans_fusion.faits))
+
+    def test_ajout_incremental_avec_fusion(self):
+        # Chaque source est suivie d'une reformulation de ses informations
+        sources = []
+        for source in CORPUS.sources:
+            sources.append(source)
+            sources.append(dataclasses.replace(source, nom=source.nom + " (relais)",
+                                               informations=[i + " !" for i in source.informations]))
+        collecte = ProtocoleEspritCritique(seuil_quasi_doublons=0.8)
+        collecte.collecter_informations(sources, limite_anomalies=10 ** 6)
+        incremental = ProtocoleEspritCritique(seuil_quasi_doublons=0.8)
+        for source in sources:
+            incremental.ajouter_source(source, limite_anomalies=10 ** 6)
+
+        def faits(protocole):
+            return sorted((f.description, sorted(s.nom for s in f.sources), sorted(f.variantes))
+                          for f in protocole.faits)
+        self.assertEqual(faits(incremental), faits(collecte))
+        self.assertTrue(any(f.variantes for f in collecte.faits))
+        self.assertEqual(_resume(incremental.contradictions), _resume(collecte.identifier_contradictions()))
+
+    def test_classement_cui_bono_equivaut_a_l_analyse(self):
+        protocole = ProtocoleEspritCritique()
+        aleatoire = random.Random(2)
+        for nombre in (1, 2, 7, 2000):
+            acteurs = [{"nom": f"Acteur {k}", "gains": ["pouvoir"] * aleatoire.randint(0, 6),
+                        "pouvoir": aleatoire.random()} for k in range(nombre)]
+            analyse = protocole.analyser_cui_bono(acteurs)
+            classement = protocole.classer_cui_bono(iter(acteurs), k=5)
+            self.assertEqual(classement["analyse_non_concluante"], bool(analyse.get("analyse_non_concluante")))
+            scores = sorted(len(a["gains"]) * a["pouvoir"] for a in acteurs)
+            self.assertEqual(classement["score_median"], scores[nombre // 2] if nombre > 1 else scores[-1])
+            self.assertEqual(list(classement["beneficiaires"].values()), scores[::-1][:5])
+        self.assertEqual(protocole.classer_cui_bono(iter(())), {})
+
+    def test_selection_equivaut_au_tri(self):
+        aleatoire = random.Random(5)
+        with unittest.mock.patch("protocole_esprit_critique.np", None):
+            for nombre in (1, 2, 63, 65, 1000, 5000):
+                for valeurs in ([aleatoire.random() for _ in range(nombre)],
+                                [aleatoire.randrange(4) * 0.5 for _ in range(nombre)],
+                                sorted(aleatoire.random() for _ in range(nombre))):
+                    attendu = sorted(valeurs)
+                    self.assertEqual(_mediane_haute(valeurs), attendu[nombre // 2])
+                    rang = aleatoire.randrange(nombre)
+                    self.assertEqual(_selection(list(valeurs), rang, random.Random(0)), attendu[rang])
+
+
+class TestStockage(unittest.TestCase):
+
+    def setUp(self):
+        repertoire = tempfile.TemporaryDirectory()
+        self.addCleanup(repertoire.cleanup)
+        self.chemin = os.path.join(repertoire.name, "cas.bin")
+
+    def test_aller_retour(self):
+        for mode_compact in (False, True):
+            protocole = _protocole(mode_compact=mode_compact)
+            protocole.identifier_contradictions()
+            protocole.faits[1].probabilite = 0.8
+            sauvegarder_cas(protocole, self.chemin)
+            for recharge_compact in (False, True):
+                recharge = charger_cas(self.chemin, mode_compact=recharge_compact)
+                self.assertEqual([f.description for f in recharge.faits],
+                                 [f.description for f in protocole.faits])
+                self.assertEqual([f.sources for f in recharge.faits], [f.sources for f in protocole.faits])
+                self.assertEqual([f.probabilite for f in recharge.faits],
+                                 [f.probabilite for f in protocole.faits])
+                self.assertEqual(_resume(recharge.contradictions), _resume(protocole.contradictions))
+                self.assertEqual(recharge.calcul_bayesien_probabilites(),
+                                 protocole.calcul_bayesien_probabilites())
+            with ouvrir_cas(self.chemin) as cas:
+                self.assertEqual(cas.fait(1)["probabilite"], 0.8)
+
+    def test_faits_retires_conserves(self):
+        protocole = _protocole(mode_compact=True)
+        protocole.identifier_contradictions()
+        for source in CORPUS.sources[::150]:
+            protocole.retirer_source(source)
+        sauvegarder_cas(protocole, self.chemin)
+        recharge = charger_cas(self.chemin)
+        self.assertEqual(_resume(recharge.identifier_contradictions()), _resume(protocole.contradictions))
+        self.assertEqual(recharge.calcul_bayesien_probabilites(), protocole.calcul_bayesien_probabilites())
+
+    def test_protocole_survit_a_la_fermeture(self):
+        sauvegarder_cas(_protocole(mode_compact=True), self.chemin)
+        cas = ouvrir_cas(self.chemin)
+        protocole = cas.protocole()
+        vue = cas.colonne("f.sol")
+        self.assertIs(cas.colonne("f.sol"), vue)
+        cas.fermer()
+        with self.assertRaises(ValueError):
+            vue[0]
+        self.assertTrue(protocole.faits[0].description)
+        protocole.ajouter_source(Source("Nouvelle", TypeSource.DOCUMENT, 0.9, ["Rapport technique mesurable"]))
+        self.assertTrue(protocole.livrer_conclusion(CORPUS.acteurs, CORPUS.evenements))
+
+    def test_sources_du_registre_partage_limitees_au_cas(self):
+        registre, milieu = RegistreSourcesPartage(), len(CORPUS.sources) // 2
+        autre = ProtocoleEspritCritique(mode_compact=True, registre_sources=registre)
+        autre.collecter_informations(CORPUS.sources[:milieu], limite_anomalies=10 ** 6)
+        protocole = ProtocoleEspritCritique(mode_compact=True, registre_sources=registre)
+        protocole.collecter_informations(CORPUS.sources[milieu:], limite_anomalies=10 ** 6)
+        protocole.identifier_contradictions()
+        sauvegarder_cas(protocole, self.chemin)
+        with ouvrir_cas(self.chemin) as cas:
+            self.assertEqual(cas.meta["nombre_sources"], len(CORPUS.sources) - milieu)
+            recharge = cas.protocole()
+        self.assertEqual([[s.nom for s in f.sources] for f in recharge.faits],
+                         [[s.nom for s in f.sources] for f in protocole.faits])
+
+        # Rétractation et ajout servis par l'index des descriptions du fichier, sans le matérialiser
+        retiree = CORPUS.sources[milieu + 5]
+        copie = next(s for f in recharge.faits for s in f.sources if s.nom == retiree.nom)
+        nouvelle = Source("Nouvelle", TypeSource.DOCUMENT, 0.9, list(CORPUS.sources[milieu + 1].informations))
+        for bilans in ((recharge.retirer_source(copie), protocole.retirer_source(retiree)),
+                       (recharge.ajouter_source(nouvelle, 10 ** 6), protocole.ajouter_source(nouvelle, 10 ** 6))):
+            for bilan in bilans:
+                bilan["nouvelles_contradictions"] = _resume(bilan["nouvelles_contradictions"])
+            self.assertEqual(*bilans)
+        self.assertIsNone(recharge._positions_par_description._complet)
+        self.assertEqual(_resume(recharge.contradictions), _resume(protocole.contradictions))
+        self.assertEqual(_resume(recharge.identifier_contradictions()), _resume(protocole.identifier_contradictions()))
+        self.assertEqual(recharge.calcul_bayesien_probabilites(), protocole.calcul_bayesien_probabilites())
+
+    def test_cas_recharge_suit_le_registre_partage(self):
+        cible = CORPUS.sources[3]
+        for mode_compact in (False, True):
+            registre = RegistreSourcesPartage()
+            protocole = ProtocoleEspritCritique(mode_compact=mode_compact, registre_sources=registre)
+            protocole.collecter_informations(CORPUS.sources, limite_anomalies=10 ** 6)
+            protocole.identifier_contradictions()
+            sauvegarder_cas(protocole, self.chemin)
+            recharges = [charger_cas(self.chemin, compact, registre_sources=registre) for compact in (False, True)]
+            self.assertEqual(len(registre), len(CORPUS.sources))
+            self.assertIs(recharges[1].faits[0].sources[0], protocole.faits[0].sources[0])
+
+            avant = [f.solidite_factuelle for f in protocole.faits]
+            registre.modifier_credibilite(cible.nom, cible.type_source, 0.01)
+            # Rechargé après la modification : la crédibilité du registre prime sur celle du fichier
+            recharges.append(charger_cas(self.chemin, mode_compact, registre_sources=registre))
+            probabilites = protocole.calcul_bayesien_probabilites()
+            solidites = [f.solidite_factuelle for f in protocole.faits]
+            self.assertNotEqual(solidites, avant)
+            for recharge in recharges:
+                for cle, valeur in recharge.calcul_bayesien_probabilites().items():
+                    self.assertAlmostEqual(valeur, probabilites[cle], places=12)
+                for fait, solidite in zip(recharge.faits, solidites):
+                    self.assertAlmostEqual(fait.solidite_factuelle, solidite, places=12)
+                self.assertEqual(_resume(recharge.identifier_contradictions()),
+                                 _resume(protocole.identifier_contradictions()))
+
+
+class TestFlux(unittest.TestCase):
+
+    def test_lecture_jsonl_en_flux(self):
+        repertoire = tempfile.TemporaryDirectory()
+        self.addCleanup(repertoire.cleanup)
+        cas = list(_cas_synthetiques(4))
+
+        def source(s):
+            return {"nom": s.nom, "type_source": s.type_source.value, "credibilite": s.credibilite,
+                    "informations": s.informations}
+
+        lignes = [{"identifiant": cas[0].identifiant, "sources": [source(s) for s in cas[0].sources],
+                   "acteurs": cas[0].acteurs}]
+        lignes += [dict(source(s), cas=cas[1].identifiant) for s in cas[1].sources]
+        lignes.insert(2, {"cas": cas[1].identifiant, "acteurs": cas[1].acteurs})
+        lignes += [{"cas": "invalide", "nom": "x", "type_source": "rumeur", "credibilite": 1,
+                    "informations": []}]
+        lignes += [dict(source(s), cas=cas[2].identifiant) for s in cas[2].sources]
+        chemin = os.path.join(repertoire.name, "cas.jsonl.gz")
+        with gzip.open(chemin, "wt", encoding="utf-8") as fichier:
+            for numero, ligne in enumerate(lignes):
+                fichier.write(json.dumps(ligne, ensure_ascii=False) + "\n")
+                if numero == 3:
+                    fichier.write("{tronqué\n\n")
+
+        attendus = {c.identifiant: analyser_cas(c).analyse for c in cas[:3]}
+        attendus[cas[2].identifiant] = analyser_cas(CasAnalyse(cas[2].identifiant, cas[2].sources)).analyse
+        for travailleurs in (1, 2):
+            resultats = list(analyser_flux(lire_cas(chemin), travailleurs, processus=False))
+            erreurs = sorted(r.identifiant for r in resultats if r.erreur)
+            self.assertEqual(erreurs, [f"{chemin}:5", "invalide"])
+            self.assertEqual({r.identifiant: r.analyse for r in resultats if not r.erreur}, attendus)
+
+        sortie = os.path.join(repertoire.name, "resultats.jsonl")
+        self.assertEqual(main_flux([chemin, "-o", sortie, "--conclusion"]), 1)
+        with open(sortie, encoding="utf-8") as fichier:
+            ecrits = [json.loads(ligne) for ligne in fichier]
+        self.assertEqual([e["identifiant"] for e in ecrits],
+                         [cas[0].identifiant, f"{chemin}:5", cas[1].identifiant, "invalide", cas[2].identifiant])
+        self.assertEqual(ecrits[0]["analyse"], attendus[cas[0].identifiant])
+        self.assertTrue(ecrits[0]["conclusion"])
+
+    def test_enregistrements_malformes(self):
+        valide = {"nom": "a", "type_source": "document", "credibilite": 0.8, "informations": ["Rapport"]}
+        for malforme in ({"informations": "abc"}, {"informations": ["x", 1]}, {"credibilite": 1.5},
+                         {"credibilite": -0.1}, {"credibilite": float("nan")}, {"credibilite": float("inf")}):
+            with self.assertRaises((TypeError, ValueError)):
+                source_depuis_dict(dict(valide, **malforme))
+
+        repertoire = tempfile.TemporaryDirectory()
+        self.addCleanup(repertoire.cleanup)
+        chemin = os.path.join(repertoire.name, "cas.jsonl")
+        lignes = [dict(valide, cas="c1"), dict(valide, cas="c1", limite_anomalies="abc"),
+                  dict(valide, cas="c2", informations="abc"), dict(valide, cas="c3", credibilite=2),
+                  dict(valide, cas="c4")]
+        with open(chemin, "w", encoding="utf-8") as fichier:
+            fichier.writelines(json.dumps(ligne) + "\n" for ligne in lignes)
+        attendus = [("c1", False), ("c1", True), ("c2", False), ("c3", False), ("c4", True)]
+        resultats = list(analyser_flux(lire_cas(chemin)))
+        self.assertEqual([(r.identifiant, r.erreur is None) for r in resultats], attendus)
+
+        # La ligne de commande va jusqu'au bout du fichier
+        sortie = os.path.join(repertoire.name, "resultats.jsonl")
+        self.assertEqual(main_flux([chemin, "-o", sortie]), 1)
+        with open(sortie, encoding="utf-8") as fichier:
+            ecrits = [json.loads(ligne) for ligne in fichier]
+        self.assertEqual([(e["identifiant"], e["erreur"] is None) for e in ecrits], attendus)
+
+
+class TestServeur(unittest.TestCase):
+
+    def test_cas_charges_et_requetes_regroupees(self):
+        sources = [{"nom": s.nom, "type_source": s.type_source.value, "credibilite": s.credibilite,
+                    "informations": s.informations} for s in CORPUS.sources]
+        reference = _protocole()
+        reference.identifier_contradictions()
+        nouvelle = Source("Nouvelle", TypeSource.DOCUMENT, 0.9, list(CORPUS.sources[0].informations))
+
+        async def scenario():
+            service = ServeurProtocole(nombre_threads=2)
+            serveur = await service.demarrer(port=0)
+            port = serveur.sockets[0].getsockname()[1]
+            clients = [await ClientProtocole.connecter(port=port) for _ in range(8)]
+            try:
+                statut, _ = await clients[0].requete("PUT", "/cas/demo", {
+                    "sources": sources, "acteurs": CORPUS.acteurs, "evenements": CORPUS.evenements,
+                    "limite_anomalies": 10 ** 6})
+                self.assertEqual(statut, 201)
+                attendu = json.loads(json.dumps(reference.determiner_version_probable(CORPUS.acteurs,
+                                                                                      CORPUS.evenements)))
+                self.assertEqual(await clients[0].requete("GET", "/cas/demo/version"), (200, attendu))
+
+                # Lectures identiques simultanées : un seul calcul
+                calculs = service.calculs
+                async with service.cas["demo"].verrou:
+                    lectures = asyncio.gather(*(client.requete("GET", "/cas/demo/conclusion")
+                                                for client in clients))
+                    while service.requetes_regroupees < len(clients) - 1:
+                        await asyncio.sleep(0.001)
+                reponses = await lectures
+                self.assertEqual(service.calculs, calculs + 1)
+                self.assertEqual({json.dumps(r) for r in reponses}, {json.dumps(reponses[0])})
+                self.assertEqual(reponses[0][1]["conclusion"],
+                                 reference.livrer_conclusion(CORPUS.acteurs, CORPUS.evenements))
+
+                # Ajout puis rétractation incrémentaux
+                reference.ajouter_source(nouvelle, 10 ** 6)
+                statut, _ = await clients[1].requete("POST", "/cas/demo/sources", [
+                    {"nom": "Nouvelle", "type_source": "document", "credibilite": 0.9,
+                     "informations": nouvelle.informations}])
+                self.assertEqual(statut, 200)
+                attendu = json.loads(json.dumps(reference.determiner_version_probable(CORPUS.acteurs,
+                                                                                      CORPUS.evenements)))
+                self.assertEqual(await clients[2].requete("GET", "/cas/demo/version"), (200, attendu))
+                statut, bilan = await clients[2].requete("DELETE", "/cas/demo/sources/Nouvelle")
+                self.assertEqual((statut, bilan["sources"]), (200, 1))
+                self.assertEqual((await clients[3].requete("GET", "/cas/inconnu/version"))[0], 404)
+                self.assertEqual((await clients[3].requete("PUT", "/sources/Nouvelle", {
+                    "type_source": "document", "credibilite": 0.1}))[0], 409)
+
+                # Entrées invalides : 400, le cas existant reste intact
+                for corps in ({"limite_anomalies": "beaucoup"}, {"limite_anomalies": -1},
+                              {"acteurs": "Dupont"}, ["demo"]):
+                    self.assertEqual((await clients[4].requete("PUT", "/cas/demo", corps))[0], 400)
+                generation = service.cas["demo"].generation
+                for corps in (["acteurs"], {"evenements": [1, 2]}):
+                    self.assertEqual((await clients[4].requete("PUT", "/cas/demo/contexte", corps))[0], 400)
+                self.assertEqual(service.cas["demo"].generation, generation)
+                self.assertEqual((await clients[4].requete("GET", "/cas/demo/version"))[0], 200)
+            finally:
+                for client in clients:
+                    await client.fermer()
+                serveur.close()
+                await serveur.wait_closed()
+                service.fermer()
+
+        asyncio.run(asyncio.wait_for(scenario(), timeout=60))
+
+
+class TestPaquetsRegles(unittest.TestCase):
+
+    def setUp(self):
+        repertoire = tempfile.TemporaryDirectory()
+        self.addCleanup(repertoire.cleanup)
+        self.chemin = os.path.join(repertoire.name, "aviation.json")
+        self._ecrire({"mots_cles_anomalies": ["Décrochage"], "mots_opposition_directs": [["cabré", "piqué"]]}, 1)
+
+    def _ecrire(self, donnees, version):
+        with open(self.chemin, "w", encoding="utf-8") as fichier:
+            json.dump(donnees, fichier)
+        os.utime(self.chemin, ns=(version * 10 ** 9, version * 10 ** 9))
+
+    def test_paquet_compile_une_fois_et_partage(self):
+        premier, second = ProtocoleEspritCritique(regles=self.chemin), ProtocoleEspritCritique(regles=self.chemin)
+        self.assertIs(premier.automate, second.automate)
+        self.assertIs(ProtocoleEspritCritique().automate, ProtocoleEspritCritique().automate)
+        self.assertEqual(premier.regles.nom, "aviation")
+        self.assertTrue(premier._est_anomalie("Décrochage signalé"))
+        self.assertFalse(premier._est_anomalie("Trajectoire impossible"))
+        self.assertEqual(premier.regles.bonus_type_source[TypeSource.DOCUMENT], 0.3)
+
+    def test_remplacement_a_chaud(self):
+        protocole = ProtocoleEspritCritique(regles=self.chemin)
+        for k in range(3):
+            protocole.ajouter_source(Source(f"A{k}", TypeSource.DOCUMENT, 0.9, ["Avion cabré", "Moteur en feu"]))
+            protocole.ajouter_source(Source(f"B{k}", TypeSource.DOCUMENT, 0.9, ["Avion piqué", "Moteur éteint"]))
+        self.assertEqual(len(protocole.identifier_contradictions()), 1)
+        self.assertFalse(protocole.recharger_regles())
+        self._ecrire({"mots_opposition_directs": [["en feu", "éteint"], ["cabré", "piqué"]]}, 2)
+        self.assertTrue(protocole.recharger_regles())
+        self.assertIs(protocole.regles, charger_regles(self.chemin))
+        self.assertEqual(len(protocole.contradictions), 2)
+
+    def test_cle_inconnue_refusee(self):
+        self._ecrire({"mots_cles_anomalie": ["x"]}, 3)
+        with self.assertRaises(ValueError):
+            charger_regles(self.chemin)
+
+
+class TestBenchmark(unittest.TestCase):
+
+    @staticmethod
+    def _rapport(etalon=0.01, **secondes_par_etape):
+        mesures = {etape: {"secondes": secondes_par_etape.get(etape, 0.1), "pic_memoire_octets": 1 << 20}
+                   for etape in ETAPES}
+        return {"version": VERSION_RAPPORT, "graine": 0, "mode_compact": False, "parametres": {},
+                "etalons_secondes": {"1000": etalon}, "mesures": {"1000": mesures}}
+
+    def test_rapport_identique_ou_dans_le_bruit_accepte(self):
+        reference = self._rapport()
+        verifier(self._rapport(), reference)
+        # 0,1 s * 1,25 + 5 % des 0,7 s de la taille = 0,16 s
+        verifier(self._rapport(livrer_conclusion=0.155), reference)
+        # Machine deux fois plus lente : l'étalon compense
+        verifier(self._rapport(etalon=0.02, **dict.fromkeys(ETAPES, 0.2)), reference)
+
+    def test_regression_leve_une_erreur(self):
+        reference = self._rapport()
+        with self.assertRaises(RegressionPerformance) as contexte:
+            verifier(self._rapport(identifier_contradictions=0.2), reference)
+        self.assertIn("identifier_contradictions", str(contexte.exception))
+        rapport = self._rapport()
+        rapport["mesures"]["1000"]["collecter_informations"]["pic_memoire_octets"] = 2 << 20
+        self.assertEqual(len(comparer_a_reference(rapport, reference)), 1)
+
+    def test_taille_absente_de_la_reference_signalee(self):
+        rapport, reference = self._rapport(), self._rapport()
+        rapport["mesures"]["1000000"] = rapport["mesures"]["1000"]
+        rapport["etalons_secondes"]["1000000"] = 0.01
+        regressions = comparer_a_reference(rapport, reference)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn("1000000 faits", regressions[0])
+
+
+class TestCasLimites(unittest.TestCase):
+
+    def test_etapes_instrumentees_acceptent_none(self):
+        protocole = _protocole(instrumentation=Instrumentation(actif=True))
+        protocole.livrer_conclusion(None, None)
+        protocole.analyser_cui_bono(None)
+        protocole.appliquer_rasoir_occam_criminologique(None)
+        mesures = protocole.instrumentation.instantane()
+        self.assertEqual(mesures["analyser_cui_bono"]["elements"], 0)
+        self.assertEqual(mesures["appliquer_rasoir_occam_criminologique"]["elements"], 0)
+
+    def test_instrumentation_mesures_rappels_et_spans(self):
+        spans = []
+
+        class Span:
+            def __init__(self, etape, attributs):
+                self.etape, self.attributs, self.sortie = etape, attributs, None
+
+            def __enter__(self):
+                spans.append(self)
+
+            def __exit__(self, type_exception, exception, trace):
+                self.sortie = type_exception
+
+        rappels = []
+        instrumentation = Instrumentation(actif=True, rappels=[rappels.append], fabrique_span=Span)
+        protocole = _protocole(instrumentation=instrumentation)
+        protocole.identifier_contradictions()
+        try:
+            raise KeyError("traitée par l'appelant")
+        except KeyError:
+            protocole.livrer_conclusion(CORPUS.acteurs, CORPUS.evenements)
+        mesures = instrumentation.instantane()
+        self.assertEqual(mesures["collecter_informations"]["appels"], 1)
+        self.assertGreater(mesures["collecter_informations"]["duree_mur"], 0)
+        self.assertGreater(mesures["collecter_informations"]["passages_mots_cles"], 0)
+        self.assertGreater(mesures["identifier_contradictions"]["paires_comparees"], 0)
+        self.assertGreaterEqual(mesures["livrer_conclusion"]["duree_mur"],
+                                mesures["determiner_version_probable"]["duree_mur"])
+        self.assertLessEqual(mesures["livrer_conclusion"]["duree_propre"], mesures["livrer_conclusion"]["duree_mur"])
+        self.assertTrue(all(cumul["duree_cpu"] >= 0 for cumul in mesures.values()))
+        # Rappels dans l'ordre de fin des étapes, spans dans l'ordre d'entrée
+        etapes = [mesure.etape for mesure in rappels]
+        self.assertEqual(sorted(etapes), sorted(span.etape for span in spans))
+        self.assertEqual(etapes[:2], ["collecter_informations", "identifier_contradictions"])
+        self.assertEqual(spans[1].attributs, {"elements": len(protocole.faits)})
+        self.assertEqual([span.sortie for span in spans], [None] * len(spans))
+
+        with self.assertRaises(KeyError):
+            protocole.analyser_cui_bono([{"gains": ["x"]}])
+        self.assertEqual(rappels[-1].etape, "analyser_cui_bono")
+        self.assertIs(spans[-1].sortie, KeyError)
+        self.assertEqual(instrumentation.instantane()["analyser_cui_bono"]["appels"],
+                         mesures["analyser_cui_bono"]["appels"] + 1)
+
+    def test_instrumentation_suit_les_allocations_transitoires(self):
+        instrumentation = Instrumentation(actif=True, allocations=True)
+        protocole = _protocole(instrumentation=instrumentation)
+        self.assertFalse(tracemalloc.is_tracing())
+        conserves = []
+
+        def interne():
+            tampon = bytearray(10 ** 6)
+            del tampon
+
+        def externe():
+            instrumentation.mesurer("interne", protocole, 0, interne)
+            conserves.append(bytearray(2 * 10 ** 5))
+
+        instrumentation.mesurer("externe", protocole, 0, externe)
+        protocole.livrer_conclusion(CORPUS.acteurs, CORPUS.evenements)
+        self.assertFalse(tracemalloc.is_tracing())
+        mesures = instrumentation.instantane()
+        self.assertGreater(mesures["collecter_informations"]["memoire_nette"], 0)
+        for etape, cumul in mesures.items():
+            self.assertGreaterEqual(cumul["pic_memoire"], cumul["memoire_nette"], etape)
+        # Tampon libéré avant la fin de l'étape : compté dans le pic, y
+        # compris celui de l'étape englobante
+        self.assertGreater(mesures["interne"]["pic_memoire"], 10 ** 6)
+        self.assertLess(mesures["interne"]["memoire_nette"], 10 ** 5)
+        self.assertGreater(mesures["externe"]["pic_memoire"], 10 ** 6)
+        self.assertGreaterEqual(mesures["externe"]["memoire_nette"], 2 * 10 ** 5)
+        sans_suivi = Instrumentation(actif=True)
+        _protocole(instrumentation=sans_suivi)
+        self.assertEqual(sans_suivi.instantane()["collecter_informations"]["pic_memoire"], 0)
+
+    def test_instrumentation_inactive_n_enregistre_rien(self):
+        rappels, spans = [], []
+        instrumentation = Instrumentation(rappels=[rappels.append],
+                                          fabrique_span=lambda etape, attributs: spans.append(etape))
+        protocole = _protocole(instrumentation=instrumentation)
+        protocole.identifier_contradictions()
+        protocole.livrer_conclusion(CORPUS.acteurs, CORPUS.evenements)
+        self.assertEqual((instrumentation.instantane(), rappels, spans), ({}, [], []))
+
+    def test_fenetre_glissante_equivaut_au_lot(self):
+        aleatoire = random.Random(1)
+        for _ in range(200):
+            evenements, t = [], aleatoire.uniform(-1e6, 1e6)
+            for _ in range(aleatoire.randint(2, 15)):
+                t += aleatoire.choice([0.0, 0.1, 0.3, 1e-7, aleatoire.uniform(0, 3)])
+                fenetre = aleatoire.choice([0.1, 0.3, 1.0, 0.2 + 0.1, aleatoire.uniform(0, 2)])
+                evenements.append({"timestamp": t, "fenetre_critique": fenetre})
+            fenetre_glissante = FenetreSynchronisation()
+            total = sum(fenetre_glissante.ajouter(evenement) for evenement in evenements)
+            self.assertEqual(total, ProtocoleEspritCritique._compter_synchronisations(evenements))
+        fenetre_glissante = FenetreSynchronisation()
+        self.assertEqual(fenetre_glissante.ajouter({"timestamp": math.nan, "fenetre_critique": 1}), 0)
+
+    def test_synchronisations_equivalent_a_la_double_boucle(self):
+        def double_boucle(evenements):
+            return sum(abs(a.get("timestamp", 0) - b.get("timestamp", 0)) < a.get("fenetre_critique", 0)
+                       for i, a in enumerate(evenements) for b in evenements[i + 1:])
+
+        aleatoire = random.Random(3)
+        for _ in range(300):
+            base = aleatoire.choice([0.0, 1e6, -3.7e9])
+            evenements = [{"timestamp": base + aleatoire.choice([0.1, 0.2, 0.3, 0.7, 1.0]) * aleatoire.randint(0, 6),
+                           "fenetre_critique": aleatoire.choice([0.1, 0.3, 0.2 + 0.1, 0.6, -1, 0, math.nan])}
+                          for _ in range(aleatoire.randint(2, 12))]
+            self.assertEqual(ProtocoleEspritCritique._compter_synchronisations(evenements), double_boucle(evenements))
+
+        # Tout type ordonné et soustractible : datetime et timedelta
+        debut = datetime.datetime(2024, 3, 1, 12, 0)
+        evenements = [{"nom": "a", "timestamp": debut, "fenetre_critique": datetime.timedelta(minutes=30)},
+                      {"nom": "b", "timestamp": debut + datetime.timedelta(minutes=20),
+                       "fenetre_critique": datetime.timedelta(minutes=5)},
+                      {"nom": "c", "timestamp": debut + datetime.timedelta(hours=2),
+                       "fenetre_critique": datetime.timedelta(0)}]
+        self.assertEqual(ProtocoleEspritCritique._compter_synchronisations(evenements), double_boucle(evenements))
+        self.assertEqual(ProtocoleEspritCritique._compter_synchronisations(evenements), 1)
+        fenetre_glissante = FenetreSynchronisation()
+        self.assertEqual(sum(fenetre_glissante.ajouter(evenement) for evenement in evenements), 1)
+        patterns = ProtocoleEspritCritique().appliquer_rasoir_occam_criminologique(evenements)
+        self.assertEqual(patterns["synchronisations_detectees"], 1)
+
+    def test_memoisation_copie_et_identite(self):
+        protocole = _protocole()
+        acteurs = [dict(acteur) for acteur in CORPUS.acteurs]
+        resultat = protocole.determiner_version_probable(acteurs, CORPUS.evenements)
+        reference = protocole.determiner_version_probable(acteurs, CORPUS.evenements)
+        for valeur in resultat.values():
+            if isinstance(valeur, dict):
+                valeur.clear()
+        self.assertEqual(protocole.determiner_version_probable(acteurs, CORPUS.evenements), reference)
+
+        avant = protocole.analyser_cui_bono(acteurs)
+        acteurs.append({"nom": "Nouvel acteur", "gains": ["pouvoir"] * 5, "pouvoir": 1.0})
+        self.assertNotEqual(protocole.analyser_cui_bono(acteurs), avant)
+
+    def test_memoisation_voit_les_modifications_en_place(self):
+        for mode_compact in (False, True):
+            protocole = _protocole(mode_compact=mode_compact)
+            protocole.identifier_contradictions()
+            avant = protocole.calcul_bayesien_probabilites()
+            self.assertLess(avant["contradictions_validees"], len(protocole.contradictions))
+            for contradiction in protocole.contradictions:
+                contradiction.validee_independamment = True
+            self.assertEqual(protocole.calcul_bayesien_probabilites()["contradictions_validees"],
+                             len(protocole.contradictions))
+            conclusion = protocole.livrer_conclusion()
+            for fait in protocole.faits:
+                fait.confirme_par_multiples_sources = True
+            self.assertNotEqual(protocole.livrer_conclusion(), conclusion)
+
+        protocole = _protocole()
+        acteurs = [{"nom": "A", "gains": ["x"], "pouvoir": 1.0}, {"nom": "B", "gains": ["x"], "pouvoir": 1.0},
+                   {"nom": "C", "gains": ["x"], "pouvoir": 1.0}]
+        self.assertEqual(protocole.analyser_cui_bono(acteurs), {"analyse_non_concluante": True})
+        acteurs[0]["gains"].extend(["y", "z"])
+        self.assertEqual(protocole.analyser_cui_bono(acteurs), {"A": 3.0, "B": 1.0, "C": 1.0})
+        # Arguments inchangés : les étapes imbriquées sont reprises du cache
+        protocole.livrer_conclusion(acteurs, CORPUS.evenements)
+        succes = protocole._succes_cache
+        protocole.livrer_conclusion(acteurs, CORPUS.evenements)
+        self.assertEqual(protocole._succes_cache, succes + 1)
+        evenements = [dict(e) for e in CORPUS.evenements]
+        avant = protocole.appliquer_rasoir_occam_criminologique(evenements)
+        for evenement in evenements:
+            evenement["beneficiaires"] = ["Unique"]
+        self.assertNotEqual(protocole.appliquer_rasoir_occam_criminologique(evenements), avant)
+
+    def test_erreur_d_ingestion_propagee(self):
+        async def flux():
+            yield Source("Valide", TypeSource.DOCUMENT, 0.9, ["Rapport technique"])
+            yield Source("Invalide", TypeSource.DOCUMENT, 0.9, None)
+
+        async def scenario():
+            async with ProtocoleAsynchrone(taille_file=1, taille_lot=1) as protocole:
+                await protocole.ingerer(flux())
+
+        with self.assertRaises(TypeError):
+            asyncio.run(asyncio.wait_for(scenario(), timeout=10))
+
+    def test_lot_equivaut_aux_cas_isoles(self):
+        cas = list(_cas_synthetiques(6, graine=4))
+        cas.append(CasAnalyse("invalide", [Source("X", TypeSource.DOCUMENT, 0.5, None)]))
+        attendus = {c.identifiant: analyser_cas(c).analyse for c in cas[:-1]}
+        for processus in (False, True):
+            resultats = {r.identifiant: r for r in analyser_lot(iter(cas), nombre_travailleurs=2,
+                                                                processus=processus)}
+            self.assertEqual(set(resultats), set(attendus) | {"invalide"})
+            self.assertTrue(resultats["invalide"].erreur)
+            self.assertEqual({i: r.analyse for i, r in resultats.items() if not r.erreur}, attendus)
+
+    def test_stabilisation_par_periode_calme(self):
+        envoyees = CORPUS.sources[:12]
+
+        async def flux_sans_fin():
+            for source in envoyees:
+                await asyncio.sleep(0.005)
+                yield source
+            await asyncio.Event().wait()
+
+        async def scenario():
+            async with ProtocoleAsynchrone(limite_anomalies=10 ** 6) as protocole:
+                producteur = protocole.brancher(flux_sans_fin())
+                boucle = asyncio.get_running_loop()
+                debut = boucle.time()
+                conclusion = await protocole.livrer_conclusion(CORPUS.acteurs, CORPUS.evenements, calme=0.2)
+                # Pas de conclusion avant la fin des arrivages suivie de 0,2 s de calme
+                self.assertGreaterEqual(boucle.time() - debut, 0.2 + 0.005 * len(envoyees) * 0.5)
+                self.assertFalse(producteur.done())
+                self.assertEqual(protocole.sources_ingerees, len(envoyees))
+                return conclusion
+
+        reference = ProtocoleEspritCritique()
+        for source in envoyees:
+            reference.ajouter_source(source, limite_anomalies=10 ** 6)
+        self.assertEqual(asyncio.run(asyncio.wait_for(scenario(), timeout=30)),
+                         reference.livrer_conclusion(CORPUS.acteurs, CORPUS.evenements))
+
+    def test_delai_compte_depuis_le_demarrage(self):
+        resultats = list(analyser_lot(_cas_synthetiques(12), nombre_travailleurs=1,
+                                      en_vol_max=6, delai_par_cas=5))
+        self.assertEqual(len(resultats), 12)
+        self.assertEqual([r.erreur for r in resultats if r.erreur], [])
+
+
+if __name__ == "__main__":
+    unittest.main()